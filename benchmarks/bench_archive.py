@@ -0,0 +1,105 @@
+"""
+归档导入导出性能测试
+把含 N 个文件的子树导出为 tar 包再导入到另一个用户:
+- 逐节点遍历: 每个目录调用一次 get_vfs_children，每个文件整体读出后写入归档
+- 流式导出: 一次递归查询取出整个子树，文件内容按块写入归档
+并用 tracemalloc 记录两种导出与流式导入的内存峰值
+
+用法:
+    python -m benchmarks.bench_archive --files 20000 --size 4096
+"""
+import argparse
+import io
+import tarfile
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.data.database import Database
+from src.systems.archive import read_archive, write_archive
+
+
+def build_tree(db: Database, user_id: int, files: int, size: int) -> int:
+    """root/dir_xx/file_xxxxx.txt；返回子树根节点ID"""
+    line = "机械计算时代的日志 0123456789\n"
+    content = (line * (size // len(line) + 1))[:size]
+    with db.connection():
+        root = db.create_vfs_node(user_id, None, "root", is_directory=True)
+        dirs = [
+            db.create_vfs_node(user_id, root, f"dir_{i:02d}", is_directory=True)
+            for i in range(max(1, files // 500))
+        ]
+        for i in range(files):
+            db.create_vfs_node(user_id, dirs[i % len(dirs)], f"file_{i:05d}.txt", content=content)
+    return root
+
+
+def _dir(name: str) -> tarfile.TarInfo:
+    info = tarfile.TarInfo(name)
+    info.type = tarfile.DIRTYPE
+    return info
+
+
+def naive_export(db: Database, user_id: int, root_id: int, host_file: Path) -> None:
+    """逐节点遍历导出"""
+    with tarfile.open(host_file, "w", format=tarfile.PAX_FORMAT) as tar:
+        def walk(node_id: int, path: str) -> None:
+            for child in db.get_vfs_children(user_id, node_id):
+                name = f"{path}/{child['name']}"
+                if child['is_directory']:
+                    tar.addfile(_dir(name))
+                    walk(child['id'], name)
+                else:
+                    data = db.read_vfs_content(child['id']).encode("utf-8")
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+        
+        tar.addfile(_dir("root"))
+        walk(root_id, "root")
+
+
+def measure(func, *args) -> tuple[float, int]:
+    """(耗时, 内存峰值)；内存单独跑一遍，避免 tracemalloc 影响计时"""
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="归档导入导出性能测试")
+    parser.add_argument("--files", type=int, default=20000, help="文件数")
+    parser.add_argument("--size", type=int, default=4096, help="每个文件的字符数")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db = Database(tmp / "bench.db")
+        source = db.create_user("source", "x")
+        root = build_tree(db, source, args.files, args.size)
+        
+        naive, naive_peak = measure(naive_export, db, source, root, tmp / "naive.tar")
+        stream, stream_peak = measure(write_archive, db, source, root, tmp / "stream.tar")
+        size = (tmp / "stream.tar").stat().st_size
+        
+        targets = iter([db.create_user(f"target{i}", "x") for i in range(2)])
+        imported, import_peak = measure(
+            lambda: read_archive(db, next(targets), None, tmp / "stream.tar")
+        )
+        db.close()
+    
+    mb = size / 1024 / 1024
+    print(f"文件数: {args.files}, 归档大小: {mb:.1f} MB")
+    print(f"逐节点遍历导出: {naive:.2f} 秒 ({mb / naive:.1f} MB/s), 内存峰值 {naive_peak / 1024:.0f} KB")
+    print(f"流式导出: {stream:.2f} 秒 ({mb / stream:.1f} MB/s), 内存峰值 {stream_peak / 1024:.0f} KB")
+    print(f"流式导入: {imported:.2f} 秒 ({mb / imported:.1f} MB/s), 内存峰值 {import_peak / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
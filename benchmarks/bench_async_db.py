@@ -0,0 +1,80 @@
+"""
+异步数据库访问层性能测试
+对比 "每次操作单独提交" 与 AsyncDatabase (写合并提交) 在不同并发会话数下的
+混合读写吞吐量 (约 80% 读 / 20% 写)
+
+用法:
+    python -m benchmarks.bench_async_db
+    python -m benchmarks.bench_async_db --ops 400 --sessions 1 8 64
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from src.data.async_database import AsyncDatabase
+from src.data.database import Database
+
+
+async def session_sync(db: Database, user_id: int, ops: int) -> None:
+    """基线: 每个操作在线程中直接调用 Database (各自提交)"""
+    for i in range(ops):
+        if i % 5 == 0:
+            await asyncio.to_thread(db.create_vfs_node, user_id, None, f"f{i}", False, "x")
+        elif i % 5 in (1, 2):
+            await asyncio.to_thread(db.get_vfs_children, user_id, None)
+        else:
+            await asyncio.to_thread(db.get_vfs_node_by_path, user_id, None, f"f{i - i % 5}")
+
+
+async def session_async(adb: AsyncDatabase, user_id: int, ops: int) -> None:
+    """AsyncDatabase: 读走读线程池，写进入写队列"""
+    for i in range(ops):
+        if i % 5 == 0:
+            await adb.create_vfs_node(user_id, None, f"f{i}", False, "x")
+        elif i % 5 in (1, 2):
+            await adb.get_vfs_children(user_id, None)
+        else:
+            await adb.get_vfs_node_by_path(user_id, None, f"f{i - i % 5}")
+
+
+async def run(mode: str, sessions: int, ops: int, tmpdir: Path) -> float:
+    """运行一轮测试，返回每秒操作数"""
+    db = Database(tmpdir / f"{mode}_{sessions}.db", pool_size=8)
+    user_ids = [db.create_user(f"u{i}", "x$y") for i in range(sessions)]
+    
+    adb = AsyncDatabase(db) if mode == "async" else None
+    start = time.perf_counter()
+    if adb is not None:
+        await asyncio.gather(*(session_async(adb, uid, ops) for uid in user_ids))
+    else:
+        await asyncio.gather(*(session_sync(db, uid, ops) for uid in user_ids))
+    elapsed = time.perf_counter() - start
+    
+    batches = ""
+    if adb is not None:
+        adb.close()
+        batches = f"  (写入 {adb.writes_committed} 次 / 提交 {adb.batches_committed} 次)"
+    db.close()
+    
+    throughput = sessions * ops / elapsed
+    print(f"{mode:>6} | 会话 {sessions:>3} | {throughput:>9.0f} ops/s{batches}")
+    return throughput
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="异步数据库访问层性能测试")
+    parser.add_argument("--ops", type=int, default=200, help="每个会话的操作数")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 8, 64])
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for sessions in args.sessions:
+            sync = asyncio.run(run("sync", sessions, args.ops, Path(tmp)))
+            fast = asyncio.run(run("async", sessions, args.ops, Path(tmp)))
+            print(f"{'':>6} | 加速比 {fast / sync:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+登录 / 注册的数据库开销
+- 登录: 原来的做法 (每次查询用户 + 单独更新登录时间) 与 用户缓存 + 单条语句校验并更新
+- 注册: 先查询再插入 与 直接插入 (由唯一约束判断重名)
+- 暴力尝试: 同一个用户名连续 N 次错误密码，对比有无登录限流时落到数据库的语句数和耗时
+  (另有一半尝试使用不存在的用户名，检验 "用户不存在" 的缓存)
+
+用法:
+    python -m benchmarks.bench_auth --logins 2000 --attempts 5000
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from src.data.database import Database
+from src.data.models import UserSession
+from src.systems.auth import AuthSystem, LoginThrottle
+
+
+def count_statements(db: Database) -> list[int]:
+    """统计连接池中连接执行的 SQL 语句数 (包括 BEGIN / COMMIT)"""
+    counter = [0]
+    acquire = db._acquire
+    
+    def traced() -> sqlite3.Connection:
+        conn = acquire()
+        conn.set_trace_callback(lambda _: counter.__setitem__(0, counter[0] + 1))
+        return conn
+    db._acquire = traced
+    return counter
+
+
+def old_login(db: Database, username: str, password: str) -> bool:
+    """原来的登录流程: 查询用户、校验密码、更新登录时间、创建会话 (不经过用户缓存)"""
+    db.user_cache.clear()
+    user = db.get_user_by_username(username)
+    if not user or not AuthSystem._verify_password(password, user["password_hash"]):
+        return False
+    db.update_user_login(user["id"])
+    UserSession(user_id=user["id"], username=user["username"], current_path=user["current_path"] or "/")
+    return True
+
+
+def old_register(db: Database, username: str, password: str) -> bool:
+    """原来的注册流程: 先查询是否存在再插入"""
+    db.user_cache.clear()
+    if db.get_user_by_username(username):
+        return False
+    return db.create_user(username, AuthSystem._hash_password(password)[0]) is not None
+
+
+def timed(counter: list[int], func, count: int) -> tuple[float, float]:
+    """(每次耗时 μs, 每次 SQL 语句数)"""
+    counter[0] = 0
+    start = time.perf_counter()
+    for i in range(count):
+        func(i)
+    seconds = time.perf_counter() - start
+    return seconds / count * 1e6, counter[0] / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="登录 / 注册的数据库开销")
+    parser.add_argument("--users", type=int, default=200, help="用户数")
+    parser.add_argument("--logins", type=int, default=2000, help="正常登录次数")
+    parser.add_argument("--attempts", type=int, default=5000, help="暴力尝试次数")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "game.db")
+        counter = count_statements(db)
+        
+        old_reg = timed(counter, lambda i: old_register(db, f"old_{i}", "secret"), args.users)
+        auth = AuthSystem(db, LoginThrottle())
+        new_reg = timed(counter, lambda i: auth.register(f"new_{i}", "secret"), args.users)
+        dup_old = timed(counter, lambda i: old_register(db, f"old_{i}", "secret"), args.users)
+        dup_new = timed(counter, lambda i: auth.register(f"new_{i}", "secret"), args.users)
+        
+        old = timed(counter, lambda i: old_login(db, f"new_{i % args.users}", "secret"), args.logins)
+        
+        def new_login(i: int) -> None:
+            auth.login(f"new_{i % args.users}", "secret")
+            # 只结束会话，不写回路径，与原流程对比
+            auth._current_session = None
+        new = timed(counter, new_login, args.logins)
+        
+        def attempt(auth: AuthSystem):
+            def run(i: int) -> None:
+                auth.login("new_0" if i % 2 else "ghost", f"guess{i}")
+            return run
+        brute_old = timed(counter, lambda i: old_login(db, "new_0" if i % 2 else "ghost", f"guess{i}"), args.attempts)
+        brute_new = timed(counter, attempt(AuthSystem(db, LoginThrottle())), args.attempts)
+        db.close()
+    
+    def report(label: str, result: tuple[float, float]) -> None:
+        print(f"{label}: {result[0]:.1f} μs/次, {result[1]:.2f} 条 SQL/次")
+    
+    report("注册 (先查询再插入)", old_reg)
+    report("注册 (直接插入)", new_reg)
+    report("重名注册 (先查询)", dup_old)
+    report("重名注册 (唯一约束)", dup_new)
+    report("登录 (查询 + 更新)", old)
+    report("登录 (缓存 + 单条语句)", new)
+    report(f"暴力尝试 x{args.attempts} (无缓存、无限流)", brute_old)
+    report(f"暴力尝试 x{args.attempts} (缓存 + 限流)", brute_new)
+
+
+if __name__ == "__main__":
+    main()
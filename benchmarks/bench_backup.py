@@ -0,0 +1,112 @@
+"""
+在线备份对交互延迟的影响
+主线程模拟一个玩家反复执行 ls + 写文件，同时在后台线程备份存档:
+- 无备份: 基准
+- 分批备份: 每批 --pages 页，批间暂停 --pause 秒 (默认参数)
+- 一次性备份: 不分批、不暂停
+输出交互操作的延迟分位数和备份耗时，以及 quick_check / integrity_check 的耗时
+
+用法:
+    python -m benchmarks.bench_backup --files 20000 --size 2048
+"""
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.data.backup import PAGES, PAUSE, backup_database, check_integrity
+from src.data.database import Database
+from src.systems.filesystem import VirtualFileSystem
+
+
+def build(db: Database, files: int, size: int) -> int:
+    user_id = db.create_user("bench", "x")
+    content = ("差分机的齿轮日志 " * (size // 8 + 1))[:size]
+    with db.connection():
+        dirs = [db.create_vfs_node(user_id, None, f"dir_{i:02d}", is_directory=True) for i in range(50)]
+        for i in range(files):
+            db.create_vfs_node(user_id, dirs[i % len(dirs)], f"file_{i:05d}.txt", content=content)
+    return user_id
+
+
+def interactive(vfs: VirtualFileSystem, done: threading.Event, minimum: int) -> list[float]:
+    """反复执行 ls + 写文件直到 done (至少 minimum 次)，返回每次的耗时"""
+    latencies = []
+    while not done.is_set() or len(latencies) < minimum:
+        start = time.perf_counter()
+        vfs.ls("dir_07")
+        vfs.write("notes.txt", f"第 {len(latencies)} 条笔记")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def measure(
+    db_path: Path,
+    vfs: VirtualFileSystem,
+    pages: int | None,
+    pause: float
+) -> tuple[list[float], float]:
+    """(交互延迟, 备份耗时)；pages 为 None 时不备份，只跑 200 次交互操作"""
+    done = threading.Event()
+    seconds = 0.0
+    if pages is None:
+        done.set()
+        return sorted(interactive(vfs, done, 200)), seconds
+    
+    def run_backup() -> None:
+        nonlocal seconds
+        seconds = backup_database(db_path, db_path.parent / "backups", pages, pause, verify=False).seconds
+        done.set()
+    
+    thread = threading.Thread(target=run_backup)
+    thread.start()
+    latencies = interactive(vfs, done, 20)
+    thread.join()
+    return sorted(latencies), seconds
+
+
+def report(label: str, latencies: list[float], seconds: float) -> None:
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    text = f"{label}: 交互 p50 {pct(0.5):.2f} ms, p99 {pct(0.99):.2f} ms, 最大 {latencies[-1] * 1000:.1f} ms"
+    if seconds:
+        text += f"; 备份用时 {seconds:.2f} 秒"
+    print(text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="在线备份对交互延迟的影响")
+    parser.add_argument("--files", type=int, default=20000, help="文件数")
+    parser.add_argument("--size", type=int, default=2048, help="每个文件的字符数")
+    parser.add_argument("--pages", type=int, default=PAGES, help="分批备份每批的页数")
+    parser.add_argument("--pause", type=float, default=PAUSE, help="分批备份批间暂停的秒数")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "game.db"
+        db = Database(db_path)
+        vfs = VirtualFileSystem(build(db, args.files, args.size), db)
+        size = db_path.stat().st_size / 1024 / 1024
+        
+        baseline = measure(db_path, vfs, None, 0)
+        batched = measure(db_path, vfs, args.pages, args.pause)
+        at_once = measure(db_path, vfs, -1, 0)
+        
+        start = time.perf_counter()
+        check_integrity(db_path)
+        quick = time.perf_counter() - start
+        start = time.perf_counter()
+        check_integrity(db_path, full=True)
+        full = time.perf_counter() - start
+        db.close()
+    
+    print(f"存档大小: {size:.1f} MB")
+    report("无备份", *baseline)
+    report(f"分批备份 ({args.pages} 页/批, 暂停 {args.pause * 1000:g} ms)", *batched)
+    report("一次性备份", *at_once)
+    print(f"quick_check: {quick:.2f} 秒, integrity_check + 外键检查: {full:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Tab 补全性能测试
+在含 N 个文件的目录中补全文件名:
+- 朴素做法: 每次按 Tab 都查询整个目录再逐个比较前缀
+- 名称缓存: 首次按 Tab 读取一次名称，之后二分查找前缀
+
+用法:
+    python -m benchmarks.bench_completion --entries 50000 --lookups 1000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src.data.database import Database
+from src.systems.filesystem import VirtualFileSystem
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tab 补全性能测试")
+    parser.add_argument("--entries", type=int, default=50000, help="目录中的文件数")
+    parser.add_argument("--lookups", type=int, default=1000, help="补全次数")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "bench.db")
+        user_id = db.create_user("bench", "x")
+        big = db.create_vfs_node(user_id, None, "big", is_directory=True)
+        with db.connection():
+            for i in range(args.entries):
+                db.create_vfs_node(user_id, big, f"log_{i:06d}.txt")
+        
+        vfs = VirtualFileSystem(user_id, db)
+        rng = random.Random(args.seed)
+        prefixes = [f"/big/log_{rng.randrange(args.entries):06d}"[:-2] for _ in range(args.lookups)]
+        
+        naive_runs = min(args.lookups, 50)
+        start = time.perf_counter()
+        for path in prefixes[:naive_runs]:
+            prefix = path.rpartition("/")[2]
+            [child['name'] for child in db.get_vfs_children(user_id, big) if child['name'].startswith(prefix)]
+        naive = (time.perf_counter() - start) / naive_runs
+        
+        start = time.perf_counter()
+        vfs.complete(prefixes[0])
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        for path in prefixes:
+            vfs.complete(path)
+        cached = (time.perf_counter() - start) / args.lookups
+        db.close()
+    
+    print(f"目录大小: {args.entries}")
+    print(f"朴素 (每次查询整个目录): {naive * 1000:.1f} ms/次")
+    print(f"名称缓存: 首次 {first * 1000:.1f} ms, 之后 {cached * 1000:.3f} ms/次")
+
+
+if __name__ == "__main__":
+    main()
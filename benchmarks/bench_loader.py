@@ -0,0 +1,113 @@
+"""
+静态数据加载性能测试
+生成指定数量的物品 / 敌人 / 技能记录，对比:
+- 逐条 json + model_validate (无加载器时的做法)
+- 预编译校验器整体校验 (加载器的做法)
+
+每项取多次运行中的最小值
+
+用法:
+    python -m benchmarks.bench_loader --records 10000
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from src.data.loader import GameData, Registry, SOURCES, load_game_data
+
+
+def generate(data_dir: Path, records: int) -> None:
+    """按 5:3:2 生成物品、敌人、技能数据"""
+    n_items, n_enemies = records * 5 // 10, records * 3 // 10
+    n_skills = records - n_items - n_enemies
+    
+    items = [
+        {
+            "id": f"item_{i}",
+            "name": f"物品 {i}",
+            "type": ("weapon", "armor", "consumable", "material")[i % 4],
+            "era": ("mechanical", "electronic", "universal")[i % 3],
+            "rarity": ("common", "uncommon", "rare")[i % 3],
+            "stats": {"atk": i % 20, "def": i % 7, "spd": -(i % 3)},
+            "effects": [{"type": "damage_boost", "value": 1.1}],
+            "price": i,
+        }
+        for i in range(n_items)
+    ]
+    skills = [
+        {
+            "id": f"skill_{i}",
+            "name": f"技能 {i}",
+            "cost": {"ep": i % 15},
+            "cooldown": i % 4,
+            "effect": {"type": "physical_damage", "power": 1 + i % 5 / 10, "hit_count": 1 + i % 3},
+        }
+        for i in range(n_skills)
+    ]
+    enemies = [
+        {
+            "id": f"enemy_{i}",
+            "name": f"敌人 {i}",
+            "level": 1 + i % 30,
+            "stats": {"hp": 50 + i % 100, "atk": 5 + i % 20, "def": i % 10, "spd": i % 12},
+            "skills": [f"skill_{i % max(1, n_skills)}", f"skill_{(i * 7) % max(1, n_skills)}"],
+            "drops": [
+                {"item_id": f"item_{i % max(1, n_items)}", "chance": 0.5, "count_max": 3},
+                {"item_id": f"item_{(i * 3) % max(1, n_items)}", "chance": 0.1},
+            ],
+            "ai_behavior": ("passive", "aggressive")[i % 2],
+        }
+        for i in range(n_enemies)
+    ]
+    
+    for name, payload in (("items", items), ("enemies", enemies), ("skills", skills)):
+        (data_dir / f"{name}.json").write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+
+def naive_load(data_dir: Path) -> GameData:
+    """逐条校验的朴素加载"""
+    loaded = {}
+    for key, (filename, model) in SOURCES.items():
+        raw = json.loads((data_dir / filename).read_text(encoding="utf-8"))
+        loaded[key] = Registry([model.model_validate(entry) for entry in raw])
+    return GameData(**loaded)
+
+
+def timed(label: str, func, repeat: int = 5) -> float:
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    total = len(data.items) + len(data.enemies) + len(data.skills)
+    print(f"{label:<18} {elapsed * 1000:>8.1f} ms  ({total} 条记录)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="静态数据加载性能测试")
+    parser.add_argument("--records", type=int, default=10000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        data_dir.mkdir()
+        generate(data_dir, args.records)
+        
+        naive = timed("逐条校验", lambda: naive_load(data_dir))
+        bulk = timed("整体校验", lambda: load_game_data(data_dir))
+        print(f"整体校验 vs 逐条校验: {naive / bulk:.1f}x")
+        
+        data = load_game_data(data_dir)
+        ids = data.items.ids()
+        start = time.perf_counter()
+        for item_id in ids:
+            data.items[item_id]
+        per_lookup = (time.perf_counter() - start) / len(ids) * 1e9
+        print(f"按 id 查找: {per_lookup:.0f} ns/次")
+
+
+if __name__ == "__main__":
+    main()
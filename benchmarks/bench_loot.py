@@ -0,0 +1,70 @@
+"""
+掉落结算性能测试
+对比逐个击杀、逐个掉落项调用 random 与 LootEngine 批量结算的吞吐量
+每批击杀来自同一房间的 --kinds 种敌人
+
+用法:
+    python -m benchmarks.bench_loot --kills 200000 --batch 1000 --kinds 8
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_loader import generate
+from src.data.index import GameIndex, build_index
+from src.data.loader import load_game_data
+from src.systems.loot import LootEngine
+
+
+def naive_roll(index: GameIndex, rng: random.Random, kills: list[int]) -> dict[int, int]:
+    """逐个击杀掷骰"""
+    loot: dict[int, int] = {}
+    for enemy in kills:
+        for drop in index.enemy_drops[enemy]:
+            if rng.random() < drop.chance:
+                loot[drop.item] = loot.get(drop.item, 0) + rng.randint(drop.count_min, drop.count_max)
+    return loot
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="掉落结算性能测试")
+    parser.add_argument("--kills", type=int, default=200000, help="总击杀数")
+    parser.add_argument("--batch", type=int, default=1000, help="每批击杀数")
+    parser.add_argument("--kinds", type=int, default=8, help="每批敌人种类数")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(Path(tmp), 10000)
+        index = build_index(load_game_data(tmp))
+    
+    rng = random.Random(args.seed)
+    batches = []
+    for _ in range(max(1, args.kills // args.batch)):
+        room = rng.sample(range(len(index.enemies)), args.kinds)
+        batches.append([rng.choice(room) for _ in range(args.batch)])
+    total = len(batches) * args.batch
+    
+    naive_rng = random.Random(args.seed)
+    start = time.perf_counter()
+    for kills in batches:
+        naive_roll(index, naive_rng, kills)
+    naive = time.perf_counter() - start
+    
+    engine = LootEngine(index, seed=args.seed)
+    start = time.perf_counter()
+    for kills in batches:
+        engine.roll(kills)
+    batched = time.perf_counter() - start
+    
+    # 同一种子重复结算结果一致
+    assert LootEngine(index, seed=1).roll(batches[0]) == LootEngine(index, seed=1).roll(batches[0])
+    
+    print(f"逐个掷骰: {total / naive:>10.0f} 击杀/秒")
+    print(f"批量结算: {total / batched:>10.0f} 击杀/秒  ({naive / batched:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+文件系统节点的内存占用
+在含 N 个节点的文件树上把全部节点读入内存:
+- dict: SELECT * 后每行转为 dict (原来的表示)
+- VFSRow: __slots__ 对象，名称与时间戳 intern 共用
+以及补全用的目录名称缓存: 名称列表 + 目录名 frozenset (原来) 与 名称列表 + bytearray 标记
+输出每个节点的字节数 (tracemalloc) 和读取耗时
+
+用法:
+    python -m benchmarks.bench_node_memory --nodes 100000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.data.database import Database
+from src.systems.filesystem import DirectoryNames
+
+
+def build_tree(db: Database, user_id: int, nodes: int, dirs: int) -> list[int]:
+    """dirs 个目录，文件名在目录间重复 (file_00000.txt ...)；返回目录ID"""
+    per_dir = max(1, (nodes - dirs) // dirs)
+    with db.connection():
+        dir_ids = [
+            db.create_vfs_node(user_id, None, f"dir_{i:04d}", is_directory=True)
+            for i in range(dirs)
+        ]
+        for i in range(nodes - dirs):
+            db.create_vfs_node(user_id, dir_ids[i % dirs], f"file_{i // dirs % per_dir:05d}.txt")
+    return dir_ids
+
+
+def measure(func) -> tuple[float, int, float]:
+    """
+    (每项字节数, 项数, 耗时)；内存单独跑一遍，避免 tracemalloc 影响计时
+    
+    func 返回 (需要保留的对象, 项数)
+    """
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    kept, count = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / count, count, seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="文件系统节点的内存占用")
+    parser.add_argument("--nodes", type=int, default=100000, help="节点数")
+    parser.add_argument("--dirs", type=int, default=100, help="目录数")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "bench.db")
+        user_id = db.create_user("bench", "x")
+        dir_ids = build_tree(db, user_id, args.nodes, args.dirs)
+        
+        def as_dicts() -> tuple[list[dict], int]:
+            rows = []
+            with db.connection() as conn:
+                for parent_id in [None, *dir_ids]:
+                    if parent_id is None:
+                        query = conn.execute(
+                            "SELECT * FROM vfs_nodes WHERE user_id = ? AND parent_id IS NULL", (user_id,)
+                        )
+                    else:
+                        query = conn.execute(
+                            "SELECT * FROM vfs_nodes WHERE user_id = ? AND parent_id = ?", (user_id, parent_id)
+                        )
+                    rows.extend(dict(row) for row in query)
+            return rows, len(rows)
+        
+        def as_rows() -> tuple[list, int]:
+            rows = db.get_vfs_children(user_id, None)
+            for parent_id in dir_ids:
+                rows.extend(db.get_vfs_children(user_id, parent_id))
+            return rows, len(rows)
+        
+        def names_frozenset() -> tuple[list, int]:
+            entries = []
+            for parent_id in dir_ids:
+                rows = db.get_vfs_child_names(user_id, parent_id)
+                entries.append(([name for name, _ in rows], frozenset(name for name, d in rows if d)))
+            return entries, sum(len(names) for names, _ in entries)
+        
+        def names_compact() -> tuple[DirectoryNames, int]:
+            cache = DirectoryNames(db, user_id, capacity=len(dir_ids))
+            for parent_id in dir_ids:
+                cache._load(parent_id)
+            return cache, sum(len(names) for names, _ in cache._dirs.values())
+        
+        dicts = measure(as_dicts)
+        rows = measure(as_rows)
+        old_names = measure(names_frozenset)
+        new_names = measure(names_compact)
+        db.close()
+    
+    print(f"节点数: {dicts[1]}")
+    print(f"dict: {dicts[0]:.0f} 字节/节点, 读取 {dicts[2] * 1000:.0f} ms")
+    print(f"VFSRow: {rows[0]:.0f} 字节/节点 ({dicts[0] / rows[0]:.1f}x), 读取 {rows[2] * 1000:.0f} ms")
+    print(f"名称缓存 (列表 + frozenset): {old_names[0]:.0f} 字节/项")
+    print(f"名称缓存 (列表 + bytearray, intern): {new_names[0]:.0f} 字节/项")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+寻路性能测试
+N 个敌人同时追击玩家，玩家每隔几帧移动一格，并定期开关一扇门:
+- 朴素做法: 每个敌人每帧各做一次 A*
+- 流场: 每个目标位置 / 地图版本只做一次 BFS，所有敌人共用
+
+用法:
+    python -m benchmarks.bench_pathfinding --enemies 500 --frames 60
+"""
+import argparse
+import random
+import time
+
+import esper
+
+from src.components.ai import Chaser
+from src.components.base import Position
+from src.data.maps import DOOR, FLOOR, OPEN_DOOR, parse_map
+from src.systems.pathfinding import ChaseProcessor, FlowFieldCache, astar
+
+
+def generate_map(size: int, seed: int):
+    rng = random.Random(seed)
+    rows = [
+        "".join("#" if rng.random() < 0.2 else "." for _ in range(size))
+        for _ in range(size)
+    ]
+    return parse_map("\n".join(rows), "bench")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="寻路性能测试")
+    parser.add_argument("--size", type=int, default=256, help="地图边长")
+    parser.add_argument("--enemies", type=int, default=500)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--radius", type=int, default=40, help="敌人与玩家的最大初始距离")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    game_map = generate_map(args.size, args.seed)
+    rng = random.Random(args.seed)
+    center = args.size // 2
+    player = (center, center)
+    game_map.set_tile(*player, FLOOR)
+    door = (center + 3, center)
+    game_map.set_tile(*door, DOOR)
+    
+    spawns = []
+    while len(spawns) < args.enemies:
+        x = center + rng.randrange(-args.radius, args.radius + 1)
+        y = center + rng.randrange(-args.radius, args.radius + 1)
+        if game_map.passable(x, y) and (x, y) != player:
+            spawns.append((x, y))
+    
+    def player_at(frame: int) -> tuple[int, int]:
+        # 玩家每 5 帧左右踱步一格
+        return (center + (frame // 5) % 2, center)
+    
+    def toggle_door(frame: int) -> None:
+        # 每 10 帧开关一次门
+        if frame % 10 == 0:
+            open_ = (frame // 10) % 2
+            game_map.set_tile(*door, OPEN_DOOR if open_ else DOOR)
+    
+    # 朴素做法: 每个敌人每帧一次 A*
+    positions = list(spawns)
+    start = time.perf_counter()
+    for frame in range(args.frames):
+        toggle_door(frame)
+        target = player_at(frame)
+        for i, pos in enumerate(positions):
+            path = astar(game_map, pos, target)
+            if path and len(path) > 1:
+                positions[i] = path[0]
+    naive = (time.perf_counter() - start) / args.frames
+    
+    # 流场
+    esper.switch_world("bench_pathfinding")
+    player_pos = Position(*player_at(0))
+    player_entity = esper.create_entity(player_pos)
+    for x, y in spawns:
+        esper.create_entity(Position(x, y), Chaser(player_entity))
+    cache = FlowFieldCache(radius=args.radius * 2)
+    esper.add_processor(ChaseProcessor(game_map, cache))
+    start = time.perf_counter()
+    for frame in range(args.frames):
+        toggle_door(frame)
+        player_pos.x, player_pos.y = player_at(frame)
+        esper.process()
+    flow = (time.perf_counter() - start) / args.frames
+    esper.switch_world("default")
+    esper.delete_world("bench_pathfinding")
+    
+    print(f"{args.enemies} 个敌人, 地图 {args.size}x{args.size}, {args.frames} 帧")
+    print(f"逐个 A*: {naive * 1000:.1f} ms/帧")
+    print(f"共享流场: {flow * 1000:.2f} ms/帧 (重建 {cache.builds} 次)")
+    print(f"加速: {naive / flow:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
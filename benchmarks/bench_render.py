@@ -0,0 +1,112 @@
+"""
+地图渲染性能测试
+在 1000x1000 的地图上测量:
+- 首次解析 + 写缓存与之后从缓存打开的耗时
+- 相机静止、实体移动时每帧的合成 + 脏矩形比较耗时与重绘单元格数
+- 相机每帧移动 (整屏重绘) 时的耗时，以及常驻内存的区块数
+
+用法:
+    python -m benchmarks.bench_render --size 1000 --entities 200 --frames 300
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import esper
+
+from src.components.base import Glyph, Position
+from src.data.maps import load_map_file
+from src.systems.render import RenderSystem
+from src.widgets.game_grid import GameGrid
+
+
+def generate_map(path: Path, size: int, seed: int) -> None:
+    """生成带随机墙壁与水域的地图"""
+    rng = random.Random(seed)
+    rows = []
+    for y in range(size):
+        if y in (0, size - 1):
+            rows.append("#" * size)
+            continue
+        row = [rng.choice("......#~") if rng.random() < 0.2 else "." for _ in range(size)]
+        row[0] = row[-1] = "#"
+        rows.append("".join(row))
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="地图渲染性能测试")
+    parser.add_argument("--size", type=int, default=1000, help="地图边长")
+    parser.add_argument("--entities", type=int, default=200, help="视口内移动的实体数")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--view", default="120x40", help="视口大小")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    view_w, view_h = map(int, args.view.split("x"))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "big.txt"
+        generate_map(path, args.size, args.seed)
+        cache_dir = Path(tmp) / "cache"
+        
+        start = time.perf_counter()
+        load_map_file(path, cache_dir=cache_dir)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        game_map = load_map_file(path, cache_dir=cache_dir)
+        warm = time.perf_counter() - start
+        print(f"解析 + 写缓存: {cold * 1000:.1f} ms, 从缓存打开: {warm * 1000:.2f} ms")
+        
+        esper.switch_world("bench_render")
+        grid = GameGrid()
+        render = RenderSystem(game_map, view_w, view_h, grid)
+        esper.add_processor(render)
+        cx, cy = args.size // 2, args.size // 2
+        render.center_on(cx, cy)
+        
+        rng = random.Random(args.seed)
+        positions = []
+        for i in range(args.entities):
+            pos = Position(cx + rng.randrange(-view_w // 2, view_w // 2), cy + rng.randrange(-view_h // 2, view_h // 2))
+            esper.create_entity(pos, Glyph("g" if i % 2 else "s", "red"))
+            positions.append(pos)
+        
+        # 相机静止，实体每帧随机移动一格
+        esper.process()
+        sent_before = grid.cells_sent
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            for pos in positions:
+                pos.x += rng.choice((-1, 0, 1))
+                pos.y += rng.choice((-1, 0, 1))
+            esper.process()
+            for y in range(view_h):
+                grid.render_line(y)
+        static = (time.perf_counter() - start) / args.frames
+        sent = (grid.cells_sent - sent_before) / args.frames
+        
+        # 相机每帧移动一格，横穿地图
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            cx += 1
+            render.center_on(cx, cy)
+            esper.process()
+            for y in range(view_h):
+                grid.render_line(y)
+        scrolling = (time.perf_counter() - start) / args.frames
+        
+        esper.switch_world("default")
+        esper.delete_world("bench_render")
+        
+        cells = view_w * view_h
+        print(f"视口 {view_w}x{view_h} ({cells} 格), {args.entities} 个移动实体")
+        print(f"相机静止: {static * 1000:.2f} ms/帧, 重绘 {sent:.0f} 格/帧 ({sent / cells:.0%})")
+        print(f"相机移动: {scrolling * 1000:.2f} ms/帧 (整屏重绘)")
+        print(f"常驻区块: {game_map.loaded_chunks} / {game_map.chunks_x * game_map.chunks_y}")
+        game_map.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+分片存储性能测试
+W 个线程各代表一个用户，同时向自己的文件追加内容:
+- 单个存档 + AsyncDatabase: 服务器模式的做法，写操作由一个写线程合并提交
+- 单个存档直接多线程写入: 写事务争用同一个文件的写锁 (会出现 database is locked)
+- 分片存储直接多线程写入: 每个用户在不同的分片文件中，写事务互不阻塞
+- 分片存储 + AsyncDatabase: 一批写操作按分片各提交一次
+输出总吞吐量、单次写入的延迟分位数和失败次数
+
+用法:
+    python -m benchmarks.bench_sharding --writers 8 --writes 500
+"""
+import argparse
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.data.async_database import AsyncDatabase, BlockingDatabase
+from src.data.database import Database
+from src.data.sharding import ShardedDatabase
+
+
+def run(db, writers: int, writes: int) -> tuple[float, list[float], int]:
+    """返回 (总耗时, 每次写入的延迟, 失败次数)"""
+    files = []
+    for i in range(writers):
+        user_id = db.create_user(f"user{i}", "x")
+        files.append(db.create_vfs_node(user_id, None, "log.txt", content=""))
+    
+    latencies: list[list[float]] = [[] for _ in range(writers)]
+    errors = [0] * writers
+    barrier = threading.Barrier(writers + 1)
+    
+    def worker(index: int) -> None:
+        node_id = files[index]
+        line = f"玩家 {index} 的日志 " * 8 + "\n"
+        barrier.wait()
+        for _ in range(writes):
+            start = time.perf_counter()
+            try:
+                db.append_vfs_node_content(node_id, line)
+            except sqlite3.OperationalError:
+                errors[index] += 1
+                continue
+            latencies[index].append(time.perf_counter() - start)
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    return seconds, sorted(x for items in latencies for x in items), sum(errors)
+
+
+def report(label: str, seconds: float, latencies: list[float], errors: int) -> None:
+    if not latencies:
+        print(f"{label}: 全部 {errors} 次写入失败")
+        return
+    
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    text = (
+        f"{label}: {len(latencies) / seconds:.0f} 次写入/秒, "
+        f"p50 {pct(0.5):.2f} ms, p99 {pct(0.99):.2f} ms, 最大 {latencies[-1] * 1000:.1f} ms"
+    )
+    if errors:
+        text += f", 失败 {errors} 次"
+    print(text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="分片存储性能测试")
+    parser.add_argument("--writers", type=int, default=8, help="并发写入的用户数")
+    parser.add_argument("--writes", type=int, default=500, help="每个用户的写入次数")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "async" / "game.db", pool_size=args.writers)
+        adb = AsyncDatabase(db)
+        queued = run(BlockingDatabase(adb), args.writers, args.writes)
+        adb.close()
+        db.close()
+        
+        db = Database(Path(tmp) / "single" / "game.db", pool_size=args.writers)
+        single = run(db, args.writers, args.writes)
+        db.close()
+        
+        # 分片数等于用户数，每个用户独占一个分片
+        db = ShardedDatabase(Path(tmp) / "sharded" / "game.db", args.writers)
+        sharded = run(db, args.writers, args.writes)
+        db.close()
+        
+        db = ShardedDatabase(Path(tmp) / "sharded_async" / "game.db", args.writers)
+        adb = AsyncDatabase(db)
+        sharded_queued = run(BlockingDatabase(adb), args.writers, args.writes)
+        adb.close()
+        db.close()
+    
+    print(f"并发用户: {args.writers}, 每个用户写入 {args.writes} 次")
+    report("单个存档 + AsyncDatabase", *queued)
+    report("单个存档直接写入", *single)
+    report("分片存储直接写入", *sharded)
+    report("分片存储 + AsyncDatabase", *sharded_queued)
+
+
+if __name__ == "__main__":
+    main()
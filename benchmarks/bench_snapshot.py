@@ -0,0 +1,89 @@
+"""
+文件系统快照性能测试
+在含 N 个节点的文件树上:
+- 完整复制: 把全部节点与内容块复制一份 (朴素快照)
+- 写时复制: 拍快照只插入一行，之后修改的节点才保存原像
+并测量快照存在时修改的额外开销和恢复时间
+
+用法:
+    python -m benchmarks.bench_snapshot --nodes 100000 --changes 1000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src.data.database import Database
+from src.systems.filesystem import VirtualFileSystem
+
+
+def build_tree(db: Database, user_id: int, nodes: int) -> list[int]:
+    """100 个目录，其余为小文件；返回文件节点ID"""
+    files = []
+    with db.connection():
+        dirs = [
+            db.create_vfs_node(user_id, None, f"dir_{i:03d}", is_directory=True)
+            for i in range(100)
+        ]
+        for i in range(nodes - len(dirs)):
+            files.append(db.create_vfs_node(
+                user_id, dirs[i % len(dirs)], f"file_{i:06d}.txt", content=f"内容 {i}\n" * 8
+            ))
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="文件系统快照性能测试")
+    parser.add_argument("--nodes", type=int, default=100000, help="文件树的节点数")
+    parser.add_argument("--changes", type=int, default=1000, help="快照之后修改的文件数")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "bench.db")
+        user_id = db.create_user("bench", "x")
+        files = build_tree(db, user_id, args.nodes)
+        vfs = VirtualFileSystem(user_id, db)
+        rng = random.Random(args.seed)
+        changed = rng.sample(files, min(args.changes, len(files)))
+        
+        start = time.perf_counter()
+        with db.connection() as conn:
+            conn.execute("CREATE TEMP TABLE copy_nodes AS SELECT * FROM vfs_nodes WHERE user_id = ?", (user_id,))
+            conn.execute(
+                """CREATE TEMP TABLE copy_chunks AS SELECT c.* FROM vfs_chunks c
+                   JOIN vfs_nodes n ON n.id = c.node_id WHERE n.user_id = ?""",
+                (user_id,)
+            )
+            conn.execute("DROP TABLE copy_nodes")
+            conn.execute("DROP TABLE copy_chunks")
+        full_copy = time.perf_counter() - start
+        
+        def modify(tag: str) -> float:
+            start = time.perf_counter()
+            with db.connection():
+                for node_id in changed:
+                    db.update_vfs_node_content(node_id, f"{tag}\n")
+            return (time.perf_counter() - start) / len(changed)
+        
+        plain = modify("无快照")
+        start = time.perf_counter()
+        vfs.snapshot("bench")
+        snapshot = time.perf_counter() - start
+        journaled = modify("有快照")
+        
+        start = time.perf_counter()
+        vfs.restore("bench")
+        restore = time.perf_counter() - start
+        db.close()
+    
+    print(f"节点数: {args.nodes}, 快照后修改: {len(changed)} 个文件")
+    print(f"完整复制: {full_copy * 1000:.1f} ms")
+    print(f"写时复制快照: {snapshot * 1000:.2f} ms ({full_copy / snapshot:.0f}x)")
+    print(f"修改文件: 无快照 {plain * 1e6:.0f} us/次, 有快照 {journaled * 1e6:.0f} us/次")
+    print(f"恢复: {restore * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
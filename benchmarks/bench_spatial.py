@@ -0,0 +1,96 @@
+"""
+空间索引性能测试
+N 个实体在地图上随机游走，每帧:
+- 同步全部实体位置
+- 每个实体查询半径内最近的其他实体 ("射程内最近的敌人")
+- 对查到的目标做一次视线判定
+与逐对比较的朴素做法 (O(N^2)) 对比
+
+用法:
+    python -m benchmarks.bench_spatial --entities 10000 --radius 8
+"""
+import argparse
+import random
+import time
+
+from src.data.maps import parse_map
+from src.systems.spatial import SpatialIndex, line_of_sight
+
+
+def naive_nearest(positions: list[tuple[int, int]], i: int, radius: int) -> int | None:
+    x, y = positions[i]
+    best, best_dist = None, radius * radius + 1
+    for j, (ex, ey) in enumerate(positions):
+        if j == i:
+            continue
+        dist = (ex - x) ** 2 + (ey - y) ** 2
+        if dist < best_dist:
+            best, best_dist = j, dist
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="空间索引性能测试")
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--size", type=int, default=1000, help="地图边长")
+    parser.add_argument("--radius", type=int, default=8)
+    parser.add_argument("--frames", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    size = args.size
+    text = "\n".join(
+        "".join("#" if rng.random() < 0.1 else "." for _ in range(size)) for _ in range(size)
+    )
+    game_map = parse_map(text, "bench")
+    
+    positions = [(rng.randrange(size), rng.randrange(size)) for _ in range(args.entities)]
+    index = SpatialIndex()
+    for entity, (x, y) in enumerate(positions):
+        index.insert(entity, x, y)
+    
+    move = update = query = los = 0.0
+    found = visible = 0
+    for _ in range(args.frames):
+        start = time.perf_counter()
+        positions = [
+            (min(max(x + rng.choice((-1, 0, 1)), 0), size - 1), min(max(y + rng.choice((-1, 0, 1)), 0), size - 1))
+            for x, y in positions
+        ]
+        move += time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for entity, (x, y) in enumerate(positions):
+            index.move(entity, x, y)
+        update += time.perf_counter() - start
+        
+        start = time.perf_counter()
+        targets = [index.nearest(x, y, args.radius, exclude=entity) for entity, (x, y) in enumerate(positions)]
+        query += time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for entity, target in enumerate(targets):
+            if target is None:
+                continue
+            found += 1
+            (x0, y0), (x1, y1) = positions[entity], positions[target]
+            visible += line_of_sight(game_map, x0, y0, x1, y1)
+        los += time.perf_counter() - start
+    
+    # 朴素做法只抽样 200 次查询再按比例换算
+    sample = 200
+    start = time.perf_counter()
+    for i in range(sample):
+        naive_nearest(positions, i, args.radius)
+    naive = (time.perf_counter() - start) / sample * args.entities
+    
+    frames = args.frames
+    print(f"{args.entities} 个实体, 地图 {size}x{size}, 半径 {args.radius}")
+    print(f"同步位置:     {update / frames * 1000:>9.1f} ms/帧")
+    print(f"最近目标查询: {query / frames * 1000:>9.1f} ms/帧  (朴素 O(N^2): {naive * 1000:.0f} ms/帧, {naive / (query / frames):.0f}x)")
+    print(f"视线判定:     {los / frames * 1000:>9.1f} ms/帧  ({found // frames} 次, {visible / max(found, 1):.0%} 可见)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+战斗属性存储性能测试
+对比每个实体挂一个 Pydantic Stats 组件与列式 StatStore，
+在 N 个战斗单位上反复执行 全体伤害 + 攻击力增益
+
+用法:
+    python -m benchmarks.bench_stat_store --entities 10000 --rounds 20
+"""
+import argparse
+import time
+import tracemalloc
+
+import esper
+
+from src.components.combat import StatStore
+from src.data.models import Stats
+from src.systems.combat import CombatProcessor, spawn_combatant
+
+
+def make_stats(i: int) -> Stats:
+    return Stats(hp=10_000 + i % 500, ep=50, atk=10 + i % 20, def_=i % 15, spd=i % 12, fcs=5)
+
+
+def bench_pydantic(entities: int, rounds: int) -> float:
+    """逐实体修改 Pydantic 组件"""
+    esper.switch_world("bench_pydantic")
+    for i in range(entities):
+        esper.create_entity(make_stats(i))
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for _, stats in esper.get_component(Stats):
+            damage = max(1, 30 - stats.def_)
+            stats.hp = max(0, stats.hp - damage)
+        for _, stats in esper.get_component(Stats):
+            stats.atk = max(0, int(stats.atk * 1.1) + 1)
+    elapsed = time.perf_counter() - start
+    esper.switch_world("default")
+    esper.delete_world("bench_pydantic")
+    return elapsed
+
+
+def bench_columns(entities: int, rounds: int) -> float:
+    """整列批量操作"""
+    store = StatStore()
+    for i in range(entities):
+        store.add(make_stats(i))
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        store.apply_damage(30)
+        store.apply_buff("atk", 1.1, 1)
+    return time.perf_counter() - start
+
+
+def bench_processor(entities: int, rounds: int) -> float:
+    """通过 esper 处理器逐目标登记攻击，统一结算"""
+    esper.switch_world("bench_processor")
+    store = StatStore()
+    combat = CombatProcessor(store)
+    esper.add_processor(combat)
+    for i in range(entities):
+        spawn_combatant(store, make_stats(i))
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        combat.attack_all(30)
+        esper.process()
+        store.apply_buff("atk", 1.1, 1)
+    elapsed = time.perf_counter() - start
+    esper.switch_world("default")
+    esper.delete_world("bench_processor")
+    return elapsed
+
+
+def memory(factory, entities: int) -> int:
+    """创建 N 个单位占用的内存 (字节)"""
+    tracemalloc.start()
+    keep = factory(entities)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return size
+
+
+def build_models(entities: int) -> list[Stats]:
+    return [make_stats(i) for i in range(entities)]
+
+
+def build_store(entities: int) -> StatStore:
+    store = StatStore()
+    stats = make_stats(0)
+    for _ in range(entities):
+        store.add(stats)
+    return store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="战斗属性存储性能测试")
+    parser.add_argument("--entities", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    
+    per_round = lambda t: t / args.rounds * 1000
+    base = bench_pydantic(args.entities, args.rounds)
+    columns = bench_columns(args.entities, args.rounds)
+    processor = bench_processor(args.entities, args.rounds)
+    print(f"Pydantic 组件:       {per_round(base):>7.2f} ms/轮")
+    print(f"StatStore 整列:      {per_round(columns):>7.2f} ms/轮  ({base / columns:.1f}x)")
+    print(f"StatStore + 处理器:  {per_round(processor):>7.2f} ms/轮  ({base / processor:.1f}x)")
+    
+    model_bytes = memory(build_models, args.entities)
+    store_bytes = memory(build_store, args.entities)
+    print(f"内存: Pydantic {model_bytes / args.entities:.0f} B/单位, "
+          f"StatStore {store_bytes / args.entities:.0f} B/单位")
+
+
+if __name__ == "__main__":
+    main()
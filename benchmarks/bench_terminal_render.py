@@ -0,0 +1,124 @@
+"""
+终端输出的逐行渲染开销
+- 解析: 每行重新解析 markup (原来的做法) 与 解析缓存 / 纯文本直接构造
+  测试行: 帮助信息 (含 markup 的静态输出)、ls 输出 (纯文本)、错误信息、命令回显
+- 显示: 在无界面模式的终端中写入 N 行并等待刷新，得到每行的总耗时 (挂载 + 布局 + 绘制)
+
+用法:
+    python -m benchmarks.bench_terminal_render --lines 2000
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from textual.containers import ScrollableContainer
+from textual.content import Content
+
+from src.app import TerminalApp
+from src.data.database import Database
+from src.systems.shell import Shell
+from src.widgets.terminal import Terminal, TerminalLine, _parse_markup, render_line
+
+
+class Recorder:
+    """记录 Shell 写出的行 (与 Terminal 加上同样的样式标记)"""
+    
+    def __init__(self):
+        self.lines: list[str] = []
+    
+    def write_line(self, text: str) -> None:
+        self.lines.append(text)
+    
+    def write_error(self, text: str) -> None:
+        self.lines.append(f"[red]{text}[/red]")
+    
+    def write_success(self, text: str) -> None:
+        self.lines.append(f"[green]{text}[/green]")
+    
+    def write_info(self, text: str) -> None:
+        self.lines.append(f"[blue]{text}[/blue]")
+
+
+def per_line(func, lines: list[str], rounds: int) -> float:
+    """每行耗时 (μs)"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in lines:
+            func(text)
+    return (time.perf_counter() - start) / (rounds * len(lines)) * 1e6
+
+
+def parse_costs(help_lines: list[str], rounds: int) -> list[tuple[str, float, float]]:
+    """(类别, 原来每行 μs, 现在每行 μs)"""
+    prompt = "[green]bob@算界[/green]:[cyan]/home/docs[/cyan]$ "
+    # 错误信息每行都不同，测的是缓存未命中时的开销
+    samples = {
+        "帮助信息": (help_lines, rounds),
+        "纯文本 (ls 输出)": ([f"file_{i:04d}.txt" for i in range(len(help_lines))], rounds),
+        "错误信息 (每行不同)": ([f"[red]文件不存在: file_{i:05d}.txt[/red]" for i in range(len(help_lines) * rounds)], 1),
+    }
+    results = []
+    for label, (lines, repeat) in samples.items():
+        old = per_line(Content.from_markup, lines, repeat)
+        _parse_markup.cache_clear()
+        new = per_line(render_line, lines, repeat)
+        results.append((label, old, new))
+    commands = [f"cat file_{i:04d}.txt" for i in range(len(help_lines))]
+    old = per_line(lambda c: Content.from_markup(f"{prompt}{c}"), commands, rounds)
+    new = per_line(lambda c: render_line(prompt) + Content(c), commands, rounds)
+    results.append(("命令回显", old, new))
+    return results
+
+
+async def display_costs(db: Database, lines: list[str], count: int) -> tuple[float, float]:
+    """无界面模式下写入 count 行并刷新，返回 (原来每行 μs, 现在每行 μs)"""
+    app = TerminalApp(db)
+    async with app.run_test(size=(120, 40)) as pilot:
+        await pilot.pause()
+        terminal = app.query_one(Terminal)
+        
+        def old_write(text: str) -> None:
+            # 原来的 write_line: 由 TerminalLine 在显示时解析 markup
+            history = terminal.query_one("#terminal-history", ScrollableContainer)
+            history.mount(TerminalLine(text, classes="output-line", markup=True))
+            terminal._line_count += 1
+            terminal._trim_history(history)
+            history.scroll_end(animate=False)
+        
+        # 两种写法交替各跑三次取最小值，排除先后顺序的影响
+        costs = {old_write: [], terminal.write_line: []}
+        for _ in range(3):
+            for write, samples in costs.items():
+                terminal.clear()
+                await pilot.pause()
+                start = time.perf_counter()
+                for i in range(count):
+                    write(lines[i % len(lines)])
+                await pilot.pause()
+                samples.append((time.perf_counter() - start) / count * 1e6)
+    return min(costs[old_write]), min(costs[terminal.write_line])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="终端输出的逐行渲染开销")
+    parser.add_argument("--lines", type=int, default=2000, help="显示测试写入的行数")
+    parser.add_argument("--rounds", type=int, default=50, help="解析测试的重复次数")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(Path(tmp) / "game.db")
+        recorder = Recorder()
+        Shell(db, exports_dir=Path(tmp) / "exports")._show_help(recorder)
+        help_lines = recorder.lines
+        
+        for label, old, new in parse_costs(help_lines, args.rounds):
+            print(f"解析 {label}: {old:.1f} -> {new:.1f} μs/行 ({old / new:.1f}x)")
+        old, new = asyncio.run(display_costs(db, help_lines, args.lines))
+        print(f"显示帮助信息 {args.lines} 行: {old:.0f} -> {new:.0f} μs/行")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
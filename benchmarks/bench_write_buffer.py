@@ -0,0 +1,58 @@
+"""
+写缓冲性能测试
+用 VirtualFileSystem 执行一段批量编辑脚本 (mkdir + write + cat)，
+对比每次修改立即提交与 BufferedDatabase 合并提交的耗时
+
+用法:
+    python -m benchmarks.bench_write_buffer --ops 2000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.data.database import Database
+from src.data.write_buffer import BufferedDatabase
+from src.systems.filesystem import VirtualFileSystem
+
+
+def run_script(db: Database, ops: int) -> float:
+    """执行批量编辑脚本，返回耗时 (秒)"""
+    user_id = db.create_user("bench", "x$y")
+    vfs = VirtualFileSystem(user_id, db)
+    
+    start = time.perf_counter()
+    for i in range(ops):
+        vfs.mkdir(f"dir{i}")
+        vfs.write(f"note{i}.txt", f"第 {i} 条记录")
+        # 读自己刚写入的内容 (写缓冲下同样可见)
+        assert vfs.cat(f"note{i}.txt").data == f"第 {i} 条记录"
+    db.flush()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="写缓冲性能测试")
+    parser.add_argument("--ops", type=int, default=2000, help="脚本循环次数")
+    parser.add_argument("--window-ms", type=float, default=50.0)
+    parser.add_argument("--max-ops", type=int, default=256)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = Database(Path(tmp) / "plain.db")
+        base = run_script(plain, args.ops)
+        plain.close()
+        
+        buffered = BufferedDatabase(Path(tmp) / "buffered.db", args.max_ops, args.window_ms)
+        fast = run_script(buffered, args.ops)
+        commits = buffered.commits
+        buffered.close()
+    
+    writes = args.ops * 2
+    print(f"立即提交: {base:.3f} s  ({writes / base:>8.0f} 写/秒)")
+    print(f"写缓冲:   {fast:.3f} s  ({writes / fast:>8.0f} 写/秒, 提交 {commits} 次)")
+    print(f"加速比:   {base / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+服务器压力测试客户端
+启动一个单独的服务器进程 (默认使用临时数据库)，模拟大量并发会话
+
+用法:
+    python -m benchmarks.load_test --sessions 300 --commands 20
+    python -m benchmarks.load_test --host 127.0.0.1 --port 2323   # 连接已运行的服务器
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PROMPT_SUFFIX = b"$ "
+
+
+async def read_until_prompt(reader: asyncio.StreamReader) -> bytes:
+    """读取输出直到出现提示符"""
+    data = b""
+    while not data.endswith(PROMPT_SUFFIX):
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+async def run_session(
+    host: str,
+    port: int,
+    index: int,
+    commands: int,
+    latencies: list[float]
+) -> None:
+    """单个会话: 注册、登录、执行一组文件命令、退出"""
+    reader, writer = await asyncio.open_connection(host, port)
+    await read_until_prompt(reader)
+    
+    username = f"load{os.getpid() % 1000}_{index}"
+    script = [f"register {username} secret", f"login {username} secret"]
+    for i in range(commands):
+        match i % 4:
+            case 0:
+                script.append(f"mkdir dir{i}")
+            case 1:
+                script.append(f"write note{i}.txt line {i}")
+            case 2:
+                script.append("ls")
+            case 3:
+                script.append(f"cat note{i - 2}.txt")
+    script.append("logout")
+    
+    for command in script:
+        start = time.perf_counter()
+        writer.write(command.encode("utf-8") + b"\n")
+        await writer.drain()
+        await read_until_prompt(reader)
+        latencies.append(time.perf_counter() - start)
+    
+    writer.write(b"exit\n")
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_load(host: str, port: int, sessions: int, commands: int) -> None:
+    """并发运行所有会话并输出统计"""
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_session(host, port, i, commands, latencies)
+        for i in range(sessions)
+    ))
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"会话数:     {sessions}")
+    print(f"命令总数:   {len(latencies)}")
+    print(f"总耗时:     {elapsed:.2f} s")
+    print(f"吞吐量:     {len(latencies) / elapsed:.0f} 命令/秒")
+    print(f"延迟 p50:   {p50:.2f} ms")
+    print(f"延迟 p99:   {p99:.2f} ms")
+
+
+def free_port() -> int:
+    """获取一个空闲端口"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10.0) -> None:
+    """等待服务器开始监听"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"服务器未在 {timeout}s 内启动")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="算界服务器压力测试")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="为 0 时自动启动服务器进程")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--commands", type=int, default=20)
+    args = parser.parse_args()
+    
+    server = None
+    tmpdir = None
+    port = args.port
+    if port == 0:
+        tmpdir = tempfile.TemporaryDirectory()
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "main.py", "--server", "--port", str(port),
+             "--db", str(Path(tmpdir.name) / "load.db")],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+        )
+        wait_for_port(args.host, port)
+    
+    try:
+        asyncio.run(run_load(args.host, port, args.sessions, args.commands))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,70 @@
 《算界旅人》- 终端 RPG 游戏
 启动脚本
 """
-from src.app import run_app
+import argparse
+
+
+def parse_args() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="《算界旅人》- 终端 RPG 游戏")
+    parser.add_argument("--db", default="save/game.db", help="存档数据库路径")
+    parser.add_argument(
+        "--write-behind",
+        type=float,
+        default=0,
+        metavar="MS",
+        help="写缓冲窗口 (毫秒)，把窗口内的修改合并为一次提交；0 表示关闭"
+    )
+    parser.add_argument(
+        "--write-behind-ops",
+        type=int,
+        default=256,
+        metavar="N",
+        help="写缓冲最多累计的写操作数"
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        metavar="N",
+        help="按用户把文件系统分到 N 个分片文件 (0 表示每个用户一个文件)；不指定时使用单个存档"
+    )
+    parser.add_argument(
+        "--backup-every",
+        type=float,
+        default=0,
+        metavar="MIN",
+        help="每隔 MIN 分钟在线备份一次存档 (save/backups/)；0 表示关闭"
+    )
+    parser.add_argument("--backup-keep", type=int, default=7, metavar="N", help="定时备份保留的份数")
+    parser.add_argument("--server", action="store_true", help="以多用户网络服务器模式运行")
+    parser.add_argument("--host", default="127.0.0.1", help="服务器监听地址")
+    parser.add_argument("--port", type=int, default=2323, help="服务器监听端口")
+    parser.add_argument("--pool-size", type=int, default=8, help="服务器数据库连接池大小")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="记录各启动阶段 (导入 / 打开数据库 / 首帧) 的耗时，退出后打印"
+    )
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    run_app()
+    args = parse_args()
+    if args.server:
+        from src.server import run_server
+        run_server(
+            args.host, args.port, args.db, args.pool_size, args.shards,
+            args.backup_every, args.backup_keep
+        )
+    else:
+        profile = None
+        if args.profile_startup:
+            from src.profiling import StartupProfile
+            profile = StartupProfile()
+            profile.import_modules()
+        from src.app import run_app
+        run_app(
+            args.db, args.write_behind, args.write_behind_ops, profile, args.shards,
+            args.backup_every, args.backup_keep
+        )
@@ -0,0 +1,31 @@
+"""
+ECS 组件
+
+与 src.data 相同，子模块在首次访问时才导入
+"""
+import importlib
+
+
+_EXPORTS = {
+    "Chaser": "src.components.ai",
+    "Glyph": "src.components.base",
+    "Position": "src.components.base",
+    "STAT_FIELDS": "src.components.combat",
+    "Combatant": "src.components.combat",
+    "StatStore": "src.components.combat",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
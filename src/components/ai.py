@@ -0,0 +1,10 @@
+"""
+AI 组件
+"""
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Chaser:
+    """追击指定实体"""
+    target: int
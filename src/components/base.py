@@ -0,0 +1,18 @@
+"""
+基础组件
+"""
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Position:
+    """地图坐标"""
+    x: int
+    y: int
+
+
+@dataclass(slots=True)
+class Glyph:
+    """渲染字符与颜色 (Rich 风格)"""
+    char: str
+    color: str = "white"
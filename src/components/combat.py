@@ -0,0 +1,209 @@
+"""
+战斗属性组件
+按列存储 (struct-of-arrays) 全部战斗单位的属性，每个属性一列 array('i')
+
+ECS 实体只挂一个很小的 Combatant 组件 (行号)，
+伤害、增益等批量操作直接作用在整列上，不再逐个访问 Pydantic 对象
+"""
+from array import array
+from dataclasses import dataclass
+from itertools import compress
+from typing import Iterable, Sequence
+
+from src.data.models import Stats
+
+
+# 列名与 Stats 字段一一对应 (def 是关键字，模型中为 def_)
+STAT_FIELDS = ("hp", "ep", "atk", "def", "spd", "fcs")
+
+
+@dataclass(slots=True)
+class Combatant:
+    """战斗单位组件: 指向 StatStore 中的一行"""
+    row: int
+
+
+class StatStore:
+    """
+    列式属性存储
+    
+    - 行号在单位存活期间保持不变；移除的行进入空闲列表，之后被复用
+    - alive 标记当前有效的行，批量操作只修改有效行
+    - max_hp / max_ep 记录上限，用于治疗封顶
+    """
+    
+    def __init__(self):
+        self.columns: dict[str, array] = {name: array("i") for name in STAT_FIELDS}
+        self.max_hp = array("i")
+        self.max_ep = array("i")
+        self.alive = bytearray()
+        self._free: list[int] = []
+    
+    # ==================== 列访问 ====================
+    
+    @property
+    def hp(self) -> array:
+        return self.columns["hp"]
+    
+    @property
+    def ep(self) -> array:
+        return self.columns["ep"]
+    
+    @property
+    def atk(self) -> array:
+        return self.columns["atk"]
+    
+    @property
+    def def_(self) -> array:
+        return self.columns["def"]
+    
+    @property
+    def spd(self) -> array:
+        return self.columns["spd"]
+    
+    @property
+    def fcs(self) -> array:
+        return self.columns["fcs"]
+    
+    def __len__(self) -> int:
+        """有效行数"""
+        return len(self.alive) - len(self._free)
+    
+    def rows(self) -> list[int]:
+        """全部有效行号"""
+        return list(compress(range(len(self.alive)), self.alive))
+    
+    # ==================== 增删 ====================
+    
+    def add(self, stats: Stats) -> int:
+        """添加一个单位，返回行号"""
+        values = (stats.hp, stats.ep, stats.atk, stats.def_, stats.spd, stats.fcs)
+        if self._free:
+            row = self._free.pop()
+            for name, value in zip(STAT_FIELDS, values):
+                self.columns[name][row] = value
+            self.max_hp[row] = stats.hp
+            self.max_ep[row] = stats.ep
+            self.alive[row] = 1
+            return row
+        
+        for name, value in zip(STAT_FIELDS, values):
+            self.columns[name].append(value)
+        self.max_hp.append(stats.hp)
+        self.max_ep.append(stats.ep)
+        self.alive.append(1)
+        return len(self.alive) - 1
+    
+    def remove(self, row: int) -> None:
+        """移除一个单位，行号留待复用"""
+        if self.alive[row]:
+            self.alive[row] = 0
+            self._free.append(row)
+    
+    def get(self, row: int) -> Stats:
+        """读取一行为 Stats 模型 (用于界面显示 / 存档)"""
+        return Stats(**{name: self.columns[name][row] for name in STAT_FIELDS})
+    
+    # ==================== 批量操作 ====================
+    
+    def apply_damage(
+        self,
+        amounts: int | Sequence[int],
+        rows: Sequence[int] | None = None
+    ) -> array:
+        """
+        对一批单位造成伤害
+        
+        实际伤害 = max(1, 攻击值 - 防御)，生命值最低为 0
+        
+        Args:
+            amounts: 攻击值，整数表示所有目标相同，否则与 rows 一一对应
+            rows: 目标行号，None 表示全部单位 (此时序列按行号对应)
+        
+        Returns:
+            每个目标实际受到的伤害 (已倒下的单位为 0)
+        
+        Raises:
+            ValueError: amounts 的长度与目标数不一致
+        """
+        hp, defense, alive = self.hp, self.def_, self.alive
+        if not isinstance(amounts, int):
+            expected = len(hp) if rows is None else len(rows)
+            if len(amounts) != expected:
+                raise ValueError(f"攻击值有 {len(amounts)} 个，目标有 {expected} 个")
+        if rows is None:
+            if isinstance(amounts, int):
+                dealt = array("i", [
+                    (amounts - d if amounts - d > 1 else 1) if a else 0
+                    for d, a in zip(defense, alive)
+                ])
+            else:
+                dealt = array("i", [
+                    (x - d if x - d > 1 else 1) if a else 0
+                    for x, d, a in zip(amounts, defense, alive)
+                ])
+            # 整列替换，一次性写回
+            hp[:] = array("i", [h - x if h > x else 0 for h, x in zip(hp, dealt)])
+            return dealt
+        
+        if isinstance(amounts, int):
+            amounts = [amounts] * len(rows)
+        dealt = array("i", bytes(4 * len(rows)))
+        for i, (row, x) in enumerate(zip(rows, amounts)):
+            if not alive[row]:
+                continue
+            damage = x - defense[row]
+            if damage < 1:
+                damage = 1
+            dealt[i] = damage
+            h = hp[row]
+            hp[row] = h - damage if h > damage else 0
+        return dealt
+    
+    def heal(self, amount: int, rows: Iterable[int] | None = None) -> None:
+        """恢复生命值，不超过上限"""
+        hp, max_hp, alive = self.hp, self.max_hp, self.alive
+        if rows is None:
+            hp[:] = array("i", [
+                (h + amount if h + amount < m else m) if a else h
+                for h, m, a in zip(hp, max_hp, alive)
+            ])
+            return
+        for row in rows:
+            if alive[row]:
+                hp[row] = min(hp[row] + amount, max_hp[row])
+    
+    def apply_buff(
+        self,
+        field: str,
+        factor: float = 1.0,
+        delta: int = 0,
+        rows: Iterable[int] | None = None
+    ) -> None:
+        """
+        按 值 * factor + delta 修改一列属性 (结果取整，最低为 0)
+        
+        Args:
+            field: 属性名 (STAT_FIELDS 之一)
+            factor: 乘数
+            delta: 加数
+            rows: 目标行号，None 表示全部单位
+        """
+        column = self.columns[field]
+        alive = self.alive
+        if rows is None:
+            column[:] = array("i", [
+                max(0, int(v * factor) + delta) if a else v
+                for v, a in zip(column, alive)
+            ])
+            return
+        for row in rows:
+            if alive[row]:
+                column[row] = max(0, int(column[row] * factor) + delta)
+    
+    def defeated(self) -> list[int]:
+        """生命值降为 0 但仍有效的行"""
+        return [
+            row for row, (h, a) in enumerate(zip(self.hp, self.alive))
+            if a and h == 0
+        ]
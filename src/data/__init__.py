@@ -1,25 +1,54 @@
 """
 数据层模块
+
+子模块按需导入: 访问 src.data.X 时才加载对应模块，
+避免仅使用数据库时也要导入 Pydantic 模型与游戏数据
 """
-from src.data.database import Database, get_database
-from src.data.models import (
-    User,
-    UserSession,
-    VFSNode,
-    Stats,
-    ItemModel,
-    EnemyModel,
-    SkillModel,
-)
-
-__all__ = [
-    "Database",
-    "get_database",
-    "User",
-    "UserSession",
-    "VFSNode",
-    "Stats",
-    "ItemModel",
-    "EnemyModel",
-    "SkillModel",
-]
+import importlib
+
+
+# 导出名 -> 所在模块
+_EXPORTS = {
+    "Database": "src.data.database",
+    "get_database": "src.data.database",
+    "VFSRow": "src.data.database",
+    "AsyncDatabase": "src.data.async_database",
+    "BufferedDatabase": "src.data.write_buffer",
+    "ShardedDatabase": "src.data.sharding",
+    "GameData": "src.data.loader",
+    "GameDataError": "src.data.loader",
+    "Registry": "src.data.loader",
+    "load_game_data": "src.data.loader",
+    "get_game_data": "src.data.loader",
+    "GameIndex": "src.data.index",
+    "ResolvedDrop": "src.data.index",
+    "build_index": "src.data.index",
+    "get_game_index": "src.data.index",
+    "GameMap": "src.data.maps",
+    "load_map": "src.data.maps",
+    "load_map_file": "src.data.maps",
+    "load_manifest": "src.data.maps",
+    "User": "src.data.models",
+    "UserSession": "src.data.models",
+    "VFSNode": "src.data.models",
+    "Stats": "src.data.models",
+    "ItemModel": "src.data.models",
+    "EnemyModel": "src.data.models",
+    "SkillModel": "src.data.models",
+    "MapInfo": "src.data.models",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,175 @@
+"""
+异步数据库访问层
+在 Database 之上提供可 await 的接口，供多个并发会话共享
+
+- 写操作进入单写者队列，由专用写线程批量执行，同一批次只提交一次 (group commit)
+- 读操作分发到读线程池，各自使用连接池中的连接，WAL 模式下不会被写操作阻塞
+"""
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from src.data.database import Database
+
+
+class AsyncDatabase:
+    """
+    Database 的异步门面
+    
+    用法:
+        adb = AsyncDatabase(db)
+        user = await adb.get_user_by_username("alice")
+        node_id = await adb.create_vfs_node(user_id, None, "notes")
+    """
+    
+    def __init__(
+        self,
+        db: Database,
+        readers: int | None = None,
+        max_batch: int = 256
+    ):
+        self.db = db
+        self.max_batch = max_batch
+        # 写线程占用一个连接，其余连接留给读线程
+        self.readers = readers or max(1, db.pool_size - 1)
+        self._reader_pool = ThreadPoolExecutor(
+            max_workers=self.readers,
+            thread_name_prefix="db-reader"
+        )
+        self._write_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._writer_loop,
+            name="db-writer",
+            daemon=True
+        )
+        self._writer.start()
+        self.batches_committed = 0
+        self.writes_committed = 0
+    
+    @property
+    def pool_size(self) -> int:
+        """底层连接池大小"""
+        return self.db.pool_size
+    
+    def submit(self, name: str, *args: Any, **kwargs: Any) -> Future:
+        """提交一次数据库调用，返回 concurrent.futures.Future"""
+        if self._closed:
+            raise RuntimeError("AsyncDatabase 已关闭")
+        
+        if name in self.db.WRITE_METHODS:
+            future: Future = Future()
+            self._write_queue.put((future, name, args, kwargs))
+            return future
+        
+        return self._reader_pool.submit(getattr(self.db, name), *args, **kwargs)
+    
+    def __getattr__(self, name: str):
+        """把 Database 的公开方法包装为协程函数"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = getattr(self.db, name)
+        if not callable(method):
+            raise AttributeError(name)
+        
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await asyncio.wrap_future(self.submit(name, *args, **kwargs))
+        
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+    
+    def blocking(self) -> "BlockingDatabase":
+        """
+        返回同步接口
+        
+        AuthSystem / VirtualFileSystem 是同步代码，在会话工作线程中通过它访问
+        数据库，写操作同样经过写队列合并提交
+        """
+        return BlockingDatabase(self)
+    
+    def close(self) -> None:
+        """等待队列中的写操作完成并关闭线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._write_queue.put(None)
+        self._writer.join()
+        self._reader_pool.shutdown(wait=True)
+    
+    # ==================== 写线程 ====================
+    
+    def _writer_loop(self) -> None:
+        """单写者循环: 取出当前排队的所有写操作，在一个事务中执行"""
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            self._commit_batch(batch)
+            if stop:
+                return
+    
+    def _commit_batch(self, batch: list[tuple]) -> None:
+        """执行一个批次；每个操作有独立的 SAVEPOINT，失败不影响同批次其他操作"""
+        results: list[tuple[Future, Any, BaseException | None]] = []
+        try:
+            with self.db.connection():
+                for future, name, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        value = getattr(self.db, name)(*args, **kwargs)
+                        results.append((future, value, None))
+                    except Exception as exc:
+                        results.append((future, None, exc))
+        except Exception as exc:
+            # 开启事务或提交失败，整个批次都没有落盘: 通知批次中所有尚未完成的调用方，
+            # 包括 BEGIN 失败时还没来得及执行的操作 (否则 .result() 会一直等待)
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        
+        # 提交成功后再通知调用方，保证返回即已持久化
+        self.batches_committed += 1
+        self.writes_committed += len(results)
+        for future, value, error in results:
+            if error is None:
+                future.set_result(value)
+            else:
+                future.set_exception(error)
+
+
+class BlockingDatabase:
+    """AsyncDatabase 的同步代理，接口与 Database 相同"""
+    
+    def __init__(self, adb: AsyncDatabase):
+        self._adb = adb
+    
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._adb.db, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args: Any, **kwargs: Any) -> Any:
+            return self._adb.submit(name, *args, **kwargs).result()
+        
+        call.__name__ = name
+        return call
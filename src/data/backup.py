@@ -0,0 +1,343 @@
+"""
+在线备份与完整性检查
+游戏运行时备份存档，不需要停服:
+- 备份: SQLite 在线备份 API，每次复制 pages 页后暂停 pause 秒，给游戏会话让出磁盘和 CPU；
+  备份期间保持一个读事务，得到开始时刻的一致快照 (WAL 模式下写入不受影响，备份也不会因写入重新开始)
+- 检查: PRAGMA quick_check / integrity_check，使用只读连接
+- 定时备份: 后台线程按间隔备份，只保留最近 keep 份
+
+每份备份是一个目录 (save/backups/game-20250101-120000/)，包含主存档和分片文件 (如有)，
+恢复时把其中的文件复制回存档目录即可。
+
+用法:
+    python -m src.data.backup --db save/game.db backup
+    python -m src.data.backup --db save/game.db check --full
+    python -m src.data.backup --db save/game.db list
+"""
+import argparse
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+
+# 每批复制的页数 (默认页大小 4 KB)
+PAGES = 256
+# 两批之间的暂停 (秒)
+PAUSE = 0.005
+# 默认保留的备份份数
+KEEP = 7
+
+# 只同步数据 (没有 fdatasync 的平台退回 fsync)
+_sync = getattr(os, "fdatasync", os.fsync)
+
+
+class BackupCancelled(Exception):
+    """定时备份被停止"""
+
+
+@dataclass(slots=True)
+class BackupResult:
+    """一次备份的结果"""
+    path: Path
+    files: int = 0
+    pages: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    # 备份副本 quick_check 发现的问题 (文件名 -> 问题)
+    problems: dict[str, list[str]] = field(default_factory=dict)
+    
+    def __str__(self) -> str:
+        text = (
+            f"{self.path}: {self.files} 个文件, {self.bytes / 1024 / 1024:.1f} MB, "
+            f"用时 {self.seconds:.2f} 秒"
+        )
+        if self.problems:
+            text += f", 校验发现 {sum(len(p) for p in self.problems.values())} 个问题"
+        return text
+
+
+def save_files(db_path: str | Path) -> list[Path]:
+    """存档包含的数据库文件: 主存档和 shards/ 下的分片"""
+    db_path = Path(db_path)
+    files = [db_path]
+    shard_dir = db_path.parent / "shards"
+    if shard_dir.is_dir():
+        files.extend(sorted(shard_dir.glob("*.db")))
+    return files
+
+
+# ==================== 备份 ====================
+
+def backup_file(
+    source: Path,
+    target: Path,
+    pages: int = PAGES,
+    pause: float = PAUSE,
+    cancel: threading.Event | None = None
+) -> int:
+    """
+    在线备份一个数据库文件，返回复制的页数
+    
+    Args:
+        pages: 每批复制的页数，<= 0 表示一次复制全部
+    
+    Raises:
+        BackupCancelled: cancel 被设置
+    """
+    copied = 0
+    # 副本由这里分批落盘: 最后一次性同步整个文件会占满磁盘，拖慢游戏自己的提交
+    fd = os.open(target, os.O_RDWR | os.O_CREAT, 0o644)
+    
+    def progress(status: int, remaining: int, total: int) -> None:
+        nonlocal copied
+        copied = total - remaining
+        if cancel is not None and cancel.is_set():
+            raise BackupCancelled()
+        _sync(fd)
+        if pause and remaining:
+            time.sleep(pause)
+    
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True, isolation_level=None)
+    dst = sqlite3.connect(target)
+    dst.execute("PRAGMA synchronous=OFF")
+    try:
+        # 读事务固定快照: 其他连接的写入不会让备份从头开始
+        src.execute("BEGIN")
+        src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+        src.backup(dst, pages=pages if pages > 0 else -1, progress=progress)
+        src.execute("COMMIT")
+        # 副本改为回滚日志模式，备份是单个文件，不会留下 -wal / -shm
+        dst.execute("PRAGMA journal_mode=DELETE")
+        _sync(fd)
+    finally:
+        dst.close()
+        src.close()
+        os.close(fd)
+    return copied
+
+
+
+def backup_database(
+    db_path: str | Path,
+    directory: str | Path | None = None,
+    pages: int = PAGES,
+    pause: float = PAUSE,
+    verify: bool = True,
+    cancel: threading.Event | None = None
+) -> BackupResult:
+    """
+    备份整个存档 (主存档和分片)
+    
+    先写入 .part 目录，全部完成后再改名，中途失败不会留下不完整的备份
+    
+    Args:
+        directory: 备份存放目录，默认为存档旁的 backups/
+        verify: 备份后对副本执行 quick_check
+    """
+    db_path = Path(db_path)
+    directory = Path(directory) if directory is not None else db_path.parent / "backups"
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    name = f"{db_path.stem}-{stamp}"
+    suffix = 1
+    while (directory / name).exists():
+        name = f"{db_path.stem}-{stamp}-{suffix}"
+        suffix += 1
+    result = BackupResult(directory / name)
+    tmp = directory / (name + ".part")
+    
+    start = time.perf_counter()
+    try:
+        for source in save_files(db_path):
+            target = tmp / source.relative_to(db_path.parent)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            result.pages += backup_file(source, target, pages, pause, cancel)
+            result.files += 1
+            result.bytes += target.stat().st_size
+            if verify:
+                problems = check_integrity(target)
+                if problems:
+                    result.problems[str(target.relative_to(tmp))] = problems
+        tmp.rename(result.path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def list_backups(db_path: str | Path, directory: str | Path | None = None) -> list[Path]:
+    """已有的备份，从旧到新"""
+    db_path = Path(db_path)
+    directory = Path(directory) if directory is not None else db_path.parent / "backups"
+    if not directory.is_dir():
+        return []
+    pattern = re.compile(rf"^{re.escape(db_path.stem)}-\d{{8}}-\d{{6}}(-\d+)?$")
+    # 目录名中的时间戳按字典序即为时间顺序
+    return sorted(
+        path for path in directory.iterdir() if path.is_dir() and pattern.match(path.name)
+    )
+
+
+def rotate_backups(
+    db_path: str | Path,
+    keep: int = KEEP,
+    directory: str | Path | None = None
+) -> list[Path]:
+    """只保留最近 keep 份备份，返回删除的备份"""
+    backups = list_backups(db_path, directory)
+    removed = backups[:-keep] if keep > 0 else backups
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+    return removed
+
+
+# ==================== 检查 ====================
+
+def check_integrity(path: str | Path, full: bool = False, max_errors: int = 100) -> list[str]:
+    """
+    检查一个数据库文件，返回发现的问题 (没有问题时为空列表)
+    
+    Args:
+        full: integrity_check (还会核对索引内容) 并检查外键；默认为较快的 quick_check
+    """
+    pragma = "integrity_check" if full else "quick_check"
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = [row[0] for row in conn.execute(f"PRAGMA {pragma}({max(1, max_errors)})")]
+        problems = [] if rows == ["ok"] else rows
+        if full:
+            for table, rowid, parent, _ in conn.execute("PRAGMA foreign_key_check"):
+                problems.append(f"外键失效: {table} 行 {rowid} 引用的 {parent} 不存在")
+    except sqlite3.DatabaseError as e:
+        problems = [str(e)]
+    finally:
+        conn.close()
+    return problems
+
+
+def check_database(db_path: str | Path, full: bool = False) -> dict[Path, list[str]]:
+    """检查存档的每个数据库文件"""
+    return {path: check_integrity(path, full) for path in save_files(db_path)}
+
+
+# ==================== 定时备份 ====================
+
+class BackupScheduler:
+    """
+    后台定时备份
+    
+    用法:
+        scheduler = BackupScheduler("save/game.db", interval=3600, keep=7)
+        scheduler.start()
+        ...
+        scheduler.stop()    # 进行中的备份会被取消
+    """
+    
+    def __init__(
+        self,
+        db_path: str | Path,
+        interval: float,
+        keep: int = KEEP,
+        directory: str | Path | None = None,
+        pages: int = PAGES,
+        pause: float = PAUSE
+    ):
+        """
+        Args:
+            interval: 备份间隔 (秒)，启动后第一次备份也在一个间隔之后
+            keep: 保留的备份份数
+        """
+        self.db_path = Path(db_path)
+        self.interval = max(1.0, interval)
+        self.keep = max(1, keep)
+        self.directory = directory
+        self.pages = pages
+        self.pause = pause
+        self.last: BackupResult | None = None
+        self.error: BaseException | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+    
+    def start(self) -> threading.Thread:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="db-backup", daemon=True)
+            self._thread.start()
+        return self._thread
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.run_once()
+    
+    def run_once(self) -> BackupResult | None:
+        """立即备份一次并清理旧备份；出错时记录在 error 中"""
+        try:
+            self.last = backup_database(
+                self.db_path, self.directory, self.pages, self.pause, cancel=self._stop
+            )
+            rotate_backups(self.db_path, self.keep, self.directory)
+            self.error = None
+            return self.last
+        except BackupCancelled:
+            return None
+        except Exception as e:
+            self.error = e
+            return None
+    
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="存档在线备份与完整性检查")
+    parser.add_argument("--db", default="save/game.db", help="存档数据库路径")
+    parser.add_argument("--dir", default=None, help="备份目录，默认为存档旁的 backups/")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backup = sub.add_parser("backup", help="立即备份 (游戏可以继续运行)")
+    backup.add_argument("--pages", type=int, default=PAGES, help="每批复制的页数")
+    backup.add_argument("--pause", type=float, default=PAUSE, help="两批之间暂停的秒数")
+    backup.add_argument("--keep", type=int, default=0, help="备份后只保留最近 N 份，0 表示不清理")
+    check = sub.add_parser("check", help="检查存档完整性")
+    check.add_argument("--full", action="store_true", help="完整检查 (integrity_check 和外键)，较慢")
+    sub.add_parser("list", help="列出已有的备份")
+    args = parser.parse_args()
+    
+    match args.command:
+        case "backup":
+            result = backup_database(args.db, args.dir, args.pages, args.pause)
+            print(f"备份完成: {result}")
+            for name, problems in result.problems.items():
+                print(f"  {name}: {'; '.join(problems)}")
+            if args.keep > 0:
+                for path in rotate_backups(args.db, args.keep, args.dir):
+                    print(f"已删除旧备份: {path.name}")
+        case "check":
+            start = time.perf_counter()
+            failed = False
+            for path, problems in check_database(args.db, args.full).items():
+                if problems:
+                    failed = True
+                    print(f"{path}: 发现 {len(problems)} 个问题")
+                    for problem in problems:
+                        print(f"  {problem}")
+                else:
+                    print(f"{path}: ok")
+            print(f"用时 {time.perf_counter() - start:.2f} 秒")
+            if failed:
+                raise SystemExit(1)
+        case "list":
+            for path in list_backups(args.db, args.dir):
+                size = sum(f.stat().st_size for f in path.rglob("*.db"))
+                print(f"{path.name}  {size / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,74 +2,335 @@
 数据库管理模块
 SQLite 数据库封装，管理用户和虚拟文件系统
 """
+import queue
 import sqlite3
+import threading
+from collections import OrderedDict
 from pathlib import Path
+from sys import intern
 from contextlib import contextmanager
-from typing import Any, Generator
+from typing import Any, Generator, Iterator
 from datetime import datetime
 
+from src.data.migrations import Migrator
+
+
+# 文件内容分块大小 (字符数)；除最后一块外每块都是满的
+CHUNK_SIZE = 4096
+
+# 节点及其全部子孙的 ID (参数为子树根节点)
+_SUBTREE = """
+    WITH RECURSIVE subtree(id) AS (
+        SELECT ?
+        UNION ALL
+        SELECT n.id FROM vfs_nodes n JOIN subtree ON n.parent_id = subtree.id
+    )
+    SELECT id FROM subtree
+"""
+
+# 节点查询返回的列 (旧存档的 content 列由 read_vfs_content 读取，不随节点返回)
+_NODE_COLUMNS = "id, user_id, parent_id, name, is_directory, created_at, updated_at"
+
+
+def _intern(value: Any) -> Any:
+    return intern(value) if isinstance(value, str) else value
+
+
+class VFSRow:
+    """
+    文件系统节点 (vfs_nodes 的一行)
+    
+    用 __slots__ 代替 dict，名称和时间戳经 intern 在所有节点间共用，
+    缓存大量节点时内存约为 dict 的一半；仍可以用 node['name'] 访问
+    """
+    
+    __slots__ = ("id", "user_id", "parent_id", "name", "is_directory", "created_at", "updated_at")
+    
+    def __init__(
+        self,
+        id: int,
+        user_id: int,
+        parent_id: int | None,
+        name: str,
+        is_directory: bool,
+        created_at: str | None = None,
+        updated_at: str | None = None
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.parent_id = parent_id
+        self.name = name
+        self.is_directory = is_directory
+        self.created_at = created_at
+        self.updated_at = updated_at
+    
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "VFSRow":
+        """_NODE_COLUMNS 顺序的查询结果"""
+        id, user_id, parent_id, name, is_directory, created_at, updated_at = row
+        return cls(
+            id, user_id, parent_id, intern(name), is_directory,
+            _intern(created_at), _intern(updated_at)
+        )
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+    
+    def keys(self) -> tuple[str, ...]:
+        return self.__slots__
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, VFSRow):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+    
+    def __repr__(self) -> str:
+        return f"VFSRow(id={self.id}, name={self.name!r}, is_directory={self.is_directory})"
+
+
+class _UserCache:
+    """
+    用户记录缓存 (按用户名，LRU，有上限)
+    
+    也缓存 "用户不存在" (None)，反复用不存在的用户名登录时不必查询数据库。
+    只缓存事务之外读到的 (已提交的) 记录，修改用户表的操作会使对应条目失效；
+    读取期间发生过失效时不写入，避免把旧记录放回缓存
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self._users: OrderedDict[str, dict[str, Any] | None] = OrderedDict()
+        # 用户ID -> 用户名
+        self._ids: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def get(
+        self,
+        username: str | None = None,
+        user_id: int | None = None
+    ) -> tuple[bool, dict[str, Any] | None, int]:
+        """按用户名或用户ID查找，返回 (是否命中, 记录副本, 当前代数)"""
+        with self._lock:
+            if username is None:
+                username = self._ids.get(user_id)
+            if username is not None and username in self._users:
+                self._users.move_to_end(username)
+                self.hits += 1
+                user = self._users[username]
+                return True, dict(user) if user else None, self._generation
+            self.misses += 1
+            return False, None, self._generation
+    
+    def put(
+        self,
+        username: str,
+        user: dict[str, Any] | None,
+        generation: int | None = None
+    ) -> None:
+        """写入缓存；给出 generation 时，若之后发生过失效则放弃写入"""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._users[username] = user
+            self._users.move_to_end(username)
+            if user is not None:
+                self._ids[user["id"]] = username
+            while len(self._users) > self.capacity:
+                _, old = self._users.popitem(last=False)
+                if old is not None:
+                    self._ids.pop(old["id"], None)
+    
+    def invalidate(self, username: str | None = None, user_id: int | None = None) -> None:
+        """使用户名或用户ID对应的条目失效"""
+        with self._lock:
+            self._generation += 1
+            if user_id is not None:
+                username = self._ids.pop(user_id, username)
+            user = self._users.pop(username, None) if username is not None else None
+            if user is not None:
+                self._ids.pop(user["id"], None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._users.clear()
+            self._ids.clear()
+
 
 class Database:
-    """SQLite 数据库封装类"""
+    """
+    SQLite 数据库封装类
     
-    def __init__(self, db_path: str | Path = "save/game.db"):
+    连接由一个有上限的连接池复用，可在多个线程 / 多个会话之间共享
+    """
+    
+    # 会修改数据的方法 (供异步门面 / 写缓冲区分读写)
+    WRITE_METHODS = frozenset({
+        "create_user",
+        "login_user",
+        "update_user_login",
+        "update_user_path",
+        "create_vfs_node",
+        "update_vfs_node_content",
+        "append_vfs_node_content",
+        "rename_vfs_node",
+        "delete_vfs_node",
+        "create_vfs_snapshot",
+        "restore_vfs_snapshot",
+        "prune_vfs_snapshots",
+    })
+    
+    def __init__(self, db_path: str | Path = "save/game.db", pool_size: int = 4):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool_size = max(1, pool_size)
+        self._pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._pool_lock = threading.Lock()
+        self._pool_created = 0
+        # 当前线程正在使用的连接 (用于嵌套事务)
+        self._local = threading.local()
+        self.user_cache = _UserCache()
         self._init_tables()
     
+    def _connect(self) -> sqlite3.Connection:
+        """创建一个新连接"""
+        # 连接会在线程间传递，由连接池保证同一时刻只有一个使用者
+        # 事务由 connection() 显式管理 (BEGIN / SAVEPOINT)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row  # 允许通过列名访问
+        # WAL 模式下读写互不阻塞，适合多个会话共享同一个存档
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+    
+    def _acquire(self) -> sqlite3.Connection:
+        """从连接池取出一个连接，池满时等待归还"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._pool_lock:
+            if self._pool_created < self.pool_size:
+                self._pool_created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._pool_created -= 1
+                    raise
+        
+        return self._pool.get()
+    
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """归还连接"""
+        self._pool.put(conn)
+    
     @contextmanager
     def connection(self) -> Generator[sqlite3.Connection, None, None]:
-        """获取数据库连接的上下文管理器"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 允许通过列名访问
+        """
+        获取数据库连接的上下文管理器
+        
+        最外层调用开启一个事务并在退出时提交；同一线程内的嵌套调用
+        复用外层连接，并用 SAVEPOINT 隔离，失败时只回滚自身的修改。
+        因此可以把多个操作包进一个 connection() 中合并为一次提交。
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield from self._savepoint(conn)
+            return
+        
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 0
+        self._local.user_changes = []
         try:
+            conn.execute("BEGIN")
             yield conn
             conn.commit()
-        except Exception:
+        except BaseException:
+            # 包括 GeneratorExit (使用连接的生成器被中途丢弃): 不回滚的话，
+            # 连接带着未结束的事务回到连接池，之后使用它的调用都会失败
             conn.rollback()
             raise
         finally:
+            self._local.conn = None
+            self._release(conn)
+            # 事务结束后再使修改过的用户失效一次: 提交前其他线程可能读到并缓存了旧记录
+            for username, user_id in self._local.user_changes:
+                self.user_cache.invalidate(username, user_id)
+    
+    def _savepoint(
+        self,
+        conn: sqlite3.Connection
+    ) -> Generator[sqlite3.Connection, None, None]:
+        """嵌套事务"""
+        self._local.depth += 1
+        name = f"sp{self._local.depth}"
+        conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield conn
+            conn.execute(f"RELEASE {name}")
+        except BaseException:
+            conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+            raise
+        finally:
+            self._local.depth -= 1
+    
+    def flush(self) -> None:
+        """提交缓冲中的修改 (每次操作都会立即提交，这里无需处理)"""
+    
+    def close(self) -> None:
+        """关闭连接池中所有空闲连接"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
             conn.close()
+            with self._pool_lock:
+                self._pool_created -= 1
     
-    def _init_tables(self) -> None:
-        """初始化数据库表"""
+    def _caching_users(self) -> bool:
+        """当前线程读到的用户记录能否写入缓存 (不在事务中，即读到的是已提交的记录)"""
+        return getattr(self._local, "conn", None) is None
+    
+    def _user_changed(self, username: str | None = None, user_id: int | None = None) -> None:
+        """在写事务中修改了用户表: 立即使缓存失效，事务结束时再失效一次"""
+        self.user_cache.invalidate(username, user_id)
+        if getattr(self._local, "conn", None) is not None:
+            self._local.user_changes.append((username, user_id))
+    
+    def for_user(self, user_id: int) -> "Database":
+        """用户文件系统所在的数据库 (分片存储时为对应的分片)"""
+        return self
+    
+    def schema_version(self) -> int:
+        """存档当前的表结构版本"""
         with self.connection() as conn:
-            cursor = conn.cursor()
-            
-            # 用户表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP,
-                    current_path TEXT DEFAULT '/'
-                )
-            """)
-            
-            # 虚拟文件系统表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS vfs_nodes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    parent_id INTEGER,
-                    name TEXT NOT NULL,
-                    is_directory BOOLEAN DEFAULT FALSE,
-                    content TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                    FOREIGN KEY (parent_id) REFERENCES vfs_nodes(id) ON DELETE CASCADE,
-                    UNIQUE(user_id, parent_id, name)
-                )
-            """)
-            
-            # 创建索引
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_vfs_user_parent 
-                ON vfs_nodes(user_id, parent_id)
-            """)
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    def _init_tables(self) -> None:
+        """
+        初始化数据库表
+        
+        同步执行尚未应用的表结构迁移；数据迁移 (如旧存档内容转换) 由
+        Migrator 在后台分批完成，期间旧格式的数据仍可正常读写
+        """
+        Migrator(self).run(schema_only=True)
     
     # ==================== 用户操作 ====================
     
@@ -80,8 +341,10 @@ class Database:
         Returns:
             用户ID，如果用户名已存在则返回 None
         """
+        # 用户名唯一，插入即检查，不需要先查询
         try:
             with self.connection() as conn:
+                self._user_changed(username)
                 cursor = conn.cursor()
                 cursor.execute(
                     "INSERT INTO users (username, password_hash) VALUES (?, ?)",
@@ -92,7 +355,12 @@ class Database:
             return None
     
     def get_user_by_username(self, username: str) -> dict[str, Any] | None:
-        """通过用户名获取用户信息"""
+        """通过用户名获取用户信息 (经过用户缓存)"""
+        hit, user, generation = self.user_cache.get(username)
+        if hit:
+            return user
+        # 事务中读到的可能是未提交的记录，不缓存
+        cacheable = self._caching_users()
         with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
@@ -100,10 +368,41 @@ class Database:
                 (username,)
             )
             row = cursor.fetchone()
-            return dict(row) if row else None
+            user = dict(row) if row else None
+        if cacheable:
+            self.user_cache.put(username, user, generation)
+        return dict(user) if user else None
+    
+    def login_user(self, username: str, password_hash: str) -> dict[str, Any] | None:
+        """
+        登录: 用户名和密码哈希都匹配时更新登录时间
+        
+        校验与更新是同一条语句
+        
+        Returns:
+            更新后的用户信息，不匹配时返回 None
+        """
+        cacheable = self._caching_users()
+        with self.connection() as conn:
+            self._user_changed(username)
+            row = conn.execute(
+                """UPDATE users SET last_login = ?
+                   WHERE username = ? AND password_hash = ?
+                   RETURNING *""",
+                (datetime.now(), username, password_hash)
+            ).fetchone()
+            user = dict(row) if row else None
+        # 已提交，直接用返回的记录更新缓存，下次登录不必再查询
+        if cacheable and user is not None:
+            self.user_cache.put(username, user)
+        return dict(user) if user else None
     
     def get_user_by_id(self, user_id: int) -> dict[str, Any] | None:
-        """通过ID获取用户信息"""
+        """通过ID获取用户信息 (经过用户缓存)"""
+        hit, user, generation = self.user_cache.get(user_id=user_id)
+        if hit:
+            return user
+        cacheable = self._caching_users()
         with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
@@ -111,11 +410,16 @@ class Database:
                 (user_id,)
             )
             row = cursor.fetchone()
-            return dict(row) if row else None
+            user = dict(row) if row else None
+        # 不存在的ID没有对应的用户名，不缓存
+        if cacheable and user is not None:
+            self.user_cache.put(user["username"], user, generation)
+        return dict(user) if user else None
     
     def update_user_login(self, user_id: int) -> None:
         """更新用户最后登录时间"""
         with self.connection() as conn:
+            self._user_changed(user_id=user_id)
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE users SET last_login = ? WHERE id = ?",
@@ -125,6 +429,7 @@ class Database:
     def update_user_path(self, user_id: int, path: str) -> None:
         """更新用户当前路径"""
         with self.connection() as conn:
+            self._user_changed(user_id=user_id)
             cursor = conn.cursor()
             cursor.execute(
                 "UPDATE users SET current_path = ? WHERE id = ?",
@@ -152,90 +457,415 @@ class Database:
                 cursor = conn.cursor()
                 cursor.execute(
                     """INSERT INTO vfs_nodes 
-                       (user_id, parent_id, name, is_directory, content)
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (user_id, parent_id, name, is_directory, content)
+                       (user_id, parent_id, name, is_directory)
+                       VALUES (?, ?, ?, ?)""",
+                    (user_id, parent_id, name, is_directory)
                 )
-                return cursor.lastrowid
+                node_id = cursor.lastrowid
+                # 有快照时记录该节点是快照之后创建的
+                cursor.execute(
+                    """INSERT OR IGNORE INTO vfs_journal (snapshot_id, node_id, existed)
+                       SELECT MAX(id), ?, FALSE FROM vfs_snapshots
+                       WHERE user_id = ? HAVING MAX(id) IS NOT NULL""",
+                    (node_id, user_id)
+                )
+                if content and not is_directory:
+                    self._insert_chunks(cursor, node_id, content, 0)
+                return node_id
         except sqlite3.IntegrityError:
             return None
     
-    def get_vfs_node(self, node_id: int) -> dict[str, Any] | None:
+    def get_vfs_node(self, node_id: int) -> VFSRow | None:
         """获取节点信息"""
         with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT * FROM vfs_nodes WHERE id = ?",
+                f"SELECT {_NODE_COLUMNS} FROM vfs_nodes WHERE id = ?",
                 (node_id,)
             )
             row = cursor.fetchone()
-            return dict(row) if row else None
+            return VFSRow.from_row(row) if row else None
     
     def get_vfs_node_by_path(
         self,
         user_id: int,
         parent_id: int | None,
         name: str
-    ) -> dict[str, Any] | None:
+    ) -> VFSRow | None:
         """通过父节点ID和名称获取节点"""
         with self.connection() as conn:
             cursor = conn.cursor()
             if parent_id is None:
                 cursor.execute(
-                    """SELECT * FROM vfs_nodes 
+                    f"""SELECT {_NODE_COLUMNS} FROM vfs_nodes 
                        WHERE user_id = ? AND parent_id IS NULL AND name = ?""",
                     (user_id, name)
                 )
             else:
                 cursor.execute(
-                    """SELECT * FROM vfs_nodes 
+                    f"""SELECT {_NODE_COLUMNS} FROM vfs_nodes 
                        WHERE user_id = ? AND parent_id = ? AND name = ?""",
                     (user_id, parent_id, name)
                 )
             row = cursor.fetchone()
-            return dict(row) if row else None
+            return VFSRow.from_row(row) if row else None
     
     def get_vfs_children(
+        self,
+        user_id: int,
+        parent_id: int | None,
+        after: tuple[bool, str] | None = None,
+        limit: int | None = None
+    ) -> list[VFSRow]:
+        """
+        获取目录下的子节点 (目录在前，按名称排序)
+        
+        Args:
+            after: 键集分页游标，上一页最后一项的 (is_directory, name)
+            limit: 本页最多返回的数量，None 表示全部
+        """
+        if after is None:
+            return self._query_children(user_id, parent_id, None, None, limit)
+        
+        # 排序为 is_directory DESC, name ASC；分成 "同类型中名称更大" 和
+        # "之后的类型" 两段查询，每段都能直接在索引上定位，不必从头扫描
+        is_dir = bool(after[0])
+        rows = self._query_children(user_id, parent_id, is_dir, after[1], limit)
+        if is_dir and (limit is None or len(rows) < limit):
+            rest = None if limit is None else limit - len(rows)
+            rows += self._query_children(user_id, parent_id, False, None, rest)
+        return rows
+    
+    def _query_children(
+        self,
+        user_id: int,
+        parent_id: int | None,
+        is_directory: bool | None,
+        after_name: str | None,
+        limit: int | None
+    ) -> list[VFSRow]:
+        """子节点查询，可限定节点类型并从某个名称之后开始"""
+        params: list[Any] = [user_id]
+        if parent_id is None:
+            where = "user_id = ? AND parent_id IS NULL"
+        else:
+            where = "user_id = ? AND parent_id = ?"
+            params.append(parent_id)
+        
+        if is_directory is not None:
+            where += " AND is_directory = ?"
+            params.append(is_directory)
+        if after_name is not None:
+            where += " AND name > ?"
+            params.append(after_name)
+        
+        sql = f"""SELECT {_NODE_COLUMNS} FROM vfs_nodes WHERE {where}
+                  ORDER BY is_directory DESC, name ASC"""
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [VFSRow.from_row(row) for row in cursor.fetchall()]
+    
+    def get_vfs_child_names(
         self,
         user_id: int,
         parent_id: int | None
-    ) -> list[dict[str, Any]]:
-        """获取目录下的所有子节点"""
+    ) -> list[tuple[str, bool]]:
+        """
+        目录下所有子节点的 (名称, 是否目录)，按名称排序
+        
+        只读取索引中的列 (覆盖索引)，供补全等只需要名称的场景使用
+        """
+        if parent_id is None:
+            where, params = "user_id = ? AND parent_id IS NULL", (user_id,)
+        else:
+            where, params = "user_id = ? AND parent_id = ?", (user_id, parent_id)
+        with self.connection() as conn:
+            rows = conn.execute(
+                f"""SELECT name, is_directory FROM vfs_nodes WHERE {where}
+                    ORDER BY is_directory DESC, name ASC""",
+                params
+            ).fetchall()
+        # 索引顺序是目录、文件两段各自有序，合并为按名称排序 (两段有序时 sort 为线性)
+        names = [(name, bool(is_dir)) for name, is_dir in rows]
+        names.sort()
+        return names
+    
+    def iter_vfs_children(
+        self,
+        user_id: int,
+        parent_id: int | None,
+        page_size: int = 500
+    ) -> Iterator[VFSRow]:
+        """按页迭代目录下的子节点，内存占用与目录大小无关"""
+        after = None
+        while True:
+            page = self.get_vfs_children(user_id, parent_id, after, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            last = page[-1]
+            after = (last['is_directory'], last['name'])
+    
+    def iter_vfs_subtree(
+        self,
+        user_id: int,
+        root_id: int | None,
+        batch: int = 256
+    ) -> Iterator[dict[str, Any]]:
+        """
+        深度优先迭代子树中的全部节点 (父目录总在其子节点之前)
+        
+        每个目录按页 (键集分页) 读取子节点，每页是一次独立的短查询，迭代期间不占用连接，
+        也不保持读事务 (长时间导出不会阻止 WAL 检查点)；迭代中途子树被修改时，
+        尚未读到的部分反映修改后的状态
+        
+        Args:
+            root_id: 子树根节点，None 表示用户的整个文件树
+        
+        Yields:
+            {'id', 'path' (从子树根节点名开始，以 / 分隔), 'is_directory', 'updated_at'}
+        """
+        def entry(node: VFSRow, path: str) -> dict[str, Any]:
+            return {
+                'id': node['id'],
+                'path': path,
+                'is_directory': node['is_directory'],
+                'updated_at': node['updated_at'],
+            }
+        
+        # 栈中是 (子节点迭代器, 父目录路径)，不用递归，目录层级再深也不会超出递归深度
+        if root_id is None:
+            stack = [(self.iter_vfs_children(user_id, None, batch), "")]
+        else:
+            root = self.get_vfs_node(root_id)
+            if root is None or root['user_id'] != user_id:
+                return
+            yield entry(root, root['name'])
+            if not root['is_directory']:
+                return
+            stack = [(self.iter_vfs_children(user_id, root_id, batch), root['name'])]
+        
+        while stack:
+            children, prefix = stack[-1]
+            node = next(children, None)
+            if node is None:
+                stack.pop()
+                continue
+            path = f"{prefix}/{node['name']}" if prefix else node['name']
+            yield entry(node, path)
+            if node['is_directory']:
+                stack.append((self.iter_vfs_children(user_id, node['id'], batch), path))
+    
+    def update_vfs_node_content(self, node_id: int, content: str) -> bool:
+        """更新文件内容 (整体替换)"""
         with self.connection() as conn:
             cursor = conn.cursor()
-            if parent_id is None:
+            self._journal(cursor, node_id, content=True)
+            cursor.execute(
+                """UPDATE vfs_nodes 
+                   SET content = NULL, updated_at = ? 
+                   WHERE id = ? AND is_directory = FALSE""",
+                (datetime.now(), node_id)
+            )
+            if cursor.rowcount == 0:
+                return False
+            cursor.execute("DELETE FROM vfs_chunks WHERE node_id = ?", (node_id,))
+            self._insert_chunks(cursor, node_id, content, 0)
+            return True
+    
+    def append_vfs_node_content(self, node_id: int, content: str) -> bool:
+        """
+        追加文件内容
+        
+        只会改写最后一个未满的块，再写入新块，不会重写整个文件
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            self._journal(cursor, node_id, content=True)
+            cursor.execute(
+                """UPDATE vfs_nodes 
+                   SET updated_at = ? 
+                   WHERE id = ? AND is_directory = FALSE""",
+                (datetime.now(), node_id)
+            )
+            if cursor.rowcount == 0:
+                return False
+            
+            self._convert_legacy_content(cursor, node_id)
+            cursor.execute(
+                """SELECT seq, data FROM vfs_chunks 
+                   WHERE node_id = ? ORDER BY seq DESC LIMIT 1""",
+                (node_id,)
+            )
+            last = cursor.fetchone()
+            seq = 0
+            if last is not None:
+                seq = last['seq'] + 1
+                room = CHUNK_SIZE - len(last['data'])
+                if room > 0 and content:
+                    cursor.execute(
+                        "UPDATE vfs_chunks SET data = ? WHERE node_id = ? AND seq = ?",
+                        (last['data'] + content[:room], node_id, last['seq'])
+                    )
+                    content = content[room:]
+            
+            self._insert_chunks(cursor, node_id, content, seq)
+            return True
+    
+    def get_vfs_content_size(self, node_id: int) -> int:
+        """获取文件内容长度 (字符数)，只读取最后一个块的长度"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """SELECT seq, length(data) AS size FROM vfs_chunks 
+                   WHERE node_id = ? ORDER BY seq DESC LIMIT 1""",
+                (node_id,)
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                return row['seq'] * CHUNK_SIZE + row['size']
+            
+            cursor.execute(
+                "SELECT length(content) AS size FROM vfs_nodes WHERE id = ?",
+                (node_id,)
+            )
+            row = cursor.fetchone()
+            return (row['size'] or 0) if row else 0
+    
+    def read_vfs_content(
+        self,
+        node_id: int,
+        start: int = 0,
+        end: int | None = None
+    ) -> str:
+        """
+        读取文件内容的 [start, end) 区间 (按字符)
+        
+        只查询区间覆盖到的块
+        """
+        if end is not None and end <= start:
+            return ""
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            first = start // CHUNK_SIZE
+            if end is None:
                 cursor.execute(
-                    """SELECT * FROM vfs_nodes 
-                       WHERE user_id = ? AND parent_id IS NULL
-                       ORDER BY is_directory DESC, name ASC""",
-                    (user_id,)
+                    """SELECT seq, data FROM vfs_chunks 
+                       WHERE node_id = ? AND seq >= ? ORDER BY seq""",
+                    (node_id, first)
                 )
             else:
                 cursor.execute(
-                    """SELECT * FROM vfs_nodes 
-                       WHERE user_id = ? AND parent_id = ?
-                       ORDER BY is_directory DESC, name ASC""",
-                    (user_id, parent_id)
+                    """SELECT seq, data FROM vfs_chunks 
+                       WHERE node_id = ? AND seq BETWEEN ? AND ? ORDER BY seq""",
+                    (node_id, first, (end - 1) // CHUNK_SIZE)
                 )
-            return [dict(row) for row in cursor.fetchall()]
+            rows = cursor.fetchall()
+            
+            if rows:
+                offset = rows[0]['seq'] * CHUNK_SIZE
+                text = "".join(row['data'] for row in rows)
+            else:
+                legacy = self._legacy_content(cursor, node_id)
+                if not legacy:
+                    return ""
+                offset = 0
+                text = legacy
+            
+            stop = None if end is None else end - offset
+            return text[start - offset:stop]
     
-    def update_vfs_node_content(self, node_id: int, content: str) -> bool:
-        """更新文件内容"""
-        with self.connection() as conn:
-            cursor = conn.cursor()
+    def iter_vfs_chunks(
+        self,
+        node_id: int,
+        reverse: bool = False,
+        batch: int = 16
+    ) -> Iterator[str]:
+        """
+        按块迭代文件内容
+        
+        每次只查询 batch 个块，迭代过程中不占用连接
+        """
+        # 键集分页: 记录上一批最后一个块的序号
+        last_seq = None
+        while True:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                if reverse:
+                    cursor.execute(
+                        """SELECT seq, data FROM vfs_chunks 
+                           WHERE node_id = ? AND seq < ? 
+                           ORDER BY seq DESC LIMIT ?""",
+                        (node_id, (1 << 62) if last_seq is None else last_seq, batch)
+                    )
+                else:
+                    cursor.execute(
+                        """SELECT seq, data FROM vfs_chunks 
+                           WHERE node_id = ? AND seq > ? 
+                           ORDER BY seq LIMIT ?""",
+                        (node_id, -1 if last_seq is None else last_seq, batch)
+                    )
+                rows = cursor.fetchall()
+                legacy = None
+                if not rows and last_seq is None:
+                    legacy = self._legacy_content(cursor, node_id)
+            
+            if legacy:
+                yield legacy
+            if not rows:
+                return
+            for row in rows:
+                yield row['data']
+            if len(rows) < batch:
+                return
+            last_seq = rows[-1]['seq']
+    
+    def _insert_chunks(
+        self,
+        cursor: sqlite3.Cursor,
+        node_id: int,
+        content: str,
+        start_seq: int
+    ) -> None:
+        """把内容切分为块写入"""
+        if not content:
+            return
+        cursor.executemany(
+            "INSERT INTO vfs_chunks (node_id, seq, data) VALUES (?, ?, ?)",
+            (
+                (node_id, start_seq + i, content[pos:pos + CHUNK_SIZE])
+                for i, pos in enumerate(range(0, len(content), CHUNK_SIZE))
+            )
+        )
+    
+    def _legacy_content(self, cursor: sqlite3.Cursor, node_id: int) -> str | None:
+        """读取旧存档中直接保存在 vfs_nodes.content 的内容"""
+        cursor.execute("SELECT content FROM vfs_nodes WHERE id = ?", (node_id,))
+        row = cursor.fetchone()
+        return row['content'] if row else None
+    
+    def _convert_legacy_content(self, cursor: sqlite3.Cursor, node_id: int) -> None:
+        """把旧存档的整块内容转换为分块存储"""
+        legacy = self._legacy_content(cursor, node_id)
+        if legacy:
             cursor.execute(
-                """UPDATE vfs_nodes 
-                   SET content = ?, updated_at = ? 
-                   WHERE id = ? AND is_directory = FALSE""",
-                (content, datetime.now(), node_id)
+                "UPDATE vfs_nodes SET content = NULL WHERE id = ?",
+                (node_id,)
             )
-            return cursor.rowcount > 0
+            self._insert_chunks(cursor, node_id, legacy, 0)
     
     def rename_vfs_node(self, node_id: int, new_name: str) -> bool:
         """重命名节点"""
         try:
             with self.connection() as conn:
                 cursor = conn.cursor()
+                self._journal(cursor, node_id)
                 cursor.execute(
                     """UPDATE vfs_nodes 
                        SET name = ?, updated_at = ? 
@@ -250,24 +880,252 @@ class Database:
         """删除节点（级联删除子节点）"""
         with self.connection() as conn:
             cursor = conn.cursor()
+            self._journal(cursor, node_id, content=True, subtree=True)
             cursor.execute(
                 "DELETE FROM vfs_nodes WHERE id = ?",
                 (node_id,)
             )
             return cursor.rowcount > 0
     
-    def get_user_root_nodes(self, user_id: int) -> list[dict[str, Any]]:
+    def get_user_root_nodes(self, user_id: int) -> list[VFSRow]:
         """获取用户的根目录节点"""
         return self.get_vfs_children(user_id, None)
+    
+    # ==================== 快照 ====================
+    # 写时复制: 拍快照只插入一行；之后每个节点第一次被修改 / 删除前，
+    # 把修改前的节点行 (内容改变时还有内容块) 记入最新快照的日志。
+    # 没有修改过的节点和内容由快照与当前文件系统共用。
+    
+    def _journal(
+        self,
+        cursor: sqlite3.Cursor,
+        node_id: int,
+        content: bool = False,
+        subtree: bool = False
+    ) -> None:
+        """
+        修改节点前记录原像 (节点所属用户没有快照时什么也不做)
+        
+        Args:
+            content: 是否会改变文件内容 (需要保存内容块)
+            subtree: 是否包括全部子孙节点 (删除目录)
+        """
+        cursor.execute(
+            """SELECT MAX(s.id) FROM vfs_snapshots s
+               JOIN vfs_nodes n ON n.user_id = s.user_id
+               WHERE n.id = ?""",
+            (node_id,)
+        )
+        head = cursor.fetchone()[0]
+        if head is None:
+            return
+        
+        nodes = _SUBTREE if subtree else "SELECT ?"
+        # 每个快照只记录节点第一次修改前的状态
+        cursor.execute(
+            f"""INSERT OR IGNORE INTO vfs_journal 
+                (snapshot_id, node_id, existed, parent_id, name, is_directory, 
+                 content, created_at, updated_at)
+                SELECT ?, id, TRUE, parent_id, name, is_directory, 
+                       content, created_at, updated_at
+                FROM vfs_nodes WHERE id IN ({nodes})""",
+            (head, node_id)
+        )
+        if not content:
+            return
+        cursor.execute(
+            f"""UPDATE vfs_journal SET content_saved = TRUE
+                WHERE snapshot_id = ? AND existed AND NOT content_saved 
+                  AND NOT is_directory AND node_id IN ({nodes})
+                RETURNING node_id""",
+            (head, node_id)
+        )
+        cursor.executemany(
+            """INSERT INTO vfs_journal_chunks (snapshot_id, node_id, seq, data)
+               SELECT ?, node_id, seq, data FROM vfs_chunks WHERE node_id = ?""",
+            [(head, row[0]) for row in cursor.fetchall()]
+        )
+    
+    def create_vfs_snapshot(self, user_id: int, name: str) -> int | None:
+        """
+        为用户的文件系统拍快照 (只插入一行，与文件数量无关)
+        
+        Returns:
+            快照ID，如果已存在同名快照则返回 None
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO vfs_snapshots (user_id, name, created_at) VALUES (?, ?, ?)",
+                    (user_id, name, datetime.now())
+                )
+                return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            return None
+    
+    def get_vfs_snapshots(self, user_id: int) -> list[dict[str, Any]]:
+        """
+        用户的快照，按时间排序
+        
+        changes 为快照之后到下一个快照之前修改过的节点数
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """SELECT s.id, s.name, s.created_at,
+                          (SELECT COUNT(*) FROM vfs_journal j 
+                           WHERE j.snapshot_id = s.id) AS changes
+                   FROM vfs_snapshots s WHERE s.user_id = ? ORDER BY s.id""",
+                (user_id,)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def restore_vfs_snapshot(self, user_id: int, snapshot_id: int) -> bool:
+        """
+        把用户的文件系统恢复到快照时的状态
+        
+        每个修改过的节点取该快照及之后最早的一份原像写回；快照之后创建的节点被删除。
+        恢复后该快照之后的快照一并删除 (当前状态与该快照相同)。
+        
+        Returns:
+            快照不存在时返回 False
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT 1 FROM vfs_snapshots WHERE id = ? AND user_id = ?",
+                (snapshot_id, user_id)
+            )
+            if cursor.fetchone() is None:
+                return False
+            # 被删除的目录与其子节点的插入顺序不定，外键检查推迟到提交时
+            cursor.execute("PRAGMA defer_foreign_keys = ON")
+            
+            later = "SELECT id FROM vfs_snapshots WHERE user_id = ? AND id >= ?"
+            cursor.execute("DROP TABLE IF EXISTS temp.restore_nodes")
+            cursor.execute("DROP TABLE IF EXISTS temp.restore_content")
+            cursor.execute(
+                f"""CREATE TEMP TABLE restore_nodes AS
+                    SELECT node_id, MIN(snapshot_id) AS snapshot_id FROM vfs_journal
+                    WHERE snapshot_id IN ({later}) GROUP BY node_id""",
+                (user_id, snapshot_id)
+            )
+            cursor.execute(
+                f"""CREATE TEMP TABLE restore_content AS
+                    SELECT node_id, MIN(snapshot_id) AS snapshot_id FROM vfs_journal
+                    WHERE snapshot_id IN ({later}) AND content_saved GROUP BY node_id""",
+                (user_id, snapshot_id)
+            )
+            preimages = """
+                SELECT j.* FROM restore_nodes r
+                JOIN vfs_journal j USING (snapshot_id, node_id)
+            """
+            
+            # 快照之后创建的节点 (子节点与内容块级联删除)
+            cursor.execute(
+                f"""DELETE FROM vfs_nodes WHERE id IN (
+                        SELECT node_id FROM ({preimages}) WHERE NOT existed
+                    )"""
+            )
+            # 先给改过名的节点换上临时名称，避免互换名称等情况下的唯一约束冲突
+            cursor.execute(
+                f"""UPDATE vfs_nodes SET name = char(0) || id
+                    FROM ({preimages}) AS p
+                    WHERE p.existed AND vfs_nodes.id = p.node_id
+                      AND (vfs_nodes.name IS NOT p.name 
+                           OR vfs_nodes.parent_id IS NOT p.parent_id)"""
+            )
+            # 重新插入被删除的节点
+            cursor.execute(
+                f"""INSERT INTO vfs_nodes 
+                    (id, user_id, parent_id, name, is_directory, created_at, updated_at)
+                    SELECT node_id, ?, parent_id, name, is_directory, created_at, updated_at
+                    FROM ({preimages})
+                    WHERE existed AND node_id NOT IN (SELECT id FROM vfs_nodes)""",
+                (user_id,)
+            )
+            cursor.execute(
+                f"""UPDATE vfs_nodes 
+                    SET parent_id = p.parent_id, name = p.name, 
+                        is_directory = p.is_directory, 
+                        created_at = p.created_at, updated_at = p.updated_at
+                    FROM ({preimages}) AS p
+                    WHERE p.existed AND vfs_nodes.id = p.node_id"""
+            )
+            
+            # 内容 (快照之后才创建的节点已被删除，不恢复其内容)
+            cursor.execute(
+                "DELETE FROM restore_content WHERE node_id NOT IN (SELECT id FROM vfs_nodes)"
+            )
+            cursor.execute(
+                "DELETE FROM vfs_chunks WHERE node_id IN (SELECT node_id FROM restore_content)"
+            )
+            cursor.execute(
+                """INSERT INTO vfs_chunks (node_id, seq, data)
+                   SELECT c.node_id, c.seq, c.data FROM restore_content r
+                   JOIN vfs_journal_chunks c USING (snapshot_id, node_id)"""
+            )
+            cursor.execute(
+                """UPDATE vfs_nodes SET content = p.content
+                   FROM (
+                       SELECT j.node_id, j.content FROM restore_content r
+                       JOIN vfs_journal j USING (snapshot_id, node_id)
+                   ) AS p
+                   WHERE vfs_nodes.id = p.node_id"""
+            )
+            
+            cursor.execute("DROP TABLE temp.restore_nodes")
+            cursor.execute("DROP TABLE temp.restore_content")
+            cursor.execute(
+                "DELETE FROM vfs_snapshots WHERE user_id = ? AND id > ?",
+                (user_id, snapshot_id)
+            )
+            cursor.execute("DELETE FROM vfs_journal WHERE snapshot_id = ?", (snapshot_id,))
+            cursor.execute("DELETE FROM vfs_journal_chunks WHERE snapshot_id = ?", (snapshot_id,))
+            return True
+    
+    def prune_vfs_snapshots(self, user_id: int, keep: int) -> int:
+        """
+        只保留最近的 keep 个快照
+        
+        较新的快照恢复时只用到自己及之后的日志，删除最旧的快照不影响其他快照
+        
+        Returns:
+            删除的快照数
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """DELETE FROM vfs_snapshots WHERE user_id = ? AND id NOT IN (
+                       SELECT id FROM vfs_snapshots WHERE user_id = ? 
+                       ORDER BY id DESC LIMIT ?
+                   )""",
+                (user_id, user_id, max(0, keep))
+            )
+            return cursor.rowcount
 
 
 # 全局数据库实例
 _db_instance: Database | None = None
 
 
-def get_database(db_path: str | Path = "save/game.db") -> Database:
-    """获取数据库单例"""
+def get_database(
+    db_path: str | Path = "save/game.db",
+    pool_size: int = 4,
+    shards: int | None = None
+) -> Database:
+    """
+    获取数据库单例
+    
+    Args:
+        shards: 按用户分片存储 (见 src.data.sharding)，0 表示每个用户一个分片；None 为单个存档文件
+    """
     global _db_instance
     if _db_instance is None:
-        _db_instance = Database(db_path)
+        if shards is None:
+            _db_instance = Database(db_path, pool_size=pool_size)
+        else:
+            from src.data.sharding import ShardedDatabase
+            _db_instance = ShardedDatabase(db_path, shards, pool_size=pool_size)
     return _db_instance
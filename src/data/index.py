@@ -0,0 +1,199 @@
+"""
+静态数据交叉引用索引
+把敌人 -> 技能、敌人 -> 掉落物品的字符串引用解析为整数句柄和对象引用，
+并预先构建反向索引 (哪些敌人掉落某物品、按时代 / 稀有度 / 类型分组的物品)
+
+构建时检查全部引用，存在悬空 id 时立即失败
+
+用法 (完整性检查):
+    python -m src.data.index
+"""
+import sys
+from dataclasses import dataclass, field
+
+from src.data.loader import GameData, GameDataError, Registry, get_game_data
+from src.data.models import EnemyModel, ItemModel, SkillModel
+
+
+@dataclass(frozen=True, slots=True)
+class ResolvedDrop:
+    """解析后的掉落信息"""
+    item: int  # 物品句柄
+    chance: float
+    count_min: int
+    count_max: int
+
+
+@dataclass(slots=True)
+class GameIndex:
+    """
+    交叉引用索引
+    
+    句柄就是记录在 items / enemies / skills 列表中的下标，
+    战斗、掉落等热路径只使用整数句柄，不再做字符串查找
+    """
+    items: list[ItemModel]
+    enemies: list[EnemyModel]
+    skills: list[SkillModel]
+    item_handles: dict[str, int]
+    enemy_handles: dict[str, int]
+    skill_handles: dict[str, int]
+    # 敌人句柄 -> 技能句柄 / 掉落
+    enemy_skills: list[tuple[int, ...]]
+    enemy_drops: list[tuple[ResolvedDrop, ...]]
+    # 反向索引
+    dropped_by: dict[int, tuple[int, ...]] = field(default_factory=dict)
+    items_by_era: dict[str, tuple[int, ...]] = field(default_factory=dict)
+    items_by_rarity: dict[str, tuple[int, ...]] = field(default_factory=dict)
+    items_by_type: dict[str, tuple[int, ...]] = field(default_factory=dict)
+    
+    # ==================== 查询 ====================
+    
+    def item(self, item_id: str) -> int:
+        """物品 id -> 句柄"""
+        return self.item_handles[item_id]
+    
+    def enemy(self, enemy_id: str) -> int:
+        """敌人 id -> 句柄"""
+        return self.enemy_handles[enemy_id]
+    
+    def skill(self, skill_id: str) -> int:
+        """技能 id -> 句柄"""
+        return self.skill_handles[skill_id]
+    
+    def skills_of(self, enemy: int) -> list[SkillModel]:
+        """敌人的技能"""
+        return [self.skills[handle] for handle in self.enemy_skills[enemy]]
+    
+    def drops_of(self, enemy: int) -> tuple[ResolvedDrop, ...]:
+        """敌人的掉落表"""
+        return self.enemy_drops[enemy]
+    
+    def enemies_dropping(self, item: int) -> list[EnemyModel]:
+        """掉落指定物品的敌人"""
+        return [self.enemies[handle] for handle in self.dropped_by.get(item, ())]
+    
+    def items_with(
+        self,
+        era: str | None = None,
+        rarity: str | None = None,
+        type: str | None = None
+    ) -> list[ItemModel]:
+        """按时代 / 稀有度 / 类型筛选物品 (条件之间为 AND)"""
+        groups = [
+            group.get(key, ())
+            for group, key in (
+                (self.items_by_era, era),
+                (self.items_by_rarity, rarity),
+                (self.items_by_type, type),
+            )
+            if key is not None
+        ]
+        if not groups:
+            return list(self.items)
+        # 从最小的分组开始求交集
+        groups.sort(key=len)
+        handles = groups[0]
+        for other in groups[1:]:
+            members = set(other)
+            handles = [handle for handle in handles if handle in members]
+        return [self.items[handle] for handle in handles]
+
+
+def _handles(registry: Registry) -> dict[str, int]:
+    return {record_id: handle for handle, record_id in enumerate(registry.ids())}
+
+
+def _group(items: list[ItemModel], attr: str) -> dict[str, tuple[int, ...]]:
+    groups: dict[str, list[int]] = {}
+    for handle, item in enumerate(items):
+        groups.setdefault(getattr(item, attr), []).append(handle)
+    return {key: tuple(handles) for key, handles in groups.items()}
+
+
+def build_index(data: GameData) -> GameIndex:
+    """
+    解析全部引用并构建索引
+    
+    Raises:
+        GameDataError: 存在悬空引用 (列出全部问题)
+    """
+    items, enemies, skills = list(data.items), list(data.enemies), list(data.skills)
+    item_handles = _handles(data.items)
+    skill_handles = _handles(data.skills)
+    
+    errors = []
+    enemy_skills = []
+    enemy_drops = []
+    dropped_by: dict[int, list[int]] = {}
+    for handle, enemy in enumerate(enemies):
+        resolved_skills = []
+        for skill_id in enemy.skills:
+            if skill_id not in skill_handles:
+                errors.append(f"敌人 '{enemy.id}' 引用了不存在的技能 '{skill_id}'")
+                continue
+            resolved_skills.append(skill_handles[skill_id])
+        
+        resolved_drops = []
+        for drop in enemy.drops:
+            if drop.item_id not in item_handles:
+                errors.append(f"敌人 '{enemy.id}' 掉落不存在的物品 '{drop.item_id}'")
+                continue
+            item = item_handles[drop.item_id]
+            resolved_drops.append(
+                ResolvedDrop(item, drop.chance, drop.count_min, drop.count_max)
+            )
+            owners = dropped_by.setdefault(item, [])
+            if not owners or owners[-1] != handle:
+                owners.append(handle)
+        
+        enemy_skills.append(tuple(resolved_skills))
+        enemy_drops.append(tuple(resolved_drops))
+    
+    if errors:
+        raise GameDataError("静态数据存在悬空引用:\n" + "\n".join(errors))
+    
+    return GameIndex(
+        items=items,
+        enemies=enemies,
+        skills=skills,
+        item_handles=item_handles,
+        enemy_handles=_handles(data.enemies),
+        skill_handles=skill_handles,
+        enemy_skills=enemy_skills,
+        enemy_drops=enemy_drops,
+        dropped_by={item: tuple(owners) for item, owners in dropped_by.items()},
+        items_by_era=_group(items, "era"),
+        items_by_rarity=_group(items, "rarity"),
+        items_by_type=_group(items, "type"),
+    )
+
+
+# 全局索引实例
+_game_index: GameIndex | None = None
+
+
+def get_game_index() -> GameIndex:
+    """获取交叉引用索引单例 (首次调用时加载数据并构建)"""
+    global _game_index
+    if _game_index is None:
+        _game_index = build_index(get_game_data())
+    return _game_index
+
+
+def main() -> int:
+    """完整性检查入口"""
+    try:
+        index = get_game_index()
+    except GameDataError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(
+        f"静态数据完整: {len(index.items)} 个物品, "
+        f"{len(index.enemies)} 个敌人, {len(index.skills)} 个技能"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
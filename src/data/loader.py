@@ -0,0 +1,133 @@
+"""
+静态游戏数据加载器
+从 assets/data/*.json 加载物品、敌人、技能定义
+
+每个数据文件整体交给预编译的 TypeAdapter 一次性解析校验 (不逐条调用 model_validate)，
+解析和建模都在 pydantic-core 中完成
+
+注: 不缓存校验结果。实测 (1 万条记录) 从 marshal / pickle 缓存重建模型，
+无论重新校验、model_construct 还是直接设置实例状态，都不比整体校验源文件快
+"""
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Generic, Iterator, TypeVar
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from src.data.models import EnemyModel, ItemModel, SkillModel
+
+
+DATA_DIR = Path("assets/data")
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class GameDataError(ValueError):
+    """游戏数据文件格式错误"""
+
+
+class Registry(Generic[T]):
+    """按 id 索引的只读注册表，O(1) 查找"""
+    
+    def __init__(self, records: list[T]):
+        self._records = records
+        self._by_id: dict[str, T] = {record.id: record for record in records}
+    
+    def get(self, record_id: str) -> T | None:
+        """按 id 查找，不存在时返回 None"""
+        return self._by_id.get(record_id)
+    
+    def __getitem__(self, record_id: str) -> T:
+        return self._by_id[record_id]
+    
+    def __contains__(self, record_id: object) -> bool:
+        return record_id in self._by_id
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._records)
+    
+    def ids(self) -> list[str]:
+        """全部 id (按文件中的顺序)"""
+        return [record.id for record in self._records]
+
+
+@dataclass
+class GameData:
+    """全部静态游戏数据"""
+    items: Registry[ItemModel]
+    enemies: Registry[EnemyModel]
+    skills: Registry[SkillModel]
+
+
+# 数据文件 -> 模型
+SOURCES: dict[str, tuple[str, type[BaseModel]]] = {
+    "items": ("items.json", ItemModel),
+    "enemies": ("enemies.json", EnemyModel),
+    "skills": ("skills.json", SkillModel),
+}
+
+
+@cache
+def _adapter(model: type[T]) -> TypeAdapter[list[T]]:
+    """数组校验器 (每个模型只编译一次)"""
+    return TypeAdapter(list[model])
+
+
+def _validate(path: Path, model: type[T], raw: bytes) -> list[T]:
+    """用 Pydantic 解析并校验整个 JSON 文件"""
+    try:
+        records = _adapter(model).validate_json(raw)
+    except ValidationError as e:
+        raise GameDataError(f"{path}: {e}") from e
+    
+    seen: set[str] = set()
+    for index, record in enumerate(records):
+        if record.id in seen:
+            raise GameDataError(f"{path}[{index}]: 重复的 id '{record.id}'")
+        seen.add(record.id)
+    return records
+
+
+def _from_cache(model: type[T], rows: list[dict]) -> list[T]:
+    """从缓存的规范化数据重建模型"""
+    return _adapter(model).validate_python(rows)
+
+
+def _load_source(path: Path, model: type[T]) -> list[T]:
+    """加载单个数据文件，不存在时为空"""
+    if not path.exists():
+        return []
+    return _validate(path, model, path.read_bytes())
+
+
+def load_game_data(data_dir: str | Path = DATA_DIR) -> GameData:
+    """
+    加载全部静态游戏数据
+    
+    Args:
+        data_dir: JSON 数据目录
+    
+    Raises:
+        GameDataError: 数据文件格式错误
+    """
+    data_dir = Path(data_dir)
+    return GameData(**{
+        key: Registry(_load_source(data_dir / filename, model))
+        for key, (filename, model) in SOURCES.items()
+    })
+
+
+# 全局游戏数据实例
+_game_data: GameData | None = None
+
+
+def get_game_data() -> GameData:
+    """获取游戏数据单例 (首次调用时加载)"""
+    global _game_data
+    if _game_data is None:
+        _game_data = load_game_data()
+    return _game_data
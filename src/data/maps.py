@@ -0,0 +1,299 @@
+"""
+地图加载
+assets/maps/*.txt 只解析一次: 地形按 CHUNK x CHUNK 的区块顺序存为字节数组，
+二进制形式缓存在 save/cache/maps/；之后通过 mmap 打开缓存，
+只有视口附近用到的区块才会被读入内存
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from src.data.models import MapInfo
+
+
+MAPS_DIR = Path("assets/maps")
+CACHE_DIR = Path("save/cache/maps")
+
+# 区块边长 (格)
+CHUNK = 64
+
+# 地形字符
+WALL = ord("#")
+FLOOR = ord(".")
+DOOR = ord("+")       # 关闭的门
+OPEN_DOOR = ord("'")  # 打开的门
+LIQUID = ord("~")
+VOID = ord(" ")       # 地图外 / 空白
+
+# 地形属性表 (按字节值索引，可直接用于 bytes.translate)
+BLOCKS_MOVE = bytes(1 if b in (WALL, DOOR, LIQUID, VOID) else 0 for b in range(256))
+BLOCKS_SIGHT = bytes(1 if b in (WALL, DOOR, VOID) else 0 for b in range(256))
+
+# 缓存文件头: 魔数、格式版本、区块边长、宽、高、源文件大小、源文件修改时间、源文件 SHA-256
+_HEADER = struct.Struct("<8sHHIIQq32s")
+_MAGIC = b"UJNMAP\0\0"
+_VERSION = 1
+
+
+class GameMap:
+    """
+    地形网格
+    
+    - tile / set_tile 按坐标读写地形，超出地图范围视为 VOID
+    - 每次修改地形 version 加一，寻路等缓存据此失效
+    - 从缓存打开时区块按需读入，retain() 释放视口外未修改的区块
+    """
+    
+    def __init__(
+        self,
+        map_id: str,
+        width: int,
+        height: int,
+        chunks: dict[int, bytearray] | None = None,
+        source: mmap.mmap | None = None,
+        offset: int = 0
+    ):
+        self.id = map_id
+        self.width = width
+        self.height = height
+        self.chunks_x = -(-width // CHUNK)
+        self.chunks_y = -(-height // CHUNK)
+        self.version = 0
+        self._chunks: dict[int, bytearray] = chunks if chunks is not None else {}
+        self._modified: set[int] = set()
+        self._source = source
+        self._offset = offset
+    
+    @classmethod
+    def from_rows(cls, map_id: str, rows: list[bytes], width: int, height: int) -> "GameMap":
+        """由逐行的地形字节构建 (全部区块在内存中)"""
+        game_map = cls(map_id, width, height)
+        for key, chunk in enumerate(_iter_chunks(rows, game_map.chunks_x, game_map.chunks_y)):
+            game_map._chunks[key] = chunk
+        return game_map
+    
+    # ==================== 区块 ====================
+    
+    def chunk(self, cx: int, cy: int) -> bytearray:
+        """获取区块 (未加载时从缓存读入)"""
+        key = cy * self.chunks_x + cx
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            start = self._offset + key * CHUNK * CHUNK
+            chunk = bytearray(self._source[start:start + CHUNK * CHUNK])
+            self._chunks[key] = chunk
+        return chunk
+    
+    @property
+    def loaded_chunks(self) -> int:
+        """当前在内存中的区块数"""
+        return len(self._chunks)
+    
+    def retain(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        """
+        只保留与矩形 [x0, x1) x [y0, y1) 相交的区块
+        
+        被修改过的区块和不是从缓存打开的地图不会被释放
+        """
+        if self._source is None:
+            return
+        cx0, cy0 = max(x0, 0) // CHUNK, max(y0, 0) // CHUNK
+        cx1, cy1 = (max(x1, 1) - 1) // CHUNK, (max(y1, 1) - 1) // CHUNK
+        for key in list(self._chunks):
+            if key in self._modified:
+                continue
+            cy, cx = divmod(key, self.chunks_x)
+            if not (cx0 <= cx <= cx1 and cy0 <= cy <= cy1):
+                del self._chunks[key]
+    
+    # ==================== 地形 ====================
+    
+    def tile(self, x: int, y: int) -> int:
+        """读取一格地形"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return VOID
+        cy, ty = divmod(y, CHUNK)
+        cx, tx = divmod(x, CHUNK)
+        return self.chunk(cx, cy)[ty * CHUNK + tx]
+    
+    def set_tile(self, x: int, y: int, value: int) -> None:
+        """修改一格地形 (如开关门)"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return
+        cy, ty = divmod(y, CHUNK)
+        cx, tx = divmod(x, CHUNK)
+        chunk = self.chunk(cx, cy)
+        if chunk[ty * CHUNK + tx] == value:
+            return
+        chunk[ty * CHUNK + tx] = value
+        self._modified.add(cy * self.chunks_x + cx)
+        self.version += 1
+    
+    def passable(self, x: int, y: int) -> bool:
+        """该格是否可以通行"""
+        return not BLOCKS_MOVE[self.tile(x, y)]
+    
+    def row(self, y: int, x0: int, x1: int) -> bytes:
+        """读取第 y 行 [x0, x1) 的地形，超出范围的部分以 VOID 填充"""
+        if not (0 <= y < self.height) or x1 <= 0 or x0 >= self.width:
+            return bytes([VOID]) * max(x1 - x0, 0)
+        cy, ty = divmod(y, CHUNK)
+        start, end = max(x0, 0), min(x1, self.width)
+        parts = [bytes([VOID]) * (start - x0)]
+        x = start
+        while x < end:
+            cx, tx = divmod(x, CHUNK)
+            take = min(CHUNK - tx, end - x)
+            base = ty * CHUNK + tx
+            parts.append(self.chunk(cx, cy)[base:base + take])
+            x += take
+        parts.append(bytes([VOID]) * (x1 - end))
+        return b"".join(parts)
+    
+    def close(self) -> None:
+        """关闭缓存文件映射 (先把全部区块读入内存)"""
+        if self._source is None:
+            return
+        for cy in range(self.chunks_y):
+            for cx in range(self.chunks_x):
+                self.chunk(cx, cy)
+        self._source.close()
+        self._source = None
+
+
+# ==================== 解析与缓存 ====================
+
+def _iter_chunks(rows: list[bytes], chunks_x: int, chunks_y: int):
+    """按区块顺序切分逐行地形，不足的部分以 VOID 填充"""
+    blank = bytes([VOID]) * CHUNK
+    for cy in range(chunks_y):
+        band = rows[cy * CHUNK:(cy + 1) * CHUNK]
+        band += [b""] * (CHUNK - len(band))
+        for cx in range(chunks_x):
+            chunk = bytearray()
+            for row in band:
+                part = row[cx * CHUNK:(cx + 1) * CHUNK]
+                chunk += part + blank[len(part):]
+            yield chunk
+
+
+def parse_map(
+    text: str,
+    map_id: str,
+    width: int | None = None,
+    height: int | None = None
+) -> GameMap:
+    """解析文本地图；未给出尺寸时取最长行与行数"""
+    lines = text.splitlines()
+    width = width or max((len(line) for line in lines), default=0)
+    height = height or len(lines)
+    rows = [
+        line[:width].encode("ascii", errors="replace").ljust(width, b" ")
+        for line in lines[:height]
+    ]
+    rows += [b" " * width] * (height - len(rows))
+    return GameMap.from_rows(map_id, rows, width, height)
+
+
+def _write_cache(cache_path: Path, game_map: GameMap, stat: os.stat_result, digest: bytes) -> None:
+    """原子写入二进制缓存"""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(_HEADER.pack(
+            _MAGIC, _VERSION, CHUNK, game_map.width, game_map.height,
+            stat.st_size, stat.st_mtime_ns, digest
+        ))
+        for key in range(game_map.chunks_x * game_map.chunks_y):
+            f.write(game_map._chunks[key])
+    os.replace(tmp_path, cache_path)
+
+
+def _open_cache(
+    cache_path: Path,
+    map_id: str,
+    stat: os.stat_result,
+    source_path: Path,
+    expected: tuple[int | None, int | None]
+) -> GameMap | None:
+    """打开有效的缓存，无效时返回 None"""
+    try:
+        f = cache_path.open("rb")
+    except OSError:
+        return None
+    with f:
+        try:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+    try:
+        magic, version, chunk, width, height, size, mtime_ns, digest = _HEADER.unpack_from(source)
+    except struct.error:
+        source.close()
+        return None
+    
+    valid = (
+        magic == _MAGIC and version == _VERSION and chunk == CHUNK
+        and expected[0] in (None, width) and expected[1] in (None, height)
+    )
+    if valid and not (size == stat.st_size and mtime_ns == stat.st_mtime_ns):
+        # 文件被 touch 过: 比较内容
+        valid = hashlib.sha256(source_path.read_bytes()).digest() == digest
+    chunks_x, chunks_y = -(-width // CHUNK), -(-height // CHUNK)
+    if not valid or len(source) != _HEADER.size + chunks_x * chunks_y * CHUNK * CHUNK:
+        source.close()
+        return None
+    return GameMap(map_id, width, height, source=source, offset=_HEADER.size)
+
+
+def load_map_file(
+    path: str | Path,
+    map_id: str | None = None,
+    width: int | None = None,
+    height: int | None = None,
+    cache_dir: str | Path | None = CACHE_DIR
+) -> GameMap:
+    """
+    加载文本地图，优先使用二进制缓存
+    
+    Args:
+        path: 地图文件
+        map_id: 地图 id，默认取文件名
+        width / height: 地图尺寸，默认由文件内容决定
+        cache_dir: 缓存目录，None 表示不使用缓存
+    """
+    path = Path(path)
+    map_id = map_id or path.stem
+    stat = path.stat()
+    cache_path = Path(cache_dir) / f"{map_id}.map" if cache_dir is not None else None
+    
+    if cache_path is not None:
+        cached = _open_cache(cache_path, map_id, stat, path, (width, height))
+        if cached is not None:
+            return cached
+    
+    raw = path.read_bytes()
+    game_map = parse_map(raw.decode("utf-8"), map_id, width, height)
+    if cache_path is not None:
+        _write_cache(cache_path, game_map, stat, hashlib.sha256(raw).digest())
+    return game_map
+
+
+def load_manifest(maps_dir: str | Path = MAPS_DIR) -> dict[str, MapInfo]:
+    """读取地图元数据"""
+    path = Path(maps_dir) / "map_manifest.json"
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    return {map_id: MapInfo.model_validate(info) for map_id, info in raw.items()}
+
+
+def load_map(
+    map_id: str,
+    maps_dir: str | Path = MAPS_DIR,
+    cache_dir: str | Path | None = CACHE_DIR
+) -> GameMap:
+    """按 id 加载 manifest 中登记的地图"""
+    info = load_manifest(maps_dir)[map_id]
+    return load_map_file(Path(maps_dir) / info.file, map_id, info.width, info.height, cache_dir)
@@ -0,0 +1,433 @@
+"""
+存档表结构迁移
+表结构版本记录在 PRAGMA user_version 中，按版本号依次执行尚未应用的迁移
+
+- 表结构迁移 (DDL) 在一个事务中完成，打开数据库时同步执行
+- 数据迁移按批次执行，每批一个短事务，可以放到后台线程里运行，
+  中途退出后下次启动从剩余的数据继续
+
+用法:
+    python -m src.data.migrations --db save/game.db
+"""
+import argparse
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from src.data.database import Database
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    """
+    一次迁移
+    
+    statements: 依次执行的 DDL (必须可以重复执行)
+    batch: (连接, 批大小) -> 本批处理的行数；返回 0 表示数据已全部迁移
+    remaining: 连接 -> 尚待迁移的行数 (用于进度)
+    """
+    version: int
+    description: str
+    statements: tuple[str, ...] = ()
+    batch: Callable[[sqlite3.Connection, int], int] | None = None
+    remaining: Callable[[sqlite3.Connection], int] | None = None
+
+
+@dataclass(slots=True)
+class MigrationProgress:
+    """迁移进度"""
+    version: int
+    description: str
+    done: int = 0
+    total: int = 0
+    finished: bool = False
+    
+    def __str__(self) -> str:
+        if self.total:
+            return f"v{self.version} {self.description}: {self.done}/{self.total} ({self.done / self.total:.0%})"
+        return f"v{self.version} {self.description}: {'完成' if self.finished else '进行中'}"
+
+
+# ==================== 迁移定义 ====================
+
+def convert_legacy_content(conn: sqlite3.Connection, limit: int) -> int:
+    """
+    把旧存档保存在 vfs_nodes.content 中的文件内容转换为分块存储
+    
+    Returns:
+        本批转换的节点数
+    """
+    from src.data.database import CHUNK_SIZE
+    
+    # 第一条语句就是写操作 (RETURNING 返回的是更新后的值，所以先原样写回)，
+    # 事务开始时即取得写锁，不会与会话的写入产生快照冲突
+    rows = conn.execute(
+        """UPDATE vfs_nodes SET content = content
+           WHERE id IN (
+               SELECT id FROM vfs_nodes WHERE content IS NOT NULL LIMIT ?
+           )
+           RETURNING id, content""",
+        (limit,)
+    ).fetchall()
+    conn.executemany(
+        "UPDATE vfs_nodes SET content = NULL WHERE id = ?",
+        [(node_id,) for node_id, _ in rows]
+    )
+    for node_id, content in rows:
+        if not content:
+            continue
+        # 追加到已有分块之后 (正常情况下没有)
+        start = conn.execute(
+            "SELECT COALESCE(MAX(seq) + 1, 0) FROM vfs_chunks WHERE node_id = ?",
+            (node_id,)
+        ).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO vfs_chunks (node_id, seq, data) VALUES (?, ?, ?)",
+            [
+                (node_id, start + i, content[pos:pos + CHUNK_SIZE])
+                for i, pos in enumerate(range(0, len(content), CHUNK_SIZE))
+            ]
+        )
+    return len(rows)
+
+
+def _count_legacy_content(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COUNT(*) FROM vfs_nodes WHERE content IS NOT NULL").fetchone()[0]
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "用户与虚拟文件系统",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_login TIMESTAMP,
+                current_path TEXT DEFAULT '/'
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS vfs_nodes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                parent_id INTEGER,
+                name TEXT NOT NULL,
+                is_directory BOOLEAN DEFAULT FALSE,
+                content TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                FOREIGN KEY (parent_id) REFERENCES vfs_nodes(id) ON DELETE CASCADE,
+                UNIQUE(user_id, parent_id, name)
+            )
+            """,
+            # 文件内容分块表
+            # vfs_nodes.content 仅保留给旧存档，新内容全部存放在这里
+            """
+            CREATE TABLE IF NOT EXISTS vfs_chunks (
+                node_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (node_id, seq),
+                FOREIGN KEY (node_id) REFERENCES vfs_nodes(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_vfs_user_parent
+            ON vfs_nodes(user_id, parent_id)
+            """,
+            # 目录列表的排序 / 键集分页索引
+            """
+            CREATE INDEX IF NOT EXISTS idx_vfs_children
+            ON vfs_nodes(user_id, parent_id, is_directory DESC, name)
+            """,
+        ),
+    ),
+    Migration(
+        2,
+        "玩家状态与背包",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS player_state (
+                user_id INTEGER PRIMARY KEY,
+                level INTEGER NOT NULL DEFAULT 1,
+                current_hp INTEGER,
+                current_ep INTEGER,
+                map_id TEXT,
+                pos_x INTEGER NOT NULL DEFAULT 0,
+                pos_y INTEGER NOT NULL DEFAULT 0,
+                play_time INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS inventory (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                item_id TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 1,
+                is_equipped BOOLEAN NOT NULL DEFAULT FALSE,
+                slot TEXT,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_inventory_user
+            ON inventory(user_id, item_id)
+            """,
+        ),
+    ),
+    Migration(
+        3,
+        "旧存档文件内容转为分块存储",
+        batch=convert_legacy_content,
+        remaining=_count_legacy_content,
+    ),
+    Migration(
+        4,
+        "文件系统快照",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS vfs_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                UNIQUE(user_id, name)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS idx_snapshots_user
+            ON vfs_snapshots(user_id, id)
+            """,
+            # 外键按 parent_id 查找子节点 (级联删除、恢复时重新插入目录)
+            """
+            CREATE INDEX IF NOT EXISTS idx_vfs_parent
+            ON vfs_nodes(parent_id)
+            """,
+            # 快照之后每个节点第一次被修改前的原像；existed = FALSE 表示快照之后才创建
+            """
+            CREATE TABLE IF NOT EXISTS vfs_journal (
+                snapshot_id INTEGER NOT NULL,
+                node_id INTEGER NOT NULL,
+                existed BOOLEAN NOT NULL,
+                parent_id INTEGER,
+                name TEXT,
+                is_directory BOOLEAN,
+                content TEXT,
+                created_at TIMESTAMP,
+                updated_at TIMESTAMP,
+                content_saved BOOLEAN NOT NULL DEFAULT FALSE,
+                PRIMARY KEY (snapshot_id, node_id),
+                FOREIGN KEY (snapshot_id) REFERENCES vfs_snapshots(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+            """,
+            # 内容第一次改变前的分块
+            """
+            CREATE TABLE IF NOT EXISTS vfs_journal_chunks (
+                snapshot_id INTEGER NOT NULL,
+                node_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (snapshot_id, node_id, seq),
+                FOREIGN KEY (snapshot_id) REFERENCES vfs_snapshots(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+            """,
+        ),
+    ),
+    Migration(
+        5,
+        "存档设置",
+        (
+            # 键值对，如分片存储方式
+            """
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+            """,
+        ),
+    ),
+)
+
+# 最新的表结构版本
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ==================== 执行 ====================
+
+class Migrator:
+    """
+    迁移执行器
+    
+    用法:
+        migrator = Migrator(db, on_progress=print)
+        migrator.run()          # 同步执行全部迁移
+        migrator.start()        # 或在后台线程执行
+    """
+    
+    def __init__(
+        self,
+        db: "Database",
+        migrations: tuple[Migration, ...] = MIGRATIONS,
+        batch_size: int = 500,
+        pause: float = 0.0,
+        on_progress: Callable[[MigrationProgress], None] | None = None
+    ):
+        """
+        Args:
+            db: 数据库
+            migrations: 按版本号排序的迁移
+            batch_size: 数据迁移每批处理的行数
+            pause: 两批之间的间隔 (秒)，给其他会话的写入让出数据库
+            on_progress: 进度回调，每批之后调用一次
+        """
+        self.db = db
+        self.migrations = migrations
+        self.batch_size = max(1, batch_size)
+        self.pause = pause
+        self.on_progress = on_progress
+        self.progress: MigrationProgress | None = None
+        self.error: BaseException | None = None
+        self._thread: threading.Thread | None = None
+    
+    def current_version(self) -> int:
+        with self.db.connection() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    def pending(self) -> list[Migration]:
+        """尚未应用的迁移"""
+        version = self.current_version()
+        return [m for m in self.migrations if m.version > version]
+    
+    def run(self, schema_only: bool = False) -> int:
+        """
+        依次执行尚未应用的迁移
+        
+        Args:
+            schema_only: 打开数据库时使用，数据迁移留给后台；
+                之后的迁移只执行 DDL (都是 IF NOT EXISTS，可重复执行)，
+                版本号等后台迁移完成时再更新
+        
+        Returns:
+            执行后的表结构版本
+        """
+        deferred = False
+        for migration in self.pending():
+            if schema_only and not deferred and migration.batch is not None:
+                deferred = self._has_work(migration)
+            if deferred:
+                with self.db.connection() as conn:
+                    for statement in migration.statements:
+                        conn.execute(statement)
+                continue
+            self._apply(migration)
+        return self.current_version()
+    
+    def _has_work(self, migration: Migration) -> bool:
+        """数据迁移是否有需要处理的行 (新存档没有，可以直接应用)"""
+        if migration.remaining is None:
+            return True
+        with self.db.connection() as conn:
+            return migration.remaining(conn) > 0
+    
+    def _apply(self, migration: Migration) -> None:
+        progress = self.progress = MigrationProgress(migration.version, migration.description)
+        
+        if migration.batch is None:
+            with self.db.connection() as conn:
+                for statement in migration.statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+        else:
+            with self.db.connection() as conn:
+                for statement in migration.statements:
+                    conn.execute(statement)
+                if migration.remaining is not None:
+                    progress.total = migration.remaining(conn)
+            while True:
+                # 每批一个事务，批与批之间其他会话可以正常读写
+                with self.db.connection() as conn:
+                    count = migration.batch(conn, self.batch_size)
+                    if count == 0:
+                        conn.execute(f"PRAGMA user_version = {migration.version}")
+                if count == 0:
+                    break
+                progress.done += count
+                self._report()
+                if self.pause:
+                    time.sleep(self.pause)
+        
+        progress.finished = True
+        progress.done = max(progress.done, progress.total)
+        self._report()
+    
+    def _report(self) -> None:
+        if self.on_progress is not None and self.progress is not None:
+            self.on_progress(self.progress)
+    
+    # ==================== 后台执行 ====================
+    
+    def start(self) -> threading.Thread:
+        """在后台线程执行全部迁移；出错时记录在 error 中"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run_background, name="db-migrate", daemon=True)
+            self._thread.start()
+        return self._thread
+    
+    def _run_background(self) -> None:
+        try:
+            self.run()
+        except BaseException as e:
+            self.error = e
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def wait(self, timeout: float | None = None) -> bool:
+        """等待后台迁移结束，返回是否已结束"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.running
+
+
+def migrate_in_background(db: "Database", **kwargs) -> Migrator | None:
+    """有待执行的迁移时在后台启动，否则返回 None"""
+    migrator = Migrator(db, **kwargs)
+    if not migrator.pending():
+        return None
+    migrator.start()
+    return migrator
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="存档表结构迁移")
+    parser.add_argument("--db", default="save/game.db", help="存档数据库路径")
+    parser.add_argument("--batch", type=int, default=500, help="数据迁移每批处理的行数")
+    args = parser.parse_args()
+    
+    from src.data.database import Database
+    
+    # 打开 Database 时会先同步执行表结构迁移，所以原版本要直接读取
+    conn = sqlite3.connect(args.db)
+    before = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    
+    db = Database(args.db)
+    migrator = Migrator(db, batch_size=args.batch, on_progress=print)
+    after = migrator.run()
+    print(f"表结构版本: {before} -> {after}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -55,7 +55,7 @@ class Stats(BaseModel):
     def_: int = Field(default=0, alias="def")
     spd: int = 0
     fcs: int = 0  # 专注值
-
+    
     class Config:
         populate_by_name = True
 
@@ -128,3 +128,13 @@ class SkillModel(BaseModel):
     target: str = "single_enemy"
     description: str = ""
     effect: SkillEffect
+
+
+class MapInfo(BaseModel):
+    """地图元数据 (map_manifest.json 中的一项)"""
+    name: str
+    file: str
+    width: int
+    height: int
+    era: str = "universal"
+    music: Optional[str] = None
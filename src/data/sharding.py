@@ -0,0 +1,501 @@
+"""
+按用户分片存储
+用户表 (目录) 保存在主存档中，每个用户的文件系统 (节点、内容块、快照) 保存在分片文件里:
+- shards=N: 按 user_id % N 分到 N 个分片 (save/shards/shard_003.db)
+- shards=0: 每个用户一个分片 (save/shards/user_42.db)
+
+不同分片的写入互不阻塞。每个分片的节点 ID 从 分片号 << SHARD_BITS 开始分配，
+节点 ID 全局唯一且能直接算出所在分片，只带节点 ID 的方法也能路由。
+分片按需打开，同时打开的分片超过 max_open 个时关闭最久未使用的。
+
+用法:
+    python -m src.data.sharding --db save/game.db --shards 8 stats
+    python -m src.data.sharding --db save/game.db --shards 8 locate alice
+    python -m src.data.sharding --db save/game.db --shards 8 migrate
+"""
+import argparse
+import functools
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Callable, Generator
+
+from src.data.database import Database
+from src.data.migrations import Migrator, convert_legacy_content
+from src.data.write_buffer import BufferedDatabase
+
+
+# 节点 ID 的低位宽度，高位为分片号
+SHARD_BITS = 40
+# 每个分片的连接池大小
+SHARD_POOL_SIZE = 2
+
+# 第一个参数为 user_id 的方法，路由到该用户所在分片
+USER_METHODS = (
+    "create_vfs_node",
+    "get_vfs_node_by_path",
+    "get_vfs_children",
+    "get_vfs_child_names",
+    "iter_vfs_children",
+    "iter_vfs_subtree",
+    "get_user_root_nodes",
+    "create_vfs_snapshot",
+    "get_vfs_snapshots",
+    "restore_vfs_snapshot",
+    "prune_vfs_snapshots",
+)
+# 第一个参数为 node_id 的方法，路由到节点所在分片
+NODE_METHODS = (
+    "get_vfs_node",
+    "update_vfs_node_content",
+    "append_vfs_node_content",
+    "get_vfs_content_size",
+    "read_vfs_content",
+    "iter_vfs_chunks",
+    "rename_vfs_node",
+    "delete_vfs_node",
+)
+# 由主存档处理的方法
+CATALOG_METHODS = (
+    "create_user",
+    "login_user",
+    "get_user_by_username",
+    "get_user_by_id",
+    "update_user_login",
+    "update_user_path",
+)
+
+_SHARD_FILE = re.compile(r"^(shard|user)_(\d+)\.db$")
+
+
+class ShardedDatabase:
+    """
+    分片存储的数据库
+    
+    与 Database 接口相同，可以直接交给 VirtualFileSystem / AuthSystem / AsyncDatabase 使用
+    """
+    
+    WRITE_METHODS = Database.WRITE_METHODS
+    
+    def __init__(
+        self,
+        db_path: str | Path = "save/game.db",
+        shards: int = 8,
+        pool_size: int = 4,
+        max_open: int = 32,
+        factory: Callable[[Path], Database] | None = None,
+        check_legacy: bool = True
+    ):
+        """
+        Args:
+            shards: 分片数，0 表示每个用户一个分片
+            pool_size: 主存档的连接池大小
+            max_open: 同时打开的分片数上限
+            factory: 打开分片的函数 (如使用写缓冲)，默认为 SHARD_POOL_SIZE 个连接的 Database
+            check_legacy: 主存档中还有未迁移的文件时拒绝打开
+        
+        Raises:
+            ValueError: 分片方式与存档记录的不一致，或主存档中还有未迁移的文件
+        """
+        if shards < 0:
+            raise ValueError("分片数不能为负数")
+        self.catalog = Database(db_path, pool_size=pool_size)
+        self.db_path = self.catalog.db_path
+        self.shards = shards
+        self.shard_dir = self.db_path.parent / "shards"
+        self.max_open = max(1, max_open)
+        self._factory = factory or (lambda path: Database(path, pool_size=SHARD_POOL_SIZE))
+        self._open: OrderedDict[int, Database] = OrderedDict()
+        # 已在分片中登记的 (分片号, user_id)
+        self._members: set[tuple[int, int]] = set()
+        self._lock = threading.Lock()
+        # 当前线程在 connection() 中时: (ExitStack, 已开启事务的分片号)
+        self._local = threading.local()
+        self.opened = 0
+        self._check_layout(check_legacy)
+    
+    @property
+    def layout(self) -> str:
+        return "per-user" if self.shards == 0 else f"hash:{self.shards}"
+    
+    @property
+    def pool_size(self) -> int:
+        return self.catalog.pool_size
+    
+    def _check_layout(self, check_legacy: bool) -> None:
+        """第一次打开时记录分片方式，之后必须一致"""
+        with self.catalog.connection() as conn:
+            row = conn.execute("SELECT value FROM settings WHERE key = 'shard_layout'").fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO settings (key, value) VALUES ('shard_layout', ?)", (self.layout,)
+                )
+            elif row[0] != self.layout:
+                raise ValueError(f"存档的分片方式为 {row[0]}，与 {self.layout} 不一致")
+            legacy = conn.execute("SELECT EXISTS(SELECT 1 FROM vfs_nodes)").fetchone()[0]
+        if check_legacy and legacy:
+            raise ValueError(
+                f"主存档中还有未迁移到分片的文件，请先运行: "
+                f"python -m src.data.sharding --db {self.db_path} --shards {self.shards} migrate"
+            )
+    
+    # ==================== 路由 ====================
+    
+    def shard_of(self, user_id: int) -> int:
+        """用户所在的分片号"""
+        return user_id if self.shards == 0 else user_id % self.shards
+    
+    def shard_path(self, shard: int) -> Path:
+        if self.shards == 0:
+            return self.shard_dir / f"user_{shard}.db"
+        return self.shard_dir / f"shard_{shard:03d}.db"
+    
+    def existing_shards(self) -> list[int]:
+        """磁盘上已有的分片号"""
+        if not self.shard_dir.exists():
+            return []
+        prefix = "user" if self.shards == 0 else "shard"
+        return sorted(
+            int(match.group(2))
+            for path in self.shard_dir.iterdir()
+            if (match := _SHARD_FILE.match(path.name)) and match.group(1) == prefix
+        )
+    
+    def _shard(self, shard: int) -> Database:
+        """打开 (或从缓存取出) 分片"""
+        with self._lock:
+            db = self._open.get(shard)
+            if db is not None:
+                self._open.move_to_end(shard)
+                return db
+            db = self._factory(self.shard_path(shard))
+            # 打开时只执行了表结构迁移；分片数据量小，旧版本分片的数据迁移直接完成
+            Migrator(db).run()
+            _seed_sequence(db, shard)
+            self._open[shard] = db
+            self.opened += 1
+            evicted = []
+            while len(self._open) > self.max_open:
+                old, old_db = self._open.popitem(last=False)
+                self._members = {m for m in self._members if m[0] != old}
+                evicted.append(old_db)
+        # 关闭 (写缓冲版本会先提交) 放在锁外，不阻塞其他分片的查找
+        for old_db in evicted:
+            old_db.close()
+        return db
+    
+    def for_user(self, user_id: int) -> Database:
+        """用户文件系统所在的分片"""
+        shard = self.shard_of(user_id)
+        db = self._shard(shard)
+        if (shard, user_id) not in self._members:
+            # 分片中的节点通过外键引用 users，登记一条只有 ID 和用户名的记录
+            user = self.catalog.get_user_by_id(user_id)
+            with db.connection() as conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO users (id, username, password_hash) VALUES (?, ?, '')",
+                    (user_id, user['username'] if user else f"#{user_id}")
+                )
+            group = getattr(self._local, "group", None)
+            # 在未提交的分片事务中登记时，回滚后需要重新登记
+            if group is None or shard not in group[1]:
+                self._members.add((shard, user_id))
+        return self._join(shard, db)
+    
+    def for_node(self, node_id: int) -> Database:
+        """节点所在的分片"""
+        shard = node_id >> SHARD_BITS
+        return self._join(shard, self._shard(shard))
+    
+    def _join(self, shard: int, db: Database) -> Database:
+        """在 connection() 中第一次访问分片时，为它开启一个随之提交的事务"""
+        group = getattr(self._local, "group", None)
+        # 写缓冲本身会合并提交
+        if group is not None and shard not in group[1] and not isinstance(db, BufferedDatabase):
+            group[0].enter_context(db.connection())
+            group[1].add(shard)
+        return db
+    
+    # ==================== 主存档 ====================
+    
+    @contextmanager
+    def connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        主存档的连接 (迁移、用户表)
+        
+        其中访问到的分片也各开启一个事务，退出时一起提交，可以像 Database 一样
+        把多个操作合并为一次提交；各分片分别提交，不保证跨分片的原子性
+        """
+        if getattr(self._local, "group", None) is not None:
+            with self.catalog.connection() as conn:
+                yield conn
+            return
+        
+        with self.catalog.connection() as conn, ExitStack() as group:
+            self._local.group = (group, set())
+            try:
+                yield conn
+            finally:
+                self._local.group = None
+    
+    def schema_version(self) -> int:
+        return self.catalog.schema_version()
+    
+    def flush(self) -> None:
+        self.catalog.flush()
+        with self._lock:
+            shards = list(self._open.values())
+        for db in shards:
+            db.flush()
+    
+    def close(self) -> None:
+        """关闭全部分片和主存档的空闲连接"""
+        with self._lock:
+            shards = list(self._open.values())
+            self._open.clear()
+            self._members.clear()
+        for db in shards:
+            db.close()
+        self.catalog.close()
+    
+    # ==================== 管理 ====================
+    
+    def shard_stats(self) -> list[dict[str, Any]]:
+        """每个分片的用户数、节点数、内容块数和文件大小"""
+        stats = []
+        for shard in self.existing_shards():
+            db = self._shard(shard)
+            with db.connection() as conn:
+                users, nodes = conn.execute(
+                    "SELECT COUNT(DISTINCT user_id), COUNT(*) FROM vfs_nodes"
+                ).fetchone()
+                chunks = conn.execute("SELECT COUNT(*) FROM vfs_chunks").fetchone()[0]
+            path = self.shard_path(shard)
+            size = sum(
+                p.stat().st_size
+                for p in (path, path.with_name(path.name + "-wal"))
+                if p.exists()
+            )
+            stats.append({
+                'shard': shard,
+                'path': path,
+                'users': users,
+                'nodes': nodes,
+                'chunks': chunks,
+                'bytes': size,
+            })
+        return stats
+    
+    def locate(self, username: str) -> tuple[int, Path] | None:
+        """用户所在的 (分片号, 分片文件)"""
+        user = self.catalog.get_user_by_username(username)
+        if user is None:
+            return None
+        shard = self.shard_of(user['id'])
+        return shard, self.shard_path(shard)
+    
+    def migrate_legacy(self) -> tuple[int, list[str]]:
+        """
+        把主存档中的文件系统 (未分片的旧存档) 移到各用户的分片
+        
+        节点和快照 ID 整体平移到分片的 ID 段之后；每个用户在分片中一个事务，
+        提交后再从主存档删除。分片中已有该用户的文件时跳过
+        
+        Returns:
+            (迁移的用户数, 跳过的用户名)
+        """
+        with self.catalog.connection() as conn:
+            users = conn.execute(
+                """SELECT id, username FROM users WHERE id IN (
+                       SELECT user_id FROM vfs_nodes UNION SELECT user_id FROM vfs_snapshots
+                   ) ORDER BY id"""
+            ).fetchall()
+        
+        moved, skipped = 0, []
+        for user_id, username in users:
+            shard = self.for_user(user_id)
+            if shard.get_user_root_nodes(user_id):
+                skipped.append(username)
+                continue
+            _copy_user(shard.db_path, self.db_path, user_id)
+            with self.catalog.connection() as conn:
+                conn.execute("DELETE FROM vfs_snapshots WHERE user_id = ?", (user_id,))
+                conn.execute("DELETE FROM vfs_nodes WHERE user_id = ?", (user_id,))
+            moved += 1
+        return moved, skipped
+
+
+def _seed_sequence(db: Database, shard: int) -> None:
+    """分片的节点 ID 从 shard << SHARD_BITS 开始分配"""
+    base = shard << SHARD_BITS
+    with db.connection() as conn:
+        conn.execute(
+            "UPDATE sqlite_sequence SET seq = ? WHERE name = 'vfs_nodes' AND seq < ?",
+            (base, base)
+        )
+        conn.execute(
+            """INSERT INTO sqlite_sequence (name, seq)
+               SELECT 'vfs_nodes', ? WHERE NOT EXISTS (
+                   SELECT 1 FROM sqlite_sequence WHERE name = 'vfs_nodes'
+               )""",
+            (base,)
+        )
+
+
+def _copy_user(shard_path: Path, catalog_path: Path, user_id: int) -> None:
+    """
+    在一个事务中把用户的节点、内容块、快照复制到分片
+    
+    ATTACH 不能在事务中执行，这里单独开一个连接；数据来自主存档，不检查外键
+    """
+    conn = sqlite3.connect(shard_path, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS legacy", (str(catalog_path),))
+        conn.execute("BEGIN IMMEDIATE")
+        
+        def sequence(table: str) -> int:
+            row = conn.execute("SELECT seq FROM main.sqlite_sequence WHERE name = ?", (table,)).fetchone()
+            return row[0] if row else 0
+        
+        def set_sequence(table: str, value: int) -> None:
+            conn.execute("DELETE FROM main.sqlite_sequence WHERE name = ?", (table,))
+            conn.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES (?, ?)", (table, value))
+        
+        # 节点 ID 的范围 (含快照中已删除的节点)
+        low, high = conn.execute(
+            """SELECT MIN(id), MAX(id) FROM (
+                   SELECT id FROM legacy.vfs_nodes WHERE user_id = :u
+                   UNION ALL
+                   SELECT j.node_id FROM legacy.vfs_journal j
+                   JOIN legacy.vfs_snapshots s ON s.id = j.snapshot_id WHERE s.user_id = :u
+               )""",
+            {'u': user_id}
+        ).fetchone()
+        node_shift = sequence("vfs_nodes") + 1 - (low or 0)
+        low, high_snapshot = conn.execute(
+            "SELECT MIN(id), MAX(id) FROM legacy.vfs_snapshots WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        snapshot_shift = sequence("vfs_snapshots") + 1 - (low or 0)
+        params = {'u': user_id, 'n': node_shift, 's': snapshot_shift}
+        
+        conn.execute(
+            """INSERT INTO main.vfs_nodes
+                   (id, user_id, parent_id, name, is_directory, content, created_at, updated_at)
+               SELECT id + :n, user_id, parent_id + :n, name, is_directory, content, created_at, updated_at
+               FROM legacy.vfs_nodes WHERE user_id = :u""",
+            params
+        )
+        conn.execute(
+            """INSERT INTO main.vfs_chunks (node_id, seq, data)
+               SELECT c.node_id + :n, c.seq, c.data FROM legacy.vfs_chunks c
+               JOIN legacy.vfs_nodes n ON n.id = c.node_id WHERE n.user_id = :u""",
+            params
+        )
+        conn.execute(
+            """INSERT INTO main.vfs_snapshots (id, user_id, name, created_at)
+               SELECT id + :s, user_id, name, created_at FROM legacy.vfs_snapshots WHERE user_id = :u""",
+            params
+        )
+        conn.execute(
+            """INSERT INTO main.vfs_journal
+               SELECT j.snapshot_id + :s, j.node_id + :n, j.existed, j.parent_id + :n, j.name,
+                      j.is_directory, j.content, j.created_at, j.updated_at, j.content_saved
+               FROM legacy.vfs_journal j
+               JOIN legacy.vfs_snapshots s ON s.id = j.snapshot_id WHERE s.user_id = :u""",
+            params
+        )
+        conn.execute(
+            """INSERT INTO main.vfs_journal_chunks
+               SELECT c.snapshot_id + :s, c.node_id + :n, c.seq, c.data
+               FROM legacy.vfs_journal_chunks c
+               JOIN legacy.vfs_snapshots s ON s.id = c.snapshot_id WHERE s.user_id = :u""",
+            params
+        )
+        # 旧存档 vfs_nodes.content 中的内容转为分块 (分片已是最新版本，不会再有数据迁移)
+        while convert_legacy_content(conn, 500):
+            pass
+        if high is not None:
+            set_sequence("vfs_nodes", high + node_shift)
+        if high_snapshot is not None:
+            set_sequence("vfs_snapshots", high_snapshot + snapshot_shift)
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+# ==================== 方法转发 ====================
+
+def _routed(name: str, route: Callable[[ShardedDatabase, int], Database]):
+    method = getattr(Database, name)
+    
+    @functools.wraps(method)
+    def wrapper(self: ShardedDatabase, key: int, *args, **kwargs):
+        return getattr(route(self, key), name)(key, *args, **kwargs)
+    return wrapper
+
+
+def _catalog(name: str):
+    method = getattr(Database, name)
+    
+    @functools.wraps(method)
+    def wrapper(self: ShardedDatabase, *args, **kwargs):
+        return getattr(self.catalog, name)(*args, **kwargs)
+    return wrapper
+
+
+for _name in USER_METHODS:
+    setattr(ShardedDatabase, _name, _routed(_name, ShardedDatabase.for_user))
+for _name in NODE_METHODS:
+    setattr(ShardedDatabase, _name, _routed(_name, ShardedDatabase.for_node))
+for _name in CATALOG_METHODS:
+    setattr(ShardedDatabase, _name, _catalog(_name))
+
+
+# ==================== 命令行 ====================
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="分片存储管理")
+    parser.add_argument("--db", default="save/game.db", help="主存档路径")
+    parser.add_argument("--shards", type=int, required=True, help="分片数，0 表示每个用户一个分片")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="各分片的用户数、节点数与文件大小")
+    locate = sub.add_parser("locate", help="查看用户所在的分片")
+    locate.add_argument("username")
+    sub.add_parser("migrate", help="把主存档中的文件系统移到分片")
+    args = parser.parse_args()
+    
+    db = ShardedDatabase(args.db, args.shards, check_legacy=False)
+    try:
+        match args.command:
+            case "stats":
+                stats = db.shard_stats()
+                for item in stats:
+                    print(
+                        f"{item['path'].name}: {item['users']} 个用户, {item['nodes']} 个节点, "
+                        f"{item['chunks']} 个内容块, {item['bytes'] / 1024 / 1024:.1f} MB"
+                    )
+                print(f"分片方式: {db.layout}, 共 {len(stats)} 个分片文件")
+            case "locate":
+                found = db.locate(args.username)
+                if found is None:
+                    print(f"用户不存在: {args.username}")
+                else:
+                    print(f"{args.username}: 分片 {found[0]} ({found[1]})")
+            case "migrate":
+                moved, skipped = db.migrate_legacy()
+                print(f"已迁移 {moved} 个用户")
+                if skipped:
+                    print(f"分片中已有文件，跳过: {', '.join(skipped)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+写缓冲 (write-behind)
+把一个会话短时间内的多次修改合并到同一个事务中提交，减少提交和 fsync 次数
+"""
+import functools
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Generator
+
+from src.data.database import Database
+
+
+class BufferedDatabase(Database):
+    """
+    带写缓冲的数据库会话
+    
+    - 第一次写操作以 BEGIN IMMEDIATE 开启事务，之后的写操作都在该事务中执行
+    - 累计 max_ops 次写操作，或距第一次写操作超过 max_delay_ms 毫秒时提交
+    - 同一会话的读操作使用同一个连接，能读到自己尚未提交的修改
+    - 登出 / 退出时调用 flush() 立即提交
+    - 定时器线程中提交失败时，异常保存在 error 中，下一次写操作或 flush() / close() 时抛出
+    - 本线程在普通的 connection() 中 (占着唯一的连接) 时，写操作直接并入该事务
+    
+    每个会话应使用独立的 BufferedDatabase 实例
+    """
+    
+    def __init__(
+        self,
+        db_path: str | Path = "save/game.db",
+        max_ops: int = 256,
+        max_delay_ms: float = 50.0
+    ):
+        self.max_ops = max(1, max_ops)
+        self.max_delay = max_delay_ms / 1000
+        self._lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+        self._in_txn = False
+        self._depth = 0
+        self._pending_ops = 0
+        self._txn_started = 0.0
+        self._timer: threading.Timer | None = None
+        self.commits = 0
+        # 定时提交失败的异常 (这批修改已回滚)，尚未报告给调用方
+        self.error: BaseException | None = None
+        super().__init__(db_path, pool_size=1)
+    
+    @contextmanager
+    def connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        获取连接
+        
+        写缓冲事务进行中时，复用该事务并用 SAVEPOINT 隔离本次操作；
+        否则按普通方式执行并立即提交
+        """
+        with self._lock:
+            if not self._in_txn:
+                with super().connection() as conn:
+                    yield conn
+                return
+            
+            conn = self._conn
+            self._depth += 1
+            name = f"wb{self._depth}"
+            conn.execute(f"SAVEPOINT {name}")
+            try:
+                yield conn
+                conn.execute(f"RELEASE {name}")
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {name}")
+                conn.execute(f"RELEASE {name}")
+                raise
+            finally:
+                self._depth -= 1
+    
+    def _caching_users(self) -> bool:
+        # 写缓冲事务中读到的可能是未提交的记录
+        return not self._in_txn and super()._caching_users()
+    
+    def _raise_error(self) -> None:
+        """抛出之前定时提交失败的异常 (只抛出一次)"""
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+    
+    def _begin_write(self) -> bool:
+        """
+        开启写缓冲事务
+        
+        Returns:
+            False 表示本线程已在普通事务中，写操作应直接在其中执行
+            (连接池只有一个连接，再取连接会永远等待)
+        """
+        self._raise_error()
+        if self._in_txn:
+            return True
+        if getattr(self._local, "conn", None) is not None:
+            return False
+        self._conn = self._acquire()
+        # IMMEDIATE: 一开始就拿到写锁，避免读事务升级为写事务时冲突
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._in_txn = True
+        self._txn_started = time.monotonic()
+        self._timer = threading.Timer(self.max_delay, self._timer_flush)
+        self._timer.daemon = True
+        self._timer.start()
+        return True
+    
+    def _after_write(self) -> None:
+        """记录一次写操作，达到阈值时提交"""
+        self._pending_ops += 1
+        if (
+            self._pending_ops >= self.max_ops
+            or time.monotonic() - self._txn_started >= self.max_delay
+        ):
+            self.flush()
+    
+    def _timer_flush(self) -> None:
+        """定时器线程中提交: 异常无法传给调用方，先保存下来"""
+        try:
+            self.flush()
+        except Exception as e:
+            self.error = e
+    
+    def flush(self) -> None:
+        """提交缓冲中的全部修改"""
+        with self._lock:
+            self._raise_error()
+            if not self._in_txn or self._depth > 0:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            conn = self._conn
+            try:
+                conn.commit()
+                self.commits += 1
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._in_txn = False
+                self._pending_ops = 0
+                self._conn = None
+                self._release(conn)
+    
+    def close(self) -> None:
+        """提交缓冲并关闭连接"""
+        try:
+            self.flush()
+        finally:
+            super().close()
+
+
+def _buffered(name: str):
+    """把 Database 的写方法包装为写缓冲版本"""
+    method = getattr(Database, name)
+    
+    @functools.wraps(method)
+    def wrapper(self: BufferedDatabase, *args, **kwargs):
+        with self._lock:
+            if not self._begin_write():
+                return method(self, *args, **kwargs)
+            result = method(self, *args, **kwargs)
+            self._after_write()
+            return result
+    
+    return wrapper
+
+
+for _name in Database.WRITE_METHODS:
+    setattr(BufferedDatabase, _name, _buffered(_name))
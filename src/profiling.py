@@ -0,0 +1,61 @@
+"""
+启动耗时分析 (--profile-startup)
+按阶段记录耗时，退出后打印明细
+"""
+import importlib
+import time
+
+from rich.cells import cell_len
+
+
+# 按依赖顺序逐个导入，每一项只统计此前尚未加载的部分
+STARTUP_IMPORTS = (
+    "textual.app",
+    "src.data.database",
+    "src.systems.shell",
+    "src.widgets.terminal",
+    "src.app",
+)
+
+
+class StartupProfile:
+    """
+    启动阶段计时
+    
+    用法:
+        profile = StartupProfile()
+        profile.import_modules(STARTUP_IMPORTS)
+        ...
+        profile.mark("打开数据库")
+        print(profile.report())
+    """
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.phases: list[tuple[str, float]] = []
+    
+    def mark(self, name: str) -> None:
+        """结束一个阶段 (从上一次 mark 到现在)"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+    
+    def import_modules(self, modules: tuple[str, ...] = STARTUP_IMPORTS) -> None:
+        """逐个导入模块并记录耗时"""
+        for module in modules:
+            importlib.import_module(module)
+            self.mark(f"import {module}")
+    
+    def report(self) -> str:
+        """耗时明细"""
+        total = sum(seconds for _, seconds in self.phases)
+        width = max((cell_len(name) for name, _ in self.phases), default=0)
+        lines = ["启动耗时:"]
+        for name, seconds in self.phases:
+            share = seconds / total if total else 0
+            padding = " " * (width - cell_len(name))
+            lines.append(f"  {name}{padding}  {seconds * 1000:8.1f} ms  {share:6.1%}")
+        padding = " " * (width - cell_len("合计"))
+        lines.append(f"  合计{padding}  {total * 1000:8.1f} ms")
+        return "\n".join(lines)
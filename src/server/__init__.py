@@ -0,0 +1,7 @@
+"""
+多用户网络服务器模块
+"""
+from src.server.console import StreamConsole
+from src.server.tcp import GameServer, run_server
+
+__all__ = ["StreamConsole", "GameServer", "run_server"]
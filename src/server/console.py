@@ -0,0 +1,136 @@
+"""
+网络会话输出
+把 Shell 的输出缓存为纯文本行，由服务器统一发送给客户端
+"""
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator
+
+from rich.errors import MarkupError
+from rich.text import Text
+
+
+def strip_markup(text: str) -> str:
+    """去除 Rich markup，返回纯文本"""
+    if "[" not in text:
+        return text
+    return _strip_markup(text)
+
+
+@lru_cache(maxsize=1024)
+def _strip_markup(text: str) -> str:
+    # 帮助等静态输出在每个会话中重复出现，解析结果按原文缓存
+    try:
+        return Text.from_markup(text).plain
+    except MarkupError:
+        return text
+
+
+class StreamConsole:
+    """
+    网络会话的 Console 实现
+    
+    命令在工作线程中执行，输出先写入缓冲区，
+    回到事件循环后再一次性发送，避免跨线程操作 StreamWriter
+    """
+    
+    CLEAR_SCREEN = "\x1b[2J\x1b[H"
+    PAGE_SIZE = 24
+    PAGER_PROMPT = "-- 更多 -- (回车: 下一页, q: 退出) "
+    
+    def __init__(self):
+        self._buffer: list[str] = []
+        self._pager: Iterator[str] | None = None
+        self._pager_lookahead: list[str] = []
+        self.username = ""
+        self.hostname = ""
+        self.cwd = "/"
+        self.logged_in = False
+        self.closed = False
+    
+    def write_line(self, text: str) -> None:
+        """写入一行文本"""
+        self._buffer.append(strip_markup(text))
+    
+    def write_error(self, text: str) -> None:
+        """写入错误信息"""
+        self.write_line(text)
+    
+    def write_success(self, text: str) -> None:
+        """写入成功信息"""
+        self.write_line(text)
+    
+    def write_info(self, text: str) -> None:
+        """写入提示信息"""
+        self.write_line(text)
+    
+    def clear(self) -> None:
+        """清屏 (发送 ANSI 清屏序列)"""
+        self._buffer.clear()
+        self._buffer.append(self.CLEAR_SCREEN)
+    
+    def page(self, lines: Iterable[str]) -> None:
+        """分页输出，其余的行在客户端翻页时才读取"""
+        self._pager = iter(lines)
+        self._pager_lookahead = []
+        self.next_page()
+    
+    @property
+    def paging(self) -> bool:
+        """是否处于分页模式"""
+        return self._pager is not None
+    
+    def next_page(self) -> None:
+        """输出下一页"""
+        if self._pager is None:
+            return
+        page = self._pager_lookahead
+        page += islice(self._pager, self.PAGE_SIZE + 1 - len(page))
+        for text in page[:self.PAGE_SIZE]:
+            self.write_line(text)
+        self._pager_lookahead = page[self.PAGE_SIZE:]
+        if not self._pager_lookahead:
+            self._pager = None
+    
+    def close_pager(self) -> None:
+        """结束分页"""
+        self._pager = None
+        self._pager_lookahead = []
+    
+    def login(self, username: str, hostname: str = "算界") -> None:
+        """切换到完整提示符"""
+        self.username = username
+        self.hostname = hostname
+        self.logged_in = True
+    
+    def logout(self) -> None:
+        """切换回简单提示符"""
+        self.username = ""
+        self.hostname = ""
+        self.logged_in = False
+    
+    def set_cwd(self, path: str) -> None:
+        """设置当前工作目录"""
+        self.cwd = path
+    
+    def close(self) -> None:
+        """标记会话结束 (exit 命令)"""
+        self.closed = True
+    
+    def prompt(self) -> str:
+        """生成提示符字符串，格式与 Terminal Widget 一致"""
+        if self.paging:
+            return self.PAGER_PROMPT
+        if not self.logged_in:
+            return "$ "
+        if self.username:
+            return f"{self.username}@{self.hostname}:{self.cwd}$ "
+        return f"{self.cwd}$ "
+    
+    def drain(self) -> str:
+        """取出缓冲区中的全部输出"""
+        if not self._buffer:
+            return ""
+        output = "\n".join(self._buffer) + "\n"
+        self._buffer.clear()
+        return output
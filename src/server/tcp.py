@@ -0,0 +1,182 @@
+"""
+TCP 行协议服务器
+一个进程内承载多个并发会话，所有会话共享同一个带连接池的 Database，
+数据库访问经过 AsyncDatabase，并发会话的写操作会被合并提交
+
+协议: 客户端每发送一行即执行一条命令，服务器返回命令输出和新的提示符
+(可直接用 telnet / nc 连接)
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.data.async_database import AsyncDatabase
+from src.data.backup import BackupScheduler
+from src.data.database import Database, get_database
+from src.data.migrations import Migrator
+from src.server.console import StreamConsole
+from src.systems.shell import Shell
+
+
+class GameServer:
+    """多用户游戏服务器"""
+    
+    def __init__(
+        self,
+        db: Database | None = None,
+        host: str = "127.0.0.1",
+        port: int = 2323,
+        workers: int = 32
+    ):
+        self.db = db or get_database()
+        self.adb = AsyncDatabase(self.db)
+        self.host = host
+        self.port = port
+        # 命令处理是同步代码，放到工作线程中执行；
+        # 线程大部分时间在等待数据库队列，数量可以大于连接池
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="session"
+        )
+        self._server: asyncio.Server | None = None
+        self.session_count = 0
+        self.active_sessions = 0
+    
+    async def start(self) -> None:
+        """开始监听"""
+        # 机房上课时大量客户端会同时连接，默认 backlog (100) 不够
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port, backlog=1024
+        )
+        # 端口为 0 时使用系统分配的端口
+        self.port = self._server.sockets[0].getsockname()[1]
+    
+    async def serve_forever(self) -> None:
+        """持续运行直到被取消"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+    
+    async def stop(self) -> None:
+        """停止服务器"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+        self.adb.close()
+    
+    async def _run(self, func, *args) -> None:
+        """在工作线程中执行阻塞调用"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, func, *args)
+    
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        console: StreamConsole
+    ) -> None:
+        """发送缓冲的输出和提示符"""
+        output = console.drain()
+        if not console.closed:
+            output += console.prompt()
+        writer.write(output.encode("utf-8"))
+        await writer.drain()
+    
+    async def _handle_client(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """处理单个客户端会话"""
+        self.session_count += 1
+        self.active_sessions += 1
+        console = StreamConsole()
+        peer = writer.get_extra_info("peername")
+        shell = Shell(
+            self.adb.blocking(),
+            on_exit=console.close,
+            client=str(peer[0] if isinstance(peer, tuple) else peer)
+        )
+        
+        try:
+            shell.show_welcome(console)
+            await self._send(writer, console)
+            
+            while not console.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8", errors="replace").strip()
+                if console.paging:
+                    # 分页模式: 空行翻页，其他输入结束分页 (非 q 时照常执行)
+                    if not command:
+                        await self._run(console.next_page)
+                        await self._send(writer, console)
+                        continue
+                    console.close_pager()
+                    if command.lower() == "q":
+                        await self._send(writer, console)
+                        continue
+                await self._run(shell.execute, console, command)
+                await self._send(writer, console)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # 断线时同样保存会话状态
+            await self._run(shell.close)
+            self.active_sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def run_server(
+    host: str = "127.0.0.1",
+    port: int = 2323,
+    db_path: str | Path = "save/game.db",
+    pool_size: int = 8,
+    shards: int | None = None,
+    backup_minutes: float = 0,
+    backup_keep: int = 7
+) -> None:
+    """
+    以服务器模式运行
+    
+    Args:
+        shards: 按用户分片存储的分片数 (0 表示每个用户一个分片)，None 为单个存档
+        backup_minutes: 定时在线备份的间隔 (分钟)，为 0 时不备份
+        backup_keep: 定时备份保留的份数
+    """
+    db = get_database(db_path, pool_size=pool_size, shards=shards)
+    # 旧存档的数据迁移在后台分批进行，批与批之间让出数据库给玩家会话
+    migrator = Migrator(db, pause=0.01)
+    pending = migrator.pending()
+    if pending:
+        print(f"正在后台迁移存档: {', '.join(m.description for m in pending)}")
+        migrator.start()
+    scheduler = None
+    if backup_minutes > 0:
+        scheduler = BackupScheduler(db.db_path, backup_minutes * 60, backup_keep)
+        scheduler.start()
+        print(f"每 {backup_minutes:g} 分钟在线备份一次，保留 {backup_keep} 份")
+    server = GameServer(db, host, port)
+    
+    async def main() -> None:
+        await server.start()
+        print(f"算界服务器已启动: {server.host}:{server.port} (Ctrl+C 停止)")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.stop()
+    
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if scheduler is not None:
+            scheduler.stop()
+        db.close()
@@ -0,0 +1,262 @@
+"""
+归档导入导出
+把文件树的一个子树导出为主机上的 tar 包 (.tar.gz / .tgz 时压缩)，或从 tar 包导入。
+
+- 导出: 一次递归查询按路径顺序取出全部节点，文件内容按块读取后直接写入归档
+- 导入: 以流模式顺序读取归档，文件内容边解码边按块追加
+内存占用有固定上限 (单个文件超过 SPOOL_SIZE 时暂存到临时文件)，与文件树大小无关
+"""
+import codecs
+import os
+import tarfile
+import time
+from contextlib import ExitStack, closing, nullcontext
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import Iterator
+
+from src.data.database import CHUNK_SIZE, Database
+from src.data.sharding import ShardedDatabase
+from src.data.write_buffer import BufferedDatabase
+
+
+# 导出时单个文件在内存中暂存的上限 (字节)，超过时转存到临时文件
+SPOOL_SIZE = 1024 * 1024
+# 导入时每次从归档读取的字节数
+READ_SIZE = CHUNK_SIZE * 16
+# 导入时每多少个条目提交一次
+BATCH = 256
+
+
+class ArchiveError(Exception):
+    """归档内容无法导入"""
+
+
+@dataclass(slots=True)
+class ArchiveStats:
+    """导入 / 导出统计"""
+    files: int = 0
+    directories: int = 0
+    bytes: int = 0
+    skipped: int = 0
+    seconds: float = 0.0
+    
+    @property
+    def throughput(self) -> float:
+        """MB/s"""
+        return self.bytes / 1024 / 1024 / self.seconds if self.seconds > 0 else 0.0
+    
+    def __str__(self) -> str:
+        text = (
+            f"{self.files} 个文件, {self.directories} 个目录, "
+            f"{self.bytes / 1024 / 1024:.2f} MB, 用时 {self.seconds:.2f} 秒 "
+            f"({self.throughput:.1f} MB/s)"
+        )
+        if self.skipped:
+            text += f", 跳过 {self.skipped} 项"
+        return text
+
+
+def resolve_host_path(base: Path, name: str) -> Path | None:
+    """主机上的归档路径，限制在 base 目录内 (越界时返回 None)"""
+    base = base.resolve()
+    path = (base / name).resolve()
+    if path == base or not path.is_relative_to(base):
+        return None
+    return path
+
+
+def _is_gzip(path: Path) -> bool:
+    return path.name.endswith((".tar.gz", ".tgz"))
+
+
+def _mtime(value) -> int:
+    """数据库中的时间 -> 时间戳"""
+    # 取整: 带小数的 mtime 会让 PAX 格式为每个文件多写一个扩展头
+    try:
+        return int(datetime.fromisoformat(str(value)).timestamp())
+    except ValueError:
+        return int(time.time())
+
+
+def _spool(chunks: Iterator[str]) -> tuple[SpooledTemporaryFile, int]:
+    """
+    把文件内容编码后暂存，返回 (文件对象, 字节数)
+    
+    tar 头部需要先写入字节数，而数据库只记录字符数；先暂存一遍，
+    不超过 SPOOL_SIZE 时留在内存中，超过时转存到临时文件
+    """
+    spool = SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    for chunk in chunks:
+        spool.write(chunk.encode("utf-8"))
+    size = spool.tell()
+    spool.seek(0)
+    return spool, size
+
+
+# ==================== 导出 ====================
+
+def write_archive(
+    db: Database,
+    user_id: int,
+    root_id: int | None,
+    host_file: Path
+) -> ArchiveStats:
+    """
+    把子树写入 tar 包
+    
+    先写入临时文件，完成后再替换目标，中途失败不会留下不完整的归档
+    
+    Args:
+        root_id: 子树根节点 (归档中的路径以它的名称开头)，None 表示整个文件树
+    """
+    stats = ArchiveStats()
+    start = time.perf_counter()
+    host_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = host_file.with_name(host_file.name + ".part")
+    
+    try:
+        # 写入失败或中途退出时立即结束迭代器
+        with (
+            tarfile.open(str(tmp), "w|gz" if _is_gzip(host_file) else "w|", format=tarfile.PAX_FORMAT) as tar,
+            closing(db.iter_vfs_subtree(user_id, root_id)) as nodes
+        ):
+            for node in nodes:
+                # TarFile 默认记住写入的每个条目，流式写入不需要
+                tar.members.clear()
+                info = tarfile.TarInfo(node['path'])
+                info.mtime = _mtime(node['updated_at'])
+                if node['is_directory']:
+                    info.type = tarfile.DIRTYPE
+                    info.mode = 0o755
+                    tar.addfile(info)
+                    stats.directories += 1
+                    continue
+                
+                info.mode = 0o644
+                spool, info.size = _spool(db.iter_vfs_chunks(node['id']))
+                with spool:
+                    tar.addfile(info, spool)
+                stats.files += 1
+                stats.bytes += info.size
+        os.replace(tmp, host_file)
+    finally:
+        tmp.unlink(missing_ok=True)
+    
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+# ==================== 导入 ====================
+
+def _member_parts(name: str) -> list[str] | None:
+    """归档成员路径 -> 各级名称；绝对路径或含 .. 时返回 None"""
+    if name.startswith("/"):
+        return None
+    parts = [part for part in name.split("/") if part and part != "."]
+    if not parts or ".." in parts:
+        return None
+    return parts
+
+
+def _transaction(db: Database):
+    """
+    导入时一批条目合并为一个事务
+    
+    写缓冲 (BufferedDatabase) 和异步门面 (BlockingDatabase) 的写操作本来就会合并提交，不需要处理
+    """
+    if isinstance(db, ShardedDatabase) or (
+        isinstance(db, Database) and not isinstance(db, BufferedDatabase)
+    ):
+        return db.connection()
+    return nullcontext()
+
+
+def read_archive(
+    db: Database,
+    user_id: int,
+    parent_id: int | None,
+    host_file: Path
+) -> ArchiveStats:
+    """
+    把 tar 包导入到 parent_id 目录下
+    
+    已存在的目录合并，已存在的文件被覆盖；链接等特殊条目跳过
+    
+    Raises:
+        ArchiveError: 归档中的路径与已有文件冲突 (已提交的批次不会回滚)
+    """
+    stats = ArchiveStats()
+    start = time.perf_counter()
+    # 当前所在的目录链 [(名称, 节点ID)]，归档按目录顺序排列时大部分条目直接命中
+    stack: list[tuple[str, int]] = []
+    
+    def directory(parts: list[str]) -> int | None:
+        """确保各级目录存在，返回最后一级的节点ID"""
+        depth = 0
+        while depth < min(len(stack), len(parts)) and stack[depth][0] == parts[depth]:
+            depth += 1
+        del stack[depth:]
+        
+        current = stack[-1][1] if stack else parent_id
+        for name in parts[depth:]:
+            node = db.get_vfs_node_by_path(user_id, current, name)
+            if node is None:
+                current = db.create_vfs_node(user_id, current, name, is_directory=True)
+                if current is None:
+                    raise ArchiveError(f"无法创建目录: {'/'.join(parts)}")
+                stats.directories += 1
+            elif node['is_directory']:
+                current = node['id']
+            else:
+                raise ArchiveError(f"已存在同名文件: {'/'.join(parts)}")
+            stack.append((name, current))
+        return current
+    
+    with tarfile.open(str(host_file), "r|*") as tar, ExitStack() as batch:
+        batch.enter_context(_transaction(db))
+        count = 0
+        while (member := tar.next()) is not None:
+            # 流模式下已读过的条目无法再访问，不必保留
+            tar.members.clear()
+            count += 1
+            if count % BATCH == 0:
+                batch.close()
+                batch.enter_context(_transaction(db))
+            
+            parts = _member_parts(member.name)
+            if parts is None or not (member.isdir() or member.isfile()):
+                stats.skipped += 1
+                continue
+            if member.isdir():
+                directory(parts)
+                continue
+            
+            folder = directory(parts[:-1])
+            node = db.get_vfs_node_by_path(user_id, folder, parts[-1])
+            if node is None:
+                node_id = db.create_vfs_node(user_id, folder, parts[-1])
+                if node_id is None:
+                    raise ArchiveError(f"无法创建文件: {member.name}")
+            elif node['is_directory']:
+                raise ArchiveError(f"已存在同名目录: {member.name}")
+            else:
+                node_id = node['id']
+                db.update_vfs_node_content(node_id, "")
+            
+            source = tar.extractfile(member)
+            decoder = codecs.getincrementaldecoder("utf-8")("replace")
+            while data := source.read(READ_SIZE):
+                text = decoder.decode(data)
+                if text:
+                    db.append_vfs_node_content(node_id, text)
+            text = decoder.decode(b"", final=True)
+            if text:
+                db.append_vfs_node_content(node_id, text)
+            stats.files += 1
+            stats.bytes += member.size
+    
+    stats.seconds = time.perf_counter() - start
+    return stats
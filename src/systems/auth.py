@@ -3,19 +3,108 @@
 处理用户注册、登录、密码验证等
 """
 import hashlib
+import math
 import secrets
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Optional
 
 from src.data.database import Database, get_database
-from src.data.models import UserSession
+
+if TYPE_CHECKING:
+    # Pydantic 导入较慢，登录时才真正需要
+    from src.data.models import UserSession
+
+
+class LoginThrottle:
+    """
+    登录失败限流 (按客户端地址和用户名)
+    
+    只按用户名计数的话，任何客户端都能靠故意输错密码锁住别人的账户，
+    因此每个客户端地址对每个用户名分别计数。连续失败 limit 次后锁定 base 秒，之后每再失败一次锁定时间翻倍，最长 max_delay 秒；
+    登录成功后清零。锁定期间的登录直接拒绝，不计算哈希也不查询数据库。
+    最多记录 capacity 条，超出时丢弃最久未失败的记录
+    """
+    
+    def __init__(
+        self,
+        limit: int = 5,
+        base: float = 1.0,
+        max_delay: float = 300.0,
+        capacity: int = 4096,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.limit = max(1, limit)
+        self.base = base
+        self.max_delay = max_delay
+        self.capacity = capacity
+        self.clock = clock
+        # (客户端地址, 用户名) -> (连续失败次数, 锁定到期时间)
+        self._failures: OrderedDict[tuple[str, str], tuple[int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+    
+    def allow(self, client: str, username: str) -> float:
+        """还需等待的秒数，0 表示可以尝试登录"""
+        with self._lock:
+            state = self._failures.get((client, username))
+            if state is None:
+                return 0.0
+            wait = state[1] - self.clock()
+            if wait <= 0:
+                return 0.0
+            self.rejected += 1
+            return wait
+    
+    def failed(self, client: str, username: str) -> None:
+        """记录一次失败的登录"""
+        key = (client, username)
+        with self._lock:
+            count = self._failures.pop(key, (0, 0.0))[0] + 1
+            until = 0.0
+            if count >= self.limit:
+                delay = min(self.max_delay, self.base * 2 ** (count - self.limit))
+                until = self.clock() + delay
+            self._failures[key] = (count, until)
+            while len(self._failures) > self.capacity:
+                self._failures.popitem(last=False)
+    
+    def succeeded(self, client: str, username: str) -> None:
+        """登录成功，清除失败记录"""
+        with self._lock:
+            self._failures.pop((client, username), None)
+
+
+# 全局限流器 (服务器模式下所有会话共用)
+_throttle_instance: LoginThrottle | None = None
+
+
+def get_login_throttle() -> LoginThrottle:
+    """获取登录限流器单例"""
+    global _throttle_instance
+    if _throttle_instance is None:
+        _throttle_instance = LoginThrottle()
+    return _throttle_instance
 
 
 class AuthSystem:
     """用户认证系统"""
     
-    def __init__(self, db: Database | None = None):
+    def __init__(
+        self,
+        db: Database | None = None,
+        throttle: LoginThrottle | None = None,
+        client: str = "local"
+    ):
+        """
+        Args:
+            client: 客户端地址，登录限流按它和用户名分别计数
+        """
         self.db = db or get_database()
-        self._current_session: UserSession | None = None
+        self.throttle = throttle or get_login_throttle()
+        self.client = client
+        self._current_session: "UserSession | None" = None
     
     @property
     def is_logged_in(self) -> bool:
@@ -23,7 +112,7 @@ class AuthSystem:
         return self._current_session is not None
     
     @property
-    def current_user(self) -> UserSession | None:
+    def current_user(self) -> "UserSession | None":
         """当前登录的用户会话"""
         return self._current_session
     
@@ -76,19 +165,14 @@ class AuthSystem:
         if not password or len(password) < 4:
             return False, "密码至少需要4个字符"
         
-        # 检查用户是否已存在
-        existing = self.db.get_user_by_username(username)
-        if existing:
-            return False, f"用户名 '{username}' 已被使用"
-        
-        # 创建用户
+        # 创建用户 (用户名唯一约束即可判断是否已存在，不需要先查询)
         password_hash, _ = self._hash_password(password)
         user_id = self.db.create_user(username, password_hash)
         
         if user_id:
             return True, f"用户 '{username}' 注册成功"
         else:
-            return False, "注册失败，请重试"
+            return False, f"用户名 '{username}' 已被使用"
     
     def login(self, username: str, password: str) -> tuple[bool, str]:
         """
@@ -100,19 +184,25 @@ class AuthSystem:
         if self.is_logged_in:
             return False, f"已经以 '{self._current_session.username}' 身份登录，请先登出"
         
-        # 获取用户
+        wait = self.throttle.allow(self.client, username)
+        if wait > 0:
+            return False, f"尝试次数过多，请 {math.ceil(wait)} 秒后再试"
+        
+        # 获取用户 (经过用户缓存，不存在的用户名也会被缓存)
         user = self.db.get_user_by_username(username)
-        if not user:
+        if not user or not self._verify_password(password, user['password_hash']):
+            self.throttle.failed(self.client, username)
             return False, "用户名或密码错误"
         
-        # 验证密码
-        if not self._verify_password(password, user['password_hash']):
+        # 校验密码并更新登录时间 (同一条语句)
+        user = self.db.login_user(username, user['password_hash'])
+        if not user:
+            self.throttle.failed(self.client, username)
             return False, "用户名或密码错误"
-        
-        # 更新登录时间
-        self.db.update_user_login(user['id'])
+        self.throttle.succeeded(self.client, username)
         
         # 创建会话
+        from src.data.models import UserSession
         self._current_session = UserSession(
             user_id=user['id'],
             username=user['username'],
@@ -133,6 +223,8 @@ class AuthSystem:
             self._current_session.user_id,
             self._current_session.current_path
         )
+        # 登出时提交写缓冲中的全部修改
+        self.db.flush()
         
         self._current_session = None
         return True, f"再见, {username}"
@@ -0,0 +1,64 @@
+"""
+战斗系统 (ECS)
+收集一帧内的全部攻击，统一交给 StatStore 批量结算，再移除倒下的实体
+"""
+import esper
+
+from src.components.combat import Combatant, StatStore
+from src.data.models import Stats
+
+
+def spawn_combatant(store: StatStore, stats: Stats, *components) -> int:
+    """创建带战斗属性的实体"""
+    return esper.create_entity(Combatant(store.add(stats)), *components)
+
+
+class CombatProcessor(esper.Processor):
+    """
+    战斗结算处理器
+    
+    用法:
+        combat = CombatProcessor(store)
+        esper.add_processor(combat)
+        combat.attack(target, 12)
+        esper.process()
+    """
+    
+    def __init__(self, store: StatStore):
+        self.store = store
+        self._targets: list[int] = []
+        self._rows: list[int] = []
+        self._amounts: list[int] = []
+        self.defeated: list[int] = []  # 上一帧倒下的实体
+    
+    def attack(self, target: int, amount: int) -> None:
+        """登记一次攻击，在下一次 process() 中结算"""
+        self._targets.append(target)
+        self._rows.append(esper.component_for_entity(target, Combatant).row)
+        self._amounts.append(amount)
+    
+    def attack_all(self, amount: int) -> None:
+        """对全部战斗单位登记同样的攻击 (范围伤害)"""
+        for entity, combatant in esper.get_component(Combatant):
+            self._targets.append(entity)
+            self._rows.append(combatant.row)
+        self._amounts.extend([amount] * (len(self._rows) - len(self._amounts)))
+    
+    def process(self, *args, **kwargs) -> None:
+        self.defeated = []
+        if not self._rows:
+            return
+        store = self.store
+        store.apply_damage(self._amounts, self._rows)
+        
+        # 只检查本帧被攻击的单位
+        hp, alive = store.hp, store.alive
+        for entity, row in zip(self._targets, self._rows):
+            if alive[row] and hp[row] == 0:
+                self.defeated.append(entity)
+                store.remove(row)
+                esper.delete_entity(entity)
+        
+        self._targets.clear()
+        self._rows.clear()
+        self._amounts.clear()
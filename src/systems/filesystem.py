@@ -2,10 +2,19 @@
 虚拟文件系统
 每个用户拥有独立的文件空间，支持 CRUD 操作
 """
-from typing import Optional
+from bisect import bisect_left
+from collections import OrderedDict
+from pathlib import Path
+from sys import intern
+from typing import Iterable, Optional
 from dataclasses import dataclass
+from datetime import datetime
 
-from src.data.database import Database, get_database
+from src.data.database import CHUNK_SIZE, Database, get_database
+
+
+# 每个用户保留的快照数，超过时自动删除最旧的
+SNAPSHOT_RETENTION = 20
 
 
 @dataclass
@@ -16,6 +25,54 @@ class FSResult:
     data: any = None
 
 
+def prefix_range(names: list[str], prefix: str) -> tuple[int, int]:
+    """有序列表中以 prefix 开头的元素下标范围 [start, end)"""
+    start = bisect_left(names, prefix)
+    # 以 prefix 开头的字符串都小于 prefix + 最大码位
+    return start, bisect_left(names, prefix + "\U0010ffff", start)
+
+
+class DirectoryNames:
+    """
+    目录名称缓存 (补全用)
+    
+    每个目录缓存一份按名称排序的子节点名 (intern 后与节点共用) 和对应的
+    是否目录标记 (bytearray，每项 1 字节)，前缀查找为两次二分；
+    目录内容变化时由 VirtualFileSystem 调用 invalidate()
+    """
+    
+    def __init__(self, db: Database, user_id: int, capacity: int = 64):
+        self.db = db
+        self.user_id = user_id
+        self.capacity = capacity
+        # 目录 ID -> (有序名称, 每个名称是否目录)
+        self._dirs: OrderedDict[int | None, tuple[list[str], bytearray]] = OrderedDict()
+    
+    def _load(self, parent_id: int | None) -> tuple[list[str], bytearray]:
+        entry = self._dirs.get(parent_id)
+        if entry is not None:
+            self._dirs.move_to_end(parent_id)
+            return entry
+        rows = self.db.get_vfs_child_names(self.user_id, parent_id)
+        entry = ([intern(name) for name, _ in rows], bytearray(is_dir for _, is_dir in rows))
+        self._dirs[parent_id] = entry
+        while len(self._dirs) > self.capacity:
+            self._dirs.popitem(last=False)
+        return entry
+    
+    def match(self, parent_id: int | None, prefix: str) -> list[tuple[str, bool]]:
+        """目录下以 prefix 开头的 (名称, 是否目录)"""
+        names, kinds = self._load(parent_id)
+        start, end = prefix_range(names, prefix)
+        return [(names[i], bool(kinds[i])) for i in range(start, end)]
+    
+    def invalidate(self, parent_id: int | None) -> None:
+        self._dirs.pop(parent_id, None)
+    
+    def clear(self) -> None:
+        self._dirs.clear()
+
+
 class VirtualFileSystem:
     """
     虚拟文件系统
@@ -29,6 +86,7 @@ class VirtualFileSystem:
         self.db = db or get_database()
         self._current_node_id: int | None = None  # None 表示根目录
         self._current_path: str = "/"
+        self.names = DirectoryNames(self.db, user_id)
     
     @property
     def cwd(self) -> str:
@@ -113,6 +171,17 @@ class VirtualFileSystem:
     
     def ls(self, path: str = "") -> FSResult:
         """列出目录内容"""
+        result = self.iter_dir(path)
+        if result.success:
+            result.data = list(result.data)
+        return result
+    
+    def iter_dir(self, path: str = "") -> FSResult:
+        """
+        列出目录内容 (惰性)
+        
+        data 为子节点迭代器，按页从数据库读取，适合超大目录
+        """
         if path:
             node_id, resolved_path, exists = self._resolve_path(path)
             if not exists:
@@ -123,11 +192,11 @@ class VirtualFileSystem:
                 node = self.db.get_vfs_node(node_id)
                 if node and not node['is_directory']:
                     # 如果是文件，返回文件信息
-                    return FSResult(True, "", [node])
+                    return FSResult(True, "", iter([node]))
         else:
             node_id = self._current_node_id
         
-        children = self.db.get_vfs_children(self.user_id, node_id)
+        children = self.db.iter_vfs_children(self.user_id, node_id)
         return FSResult(True, "", children)
     
     def mkdir(self, name: str) -> FSResult:
@@ -150,6 +219,7 @@ class VirtualFileSystem:
         )
         
         if node_id:
+            self.names.invalidate(self._current_node_id)
             return FSResult(True, f"目录已创建: {name}")
         return FSResult(False, "创建目录失败")
     
@@ -178,27 +248,116 @@ class VirtualFileSystem:
         )
         
         if node_id:
+            self.names.invalidate(self._current_node_id)
             return FSResult(True, f"文件已创建: {name}")
         return FSResult(False, "创建文件失败")
     
-    def cat(self, name: str) -> FSResult:
-        """读取文件内容"""
+    def _resolve_file(self, name: str) -> tuple[int | None, FSResult | None]:
+        """
+        解析文件路径
+        
+        Returns:
+            (node_id, error)，路径无效或不是文件时 error 不为 None
+        """
         node_id, resolved_path, exists = self._resolve_path(name)
         
         if not exists:
-            return FSResult(False, f"文件不存在: {name}")
+            return None, FSResult(False, f"文件不存在: {name}")
         
         if node_id is None:
-            return FSResult(False, "无法读取根目录")
+            return None, FSResult(False, "无法读取根目录")
         
         node = self.db.get_vfs_node(node_id)
         if not node:
-            return FSResult(False, f"文件不存在: {name}")
+            return None, FSResult(False, f"文件不存在: {name}")
         
         if node['is_directory']:
-            return FSResult(False, f"是目录，不是文件: {name}")
+            return None, FSResult(False, f"是目录，不是文件: {name}")
+        
+        return node_id, None
+    
+    def cat(self, name: str) -> FSResult:
+        """读取文件内容"""
+        node_id, error = self._resolve_file(name)
+        if error:
+            return error
+        
+        return FSResult(True, "", self.db.read_vfs_content(node_id))
+    
+    def iter_lines(self, name: str) -> FSResult:
+        """
+        按行读取文件 (惰性)
+        
+        data 为行迭代器，按块从数据库读取，适合超大文件。
+        只读取到调用时的文件长度为止: 同一条管道向该文件追加 (cat a >> a) 时不会读到新追加的内容
+        """
+        node_id, error = self._resolve_file(name)
+        if error:
+            return error
+        size = self.db.get_vfs_content_size(node_id)
+        
+        def lines():
+            # 空文件不产生任何行
+            pending = None
+            remaining = size
+            for chunk in self.db.iter_vfs_chunks(node_id):
+                if remaining <= 0:
+                    break
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+                *complete, pending = ((pending or "") + chunk).split("\n")
+                yield from complete
+            if pending is not None:
+                yield pending
+        
+        return FSResult(True, "", lines())
+    
+    def read(self, name: str, start: int, end: int | None = None) -> FSResult:
+        """读取文件内容的 [start, end) 区间 (按字符)，只读取涉及的块"""
+        node_id, error = self._resolve_file(name)
+        if error:
+            return error
         
-        return FSResult(True, "", node['content'] or "")
+        if start < 0 or (end is not None and end < start):
+            return FSResult(False, f"无效的范围: {start}:{end}")
+        
+        return FSResult(True, "", self.db.read_vfs_content(node_id, start, end))
+    
+    def head(self, name: str, lines: int = 10) -> FSResult:
+        """读取文件开头若干行，读够行数即停止"""
+        node_id, error = self._resolve_file(name)
+        if error:
+            return error
+        
+        parts: list[str] = []
+        newlines = 0
+        for chunk in self.db.iter_vfs_chunks(node_id):
+            parts.append(chunk)
+            newlines += chunk.count("\n")
+            if newlines >= lines:
+                break
+        
+        return FSResult(True, "", "".join(parts).split("\n")[:lines])
+    
+    def tail(self, name: str, lines: int = 10) -> FSResult:
+        """读取文件末尾若干行，从最后一块向前读，读够行数即停止"""
+        node_id, error = self._resolve_file(name)
+        if error:
+            return error
+        
+        if lines <= 0:
+            return FSResult(True, "", [])
+        
+        parts: list[str] = []
+        newlines = 0
+        for chunk in self.db.iter_vfs_chunks(node_id, reverse=True):
+            parts.append(chunk)
+            newlines += chunk.count("\n")
+            if newlines >= lines:
+                break
+        
+        text = "".join(reversed(parts))
+        return FSResult(True, "", text.split("\n")[-lines:])
     
     def write(self, name: str, content: str) -> FSResult:
         """写入文件内容"""
@@ -217,6 +376,68 @@ class VirtualFileSystem:
         # 文件不存在，创建新文件
         return self.touch(name, content)
     
+    def append(self, name: str, content: str, as_line: bool = False) -> FSResult:
+        """
+        追加文件内容，文件不存在时创建
+        
+        Args:
+            as_line: 作为新的一行追加 (文件非空时先补一个换行)
+        """
+        node_id, resolved_path, exists = self._resolve_path(name)
+        
+        if exists and node_id is not None:
+            node = self.db.get_vfs_node(node_id)
+            if node and node['is_directory']:
+                return FSResult(False, f"是目录，不是文件: {name}")
+            
+            if as_line and self.db.get_vfs_content_size(node_id) > 0:
+                content = "\n" + content
+            self.db.append_vfs_node_content(node_id, content)
+            return FSResult(True, f"已追加到文件: {name}")
+        
+        return self.touch(name, content)
+    
+    def write_lines(self, name: str, lines: Iterable[str], append: bool = False) -> FSResult:
+        """
+        把多行文本写入文件 (管道重定向)，文件不存在时创建
+        
+        边读边写，每攒够一个块就写入一次，不会把全部内容放在内存中
+        
+        Args:
+            append: 追加到文件末尾 (文件非空时先补一个换行)，否则覆盖
+        """
+        node_id, resolved_path, exists = self._resolve_path(name)
+        if exists and node_id is None:
+            return FSResult(False, f"是目录，不是文件: {name}")
+        if exists:
+            node = self.db.get_vfs_node(node_id)
+            if node and node['is_directory']:
+                return FSResult(False, f"是目录，不是文件: {name}")
+            if not append:
+                self.db.update_vfs_node_content(node_id, "")
+        else:
+            result = self.touch(name)
+            if not result.success:
+                return result
+            node_id, resolved_path, exists = self._resolve_path(name)
+        
+        separator = "\n" if append and self.db.get_vfs_content_size(node_id) > 0 else ""
+        buffer: list[str] = []
+        size = 0
+        for line in lines:
+            buffer.append(separator)
+            buffer.append(line)
+            size += len(separator) + len(line)
+            separator = "\n"
+            if size >= CHUNK_SIZE:
+                self.db.append_vfs_node_content(node_id, "".join(buffer))
+                buffer.clear()
+                size = 0
+        if buffer:
+            self.db.append_vfs_node_content(node_id, "".join(buffer))
+        
+        return FSResult(True, f"{'已追加到文件' if append else '已写入文件'}: {name}")
+    
     def rm(self, name: str) -> FSResult:
         """删除文件或空目录"""
         node_id, resolved_path, exists = self._resolve_path(name)
@@ -238,6 +459,7 @@ class VirtualFileSystem:
                 return FSResult(False, f"目录不为空: {name} (使用 rm -r 删除)")
         
         if self.db.delete_vfs_node(node_id):
+            self.names.invalidate(node['parent_id'])
             return FSResult(True, f"已删除: {name}")
         return FSResult(False, "删除失败")
     
@@ -251,8 +473,10 @@ class VirtualFileSystem:
         if node_id is None:
             return FSResult(False, "无法删除根目录")
         
+        node = self.db.get_vfs_node(node_id)
         # 递归删除会由数据库的 CASCADE 处理
-        if self.db.delete_vfs_node(node_id):
+        if node and self.db.delete_vfs_node(node_id):
+            self.names.invalidate(node['parent_id'])
             return FSResult(True, f"已删除: {name}")
         return FSResult(False, "删除失败")
     
@@ -265,12 +489,38 @@ class VirtualFileSystem:
         
         # 简单重命名（同目录下）
         if "/" not in dst:
-            if self.db.rename_vfs_node(src_id, dst):
+            node = self.db.get_vfs_node(src_id)
+            if node and self.db.rename_vfs_node(src_id, dst):
+                self.names.invalidate(node['parent_id'])
                 return FSResult(True, f"已重命名: {src} -> {dst}")
             return FSResult(False, f"目标已存在: {dst}")
         
         return FSResult(False, "暂不支持跨目录移动")
     
+    def complete(self, path: str) -> list[tuple[str, bool]]:
+        """
+        路径补全
+        
+        Returns:
+            以 path 最后一段为前缀的 (完整路径, 是否目录)，按名称排序；
+            路径的目录部分不存在时为空列表
+        """
+        head, sep, prefix = path.rpartition("/")
+        if sep:
+            directory = head or "/"
+            node_id, _, exists = self._resolve_path(directory)
+            if not exists:
+                return []
+            if node_id is not None:
+                node = self.db.get_vfs_node(node_id)
+                if not node or not node['is_directory']:
+                    return []
+        else:
+            node_id = self._current_node_id
+        
+        base = head + sep
+        return [(base + name, is_dir) for name, is_dir in self.names.match(node_id, prefix)]
+    
     def pwd(self) -> str:
         """返回当前工作目录"""
         return self._current_path
@@ -315,6 +565,91 @@ class VirtualFileSystem:
                     current_depth + 1
                 )
     
+    def export_archive(self, path: str, host_file: Path) -> FSResult:
+        """把路径指向的文件或目录 (含子目录) 导出为主机上的 tar 包"""
+        import tarfile
+        from src.systems.archive import write_archive
+        
+        node_id, resolved_path, exists = self._resolve_path(path)
+        if not exists:
+            return FSResult(False, f"不存在: {path}")
+        try:
+            stats = write_archive(self.db, self.user_id, node_id, host_file)
+        except (OSError, tarfile.TarError) as e:
+            return FSResult(False, f"导出失败: {e}")
+        return FSResult(True, f"已导出 {resolved_path} -> {host_file.name}: {stats}", stats)
+    
+    def import_archive(self, host_file: Path, path: str = "") -> FSResult:
+        """把主机上的 tar 包导入到目录 path (默认当前目录)"""
+        import tarfile
+        from src.systems.archive import ArchiveError, read_archive
+        
+        node_id, resolved_path, exists = self._resolve_path(path)
+        if not exists:
+            return FSResult(False, f"目录不存在: {resolved_path}")
+        if node_id is not None:
+            node = self.db.get_vfs_node(node_id)
+            if not node or not node['is_directory']:
+                return FSResult(False, f"不是目录: {resolved_path}")
+        if not host_file.is_file():
+            return FSResult(False, f"归档不存在: {host_file.name}")
+        
+        try:
+            stats = read_archive(self.db, self.user_id, node_id, host_file)
+        except (ArchiveError, OSError, tarfile.TarError) as e:
+            return FSResult(False, f"导入失败: {e}")
+        finally:
+            self.names.clear()
+        return FSResult(True, f"已导入 {host_file.name} -> {resolved_path}: {stats}", stats)
+    
+    def snapshot(self, name: str | None = None) -> FSResult:
+        """
+        为整个文件树拍快照
+        
+        写时复制: 只记录快照时间点，之后修改的节点才保存修改前的状态
+        """
+        name = name or datetime.now().strftime("%Y%m%d-%H%M%S")
+        if self.db.create_vfs_snapshot(self.user_id, name) is None:
+            return FSResult(False, f"快照已存在: {name}")
+        pruned = self.db.prune_vfs_snapshots(self.user_id, SNAPSHOT_RETENTION)
+        message = f"已创建快照: {name}"
+        if pruned:
+            message += f" (删除了 {pruned} 个最旧的快照)"
+        return FSResult(True, message)
+    
+    def snapshots(self) -> FSResult:
+        """列出快照 (从旧到新)"""
+        return FSResult(True, "", self.db.get_vfs_snapshots(self.user_id))
+    
+    def _find_snapshot(self, name: str) -> dict | None:
+        """按名称或序号 (snapshots 列出的编号，从 1 开始) 查找快照"""
+        snapshots = self.db.get_vfs_snapshots(self.user_id)
+        for snapshot in snapshots:
+            if snapshot['name'] == name:
+                return snapshot
+        if name.isdigit() and 1 <= int(name) <= len(snapshots):
+            return snapshots[int(name) - 1]
+        return None
+    
+    def restore(self, name: str) -> FSResult:
+        """恢复到快照时的状态；该快照之后的快照会被删除"""
+        snapshot = self._find_snapshot(name)
+        if snapshot is None:
+            return FSResult(False, f"快照不存在: {name}")
+        if not self.db.restore_vfs_snapshot(self.user_id, snapshot['id']):
+            return FSResult(False, "恢复失败")
+        
+        self.names.clear()
+        # 当前目录可能在快照之后才创建
+        if not self.cd(self._current_path).success:
+            self.cd("")
+        return FSResult(True, f"已恢复到快照: {snapshot['name']}")
+    
+    def prune_snapshots(self, keep: int) -> FSResult:
+        """只保留最近的 keep 个快照"""
+        pruned = self.db.prune_vfs_snapshots(self.user_id, keep)
+        return FSResult(True, f"已删除 {pruned} 个快照")
+    
     def init_default_structure(self) -> None:
         """初始化默认目录结构"""
         # 创建默认目录
@@ -336,3 +671,4 @@ class VirtualFileSystem:
             is_directory=False,
             content="欢迎来到算界！\n\n这是你的个人空间，你可以在这里存储文件和数据。\n\n使用 help 命令查看可用操作。"
         )
+        self.names.invalidate(None)
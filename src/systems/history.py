@@ -0,0 +1,171 @@
+"""
+命令历史
+每个用户一个只追加的日志文件 (每行一条命令)，写入按批合并；
+条数超过上限一定比例后压缩为最近的 max_entries 条。
+反向搜索的索引: 每 BLOCK 条命令用换行拼接为一个字符串并记录每条的起始偏移，
+搜索时在 C 层用 rfind 从新到旧查找，再二分偏移得到命令下标
+"""
+import os
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+
+
+# 含密码的命令只保留在内存中，不写入文件
+PRIVATE_COMMANDS = ("login", "register")
+
+
+def _is_private(command: str) -> bool:
+    return command.split(None, 1)[0].lower() in PRIVATE_COMMANDS
+
+
+# 搜索索引每块的命令条数
+BLOCK = 4096
+
+
+class CommandHistory:
+    """
+    命令历史
+    
+    用法:
+        history = CommandHistory(Path("save/history/alice.log"))
+        history.append("ls /home")
+        index = history.search("home")   # 最近一条包含 "home" 的命令的下标
+        history.close()
+    """
+    
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        max_entries: int = 100_000,
+        flush_every: int = 32
+    ):
+        """
+        Args:
+            path: 日志文件，None 表示只保存在内存中
+            max_entries: 保留的最大条数
+            flush_every: 累计多少条新命令写一次文件
+        """
+        self.path = Path(path) if path is not None else None
+        self.max_entries = max(1, max_entries)
+        self.flush_every = max(1, flush_every)
+        self.entries: list[str] = []
+        self._pending: list[str] = []
+        self._file_lines = 0
+        # 搜索索引: 每块为 (拼接后的文本, 每条命令的起始偏移)，首次搜索时才建立；
+        # 最后一块未满时在追加后作废重建
+        self._blocks: list[tuple[str, array] | None] = []
+        if self.path is not None:
+            self._load()
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def __getitem__(self, index: int) -> str:
+        return self.entries[index]
+    
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return
+        self._file_lines = len(lines)
+        self.entries = [line for line in lines[-self.max_entries:] if line]
+        if self._file_lines > self.max_entries * 1.5:
+            self._compact()
+    
+    # ==================== 写入 ====================
+    
+    def append(self, command: str) -> None:
+        """记录一条命令 (与上一条相同时忽略)"""
+        command = command.replace("\n", " ").strip()
+        if not command or (self.entries and self.entries[-1] == command):
+            return
+        self.entries.append(command)
+        block = (len(self.entries) - 1) // BLOCK
+        if block < len(self._blocks):
+            self._blocks[block] = None
+        
+        if self.path is not None and not _is_private(command):
+            self._pending.append(command)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+        
+        if len(self.entries) > self.max_entries * 1.5:
+            self._trim()
+    
+    def flush(self) -> None:
+        """把缓冲中的命令追加到文件"""
+        if not self._pending or self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._pending) + "\n")
+        self._file_lines += len(self._pending)
+        self._pending.clear()
+        if self._file_lines > self.max_entries * 1.5:
+            self._compact()
+    
+    def _compact(self) -> None:
+        """文件只保留最近的 max_entries 条 (写临时文件后原子替换)"""
+        lines = [entry for entry in self.entries if not _is_private(entry)][-self.max_entries:]
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            if lines:
+                f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
+        self._file_lines = len(lines)
+    
+    def _trim(self) -> None:
+        """内存中只保留最近的 max_entries 条"""
+        del self.entries[:-self.max_entries]
+        self._blocks = []
+    
+    def close(self) -> None:
+        self.flush()
+    
+    # ==================== 搜索 ====================
+    
+    def _block(self, block: int) -> tuple[str, array]:
+        """第 block 块的文本与起始偏移"""
+        while len(self._blocks) <= block:
+            self._blocks.append(None)
+        cached = self._blocks[block]
+        if cached is None:
+            entries = self.entries[block * BLOCK:(block + 1) * BLOCK]
+            starts = array("I")
+            offset = 0
+            for entry in entries:
+                starts.append(offset)
+                offset += len(entry) + 1
+            cached = self._blocks[block] = ("\n".join(entries), starts)
+        return cached
+    
+    def search(self, query: str, before: int | None = None) -> int | None:
+        """
+        反向搜索
+        
+        Returns:
+            下标小于 before (默认从最新一条开始) 且包含 query 的最近一条命令的下标，没有时返回 None
+        """
+        entries = self.entries
+        if before is None or before > len(entries):
+            before = len(entries)
+        if before <= 0:
+            return None
+        if not query:
+            return before - 1
+        if "\n" in query:
+            return None
+        
+        for block in range((before - 1) // BLOCK, -1, -1):
+            text, starts = self._block(block)
+            local = before - block * BLOCK
+            # 只在 before 之前的命令中查找；命令之间以换行分隔，匹配不会跨越两条命令
+            limit = starts[local] - 1 if local < len(starts) else len(text)
+            pos = text.rfind(query, 0, limit)
+            if pos >= 0:
+                return block * BLOCK + bisect_right(starts, pos) - 1
+            before = block * BLOCK
+        return None
@@ -0,0 +1,156 @@
+"""
+掉落结算
+把每个敌人的掉落表预编译为扁平数组，一批击杀 (范围技能清场、离线收益等)
+只做一次随机数抽取，统一结算
+"""
+import random
+from collections import Counter
+from typing import Iterable
+
+from src.data.index import GameIndex
+
+
+# 掉落概率精度 1/65536: 每次击杀用两个随机字节 (高位、低位) 与阈值比较
+_SCALE = 1 << 16
+# 查表的数量区间最多 256 档 (每次击杀一个随机字节)，更宽的区间逐个 randrange
+MAX_COUNT_SPAN = 256
+
+# 同种敌人击杀数低于该值时逐个比较
+_SMALL_GROUP = 8
+
+# _AT_LEAST[t]: 值 >= t 的全部字节，translate 删除后剩下的就是 < t 的字节
+_AT_LEAST = [bytes(range(t, 256)) for t in range(257)]
+
+
+class LootTable:
+    """
+    预编译的掉落表
+    
+    所有敌人的掉落项依次排在同一组列表中，敌人 e 的掉落项为 slots[e]
+    """
+    
+    def __init__(self, index: GameIndex):
+        self.thresholds: list[int] = []          # chance * 65536
+        self.items: list[int] = []               # 物品句柄
+        self.count_min: list[int] = []
+        # 随机字节 -> 额外数量 (0 .. count_max - count_min)，None 表示数量固定或区间过宽
+        self.count_tables: list[bytes | None] = []
+        # 超过 MAX_COUNT_SPAN 档的数量区间宽度，其余为 0
+        self.wide_spans: list[int] = []
+        self.slots: list[range] = []
+        
+        tables: dict[int, bytes] = {}
+        for drops in index.enemy_drops:
+            start = len(self.items)
+            for drop in drops:
+                chance = min(max(drop.chance, 0.0), 1.0)
+                self.thresholds.append(round(chance * _SCALE))
+                self.items.append(drop.item)
+                self.count_min.append(drop.count_min)
+                span = max(drop.count_max - drop.count_min, 0) + 1
+                self.wide_spans.append(span if span > MAX_COUNT_SPAN else 0)
+                if span == 1 or span > MAX_COUNT_SPAN:
+                    self.count_tables.append(None)
+                else:
+                    if span not in tables:
+                        tables[span] = bytes((b * span) >> 8 for b in range(256))
+                    self.count_tables.append(tables[span])
+            self.slots.append(range(start, len(self.items)))
+
+
+class LootEngine:
+    """
+    批量掉落结算
+    
+    用法:
+        engine = LootEngine(get_game_index(), seed=42)
+        loot = engine.roll([enemy] * 30)   # {物品句柄: 数量}
+    
+    相同种子、相同击杀序列得到相同结果
+    """
+    
+    def __init__(self, index: GameIndex, seed: int | None = None):
+        self.table = LootTable(index)
+        self.rng = random.Random(seed)
+    
+    def roll(self, kills: Iterable[int]) -> dict[int, int]:
+        """
+        结算一批击杀的掉落
+        
+        先按敌人种类合并击杀数，一次抽取全部随机字节；
+        每个掉落项的比较、计数都由 bytes.translate / find / sum 在 C 层完成，
+        不逐个击杀循环
+        
+        Args:
+            kills: 被击杀敌人的句柄 (可重复)
+        
+        Returns:
+            物品句柄 -> 掉落总数
+        """
+        table = self.table
+        groups = [(table.slots[enemy], n) for enemy, n in Counter(kills).items()]
+        draws = sum(len(slots) * n for slots, n in groups)
+        if not draws:
+            return {}
+        
+        # 每个掉落项每次击杀三个随机字节: 概率高位、概率低位、数量
+        buffer = self.rng.randbytes(3 * draws)
+        thresholds, items = table.thresholds, table.items
+        count_min, count_tables = table.count_min, table.count_tables
+        wide_spans, randrange = table.wide_spans, self.rng.randrange
+        
+        loot: Counter[int] = Counter()
+        offset = 0
+        for slots, n in groups:
+            if n < _SMALL_GROUP:
+                # 同种敌人很少时逐个比较，省去切片和 translate 的固定开销
+                for slot in slots:
+                    threshold, counts, wide = thresholds[slot], count_tables[slot], wide_spans[slot]
+                    for i in range(offset, offset + n):
+                        if (buffer[i] << 8 | buffer[i + n]) < threshold:
+                            if counts is not None:
+                                extra = counts[buffer[i + 2 * n]]
+                            else:
+                                extra = randrange(wide) if wide else 0
+                            loot[items[slot]] += count_min[slot] + extra
+                    offset += 3 * n
+                continue
+            for slot in slots:
+                high = buffer[offset:offset + n]
+                low = buffer[offset + n:offset + 2 * n]
+                amounts = buffer[offset + 2 * n:offset + 3 * n]
+                offset += 3 * n
+                
+                hits = _count_below(high, low, thresholds[slot])
+                if not hits:
+                    continue
+                total = hits * count_min[slot]
+                if count_tables[slot] is not None:
+                    # 数量与是否掉落相互独立，直接取前 hits 个字节
+                    total += sum(amounts[:hits].translate(count_tables[slot]))
+                elif wide_spans[slot]:
+                    # 区间超过一个字节能表示的档数，逐个抽取
+                    total += sum(randrange(wide_spans[slot]) for _ in range(hits))
+                loot[items[slot]] += total
+        return dict(loot)
+    
+    def roll_enemy(self, enemy: int, kills: int = 1) -> dict[int, int]:
+        """同一种敌人被击杀 kills 次的掉落"""
+        return self.roll([enemy] * kills)
+
+
+def _count_below(high: bytes, low: bytes, threshold: int) -> int:
+    """统计 (high[i] << 8 | low[i]) < threshold 的个数"""
+    if threshold >= _SCALE:
+        return len(high)
+    t_high, t_low = divmod(threshold, 256)
+    count = len(high.translate(None, _AT_LEAST[t_high]))
+    if t_low:
+        # 高位恰好相等的 (约 1/256) 再比较低位
+        marker = t_high.to_bytes(1, "little")
+        i = high.find(marker)
+        while i != -1:
+            if low[i] < t_low:
+                count += 1
+            i = high.find(marker, i + 1)
+    return count
@@ -0,0 +1,204 @@
+"""
+寻路
+- astar(): 单个单位的一次性寻路
+- FlowField: 以目标为中心、半径 radius 的窗口内做一次 BFS，
+  记录每格到目标的步数；所有追击同一目标的敌人共用，每个敌人每帧 O(1) 取下一步
+- FlowFieldCache: 按 (地图, 目标位置) 缓存流场，地图 version 变化 (开关门等) 时重建
+
+移动为四方向，每步代价 1
+"""
+import heapq
+from array import array
+from collections import OrderedDict, deque
+
+import esper
+
+from src.components.ai import Chaser
+from src.components.base import Position
+from src.data.maps import BLOCKS_MOVE, GameMap
+
+
+# 四方向
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+# 不可达
+UNREACHABLE = 0xFFFF
+
+
+def astar(
+    game_map: GameMap,
+    start: tuple[int, int],
+    goal: tuple[int, int],
+    max_nodes: int = 20000
+) -> list[tuple[int, int]] | None:
+    """
+    A* 寻路
+    
+    Returns:
+        从起点 (不含) 到终点 (含) 的路径；不可达或展开节点超过 max_nodes 时返回 None
+    """
+    if start == goal:
+        return []
+    if not game_map.passable(*goal):
+        return None
+    
+    gx, gy = goal
+    came_from: dict[tuple[int, int], tuple[int, int]] = {}
+    cost = {start: 0}
+    frontier = [(abs(start[0] - gx) + abs(start[1] - gy), 0, start)]
+    passable = game_map.passable
+    expanded = 0
+    
+    while frontier:
+        _, g, current = heapq.heappop(frontier)
+        if current == goal:
+            path = []
+            while current != start:
+                path.append(current)
+                current = came_from[current]
+            path.reverse()
+            return path
+        if g > cost[current]:
+            continue
+        expanded += 1
+        if expanded > max_nodes:
+            return None
+        
+        x, y = current
+        for dx, dy in DIRECTIONS:
+            nxt = (x + dx, y + dy)
+            if nxt in cost and cost[nxt] <= g + 1:
+                continue
+            if not passable(*nxt):
+                continue
+            cost[nxt] = g + 1
+            came_from[nxt] = current
+            heapq.heappush(frontier, (g + 1 + abs(nxt[0] - gx) + abs(nxt[1] - gy), g + 1, nxt))
+    return None
+
+
+class FlowField:
+    """
+    以 target 为中心的距离场
+    
+    窗口为 (2 * radius + 1) 的正方形，窗口外视为不可达
+    """
+    
+    def __init__(self, game_map: GameMap, target: tuple[int, int], radius: int = 64):
+        self.target = target
+        self.radius = radius
+        self.version = game_map.version
+        self.size = size = 2 * radius + 1
+        self.x0, self.y0 = target[0] - radius, target[1] - radius
+        
+        # 窗口内的地形按行读出，再通过查表转换为是否阻挡
+        blocked = b"".join(
+            game_map.row(self.y0 + row, self.x0, self.x0 + size) for row in range(size)
+        ).translate(BLOCKS_MOVE)
+        self.distance = distance = array("H", [UNREACHABLE]) * (size * size)
+        
+        start = radius * size + radius
+        if blocked[start]:
+            return
+        distance[start] = 0
+        queue = deque([start])
+        pop, push = queue.popleft, queue.append
+        while queue:
+            index = pop()
+            step = distance[index] + 1
+            column = index % size
+            # 左右不能跨行
+            if column + 1 < size and distance[index + 1] == UNREACHABLE and not blocked[index + 1]:
+                distance[index + 1] = step
+                push(index + 1)
+            if column > 0 and distance[index - 1] == UNREACHABLE and not blocked[index - 1]:
+                distance[index - 1] = step
+                push(index - 1)
+            down, up = index + size, index - size
+            if down < size * size and distance[down] == UNREACHABLE and not blocked[down]:
+                distance[down] = step
+                push(down)
+            if up >= 0 and distance[up] == UNREACHABLE and not blocked[up]:
+                distance[up] = step
+                push(up)
+    
+    def distance_at(self, x: int, y: int) -> int:
+        """到目标的步数，不可达或在窗口外时为 UNREACHABLE"""
+        column, row = x - self.x0, y - self.y0
+        if not (0 <= column < self.size and 0 <= row < self.size):
+            return UNREACHABLE
+        return self.distance[row * self.size + column]
+    
+    def next_step(self, x: int, y: int) -> tuple[int, int] | None:
+        """朝目标走一步后的位置；已到达或不可达时返回 None"""
+        best, best_distance = None, self.distance_at(x, y)
+        if best_distance == 0:
+            return None
+        for dx, dy in DIRECTIONS:
+            d = self.distance_at(x + dx, y + dy)
+            if d < best_distance:
+                best, best_distance = (x + dx, y + dy), d
+        return best
+
+
+class FlowFieldCache:
+    """
+    流场缓存
+    
+    每个 (地图, 目标位置) 只在地图修改后重建一次；最多保留 capacity 个流场
+    """
+    
+    def __init__(self, radius: int = 64, capacity: int = 32):
+        self.radius = radius
+        self.capacity = capacity
+        self._fields: OrderedDict[tuple[str, int, int], FlowField] = OrderedDict()
+        self.builds = 0
+    
+    def get(self, game_map: GameMap, target: tuple[int, int]) -> FlowField:
+        key = (game_map.id, target[0], target[1])
+        field = self._fields.get(key)
+        if field is not None and field.version == game_map.version:
+            self._fields.move_to_end(key)
+            return field
+        
+        field = FlowField(game_map, target, self.radius)
+        self.builds += 1
+        self._fields[key] = field
+        self._fields.move_to_end(key)
+        while len(self._fields) > self.capacity:
+            self._fields.popitem(last=False)
+        return field
+    
+    def clear(self) -> None:
+        self._fields.clear()
+
+
+class ChaseProcessor(esper.Processor):
+    """
+    追击: 带 Chaser 组件的实体每帧沿目标的流场前进一格
+    
+    每帧的开销 = 每个不同目标最多一次 BFS (地图或目标位置变化时) + 每个追击者 O(1)
+    """
+    
+    def __init__(self, game_map: GameMap, cache: FlowFieldCache | None = None, occupied=None):
+        """
+        Args:
+            game_map: 地图
+            cache: 流场缓存，默认新建
+            occupied: (x, y) -> bool，判断格子是否已被占用 (如 SpatialIndex.occupied)
+        """
+        self.map = game_map
+        self.cache = cache or FlowFieldCache()
+        self.occupied = occupied
+    
+    def process(self, *args, **kwargs) -> None:
+        occupied = self.occupied
+        for _, (pos, chaser) in esper.get_components(Position, Chaser):
+            target = esper.try_component(chaser.target, Position)
+            if target is None:
+                continue
+            step = self.cache.get(self.map, (target.x, target.y)).next_step(pos.x, pos.y)
+            if step is None or step == (target.x, target.y):
+                continue
+            if occupied is not None and occupied(*step):
+                continue
+            pos.x, pos.y = step
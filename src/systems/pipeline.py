@@ -0,0 +1,216 @@
+"""
+管道与重定向
+`cat a | grep x | head -n 5 > b`: 每个命令接收上一个命令的行迭代器并返回新的行迭代器，
+整条管道是惰性的，只有终端翻页或写入文件时才逐行取出，大输出不会整体驻留内存
+"""
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterator
+
+from src.systems.filesystem import VirtualFileSystem
+
+
+class PipelineError(Exception):
+    """管道语法错误或命令参数错误"""
+
+
+@dataclass(slots=True)
+class Pipeline:
+    """解析后的管道"""
+    stages: list[list[str]] = field(default_factory=list)
+    target: str | None = None  # 重定向目标文件
+    append: bool = False  # >> 追加
+
+
+# 可以用在管道中的命令 (与 StreamCommands.commands 一致)
+STREAM_COMMANDS = frozenset({"cat", "echo", "grep", "head", "ls", "pwd", "tail", "wc"})
+
+
+def is_pipeline(command: str) -> bool:
+    """
+    命令是否包含管道或重定向
+    
+    只有以管道命令开头时才把 | 和 > 当作运算符，
+    register / login 等命令的参数 (如密码) 中可以包含这些字符
+    """
+    if "|" not in command and ">" not in command:
+        return False
+    name = re.match(r"[^\s|>]*", command.strip()).group()
+    return name.lower() in STREAM_COMMANDS
+
+
+def parse_pipeline(command: str) -> Pipeline:
+    """
+    解析 `命令 | 命令 ... [> 文件 | >> 文件]`
+    
+    Raises:
+        PipelineError: 语法错误
+    """
+    pipeline = Pipeline()
+    body = command
+    index = command.find(">")
+    if index >= 0:
+        pipeline.append = command.startswith(">>", index)
+        operator = ">>" if pipeline.append else ">"
+        body, target = command[:index], command[index + len(operator):]
+        targets = target.split()
+        if len(targets) != 1 or ">" in target or "|" in target:
+            raise PipelineError(f"{operator} 之后需要且只能有一个文件名")
+        pipeline.target = targets[0]
+    
+    for stage in body.split("|"):
+        args = stage.split()
+        if not args:
+            raise PipelineError("管道中存在空命令")
+        pipeline.stages.append(args)
+    return pipeline
+
+
+def _split_count(args: list[str], name: str, default: int = 10) -> tuple[int, list[str]]:
+    """解析 [-n 行数]"""
+    if args and args[0] == "-n":
+        if len(args) < 2 or not args[1].isdigit():
+            raise PipelineError(f"用法: {name} [-n 行数] [文件名]")
+        return int(args[1]), args[2:]
+    return default, args
+
+
+class StreamCommands:
+    """
+    可以用在管道中的命令
+    
+    每个命令为 (参数, 上一个命令的输出或 None) -> 行迭代器；输出为纯文本 (不含 Rich markup)
+    """
+    
+    def __init__(self, vfs: VirtualFileSystem):
+        self.vfs = vfs
+        self.commands: dict[str, Callable[[list[str], Iterator[str] | None], Iterator[str]]] = {
+            "cat": self.cat,
+            "echo": self.echo,
+            "grep": self.grep,
+            "head": self.head,
+            "ls": self.ls,
+            "pwd": self.pwd,
+            "tail": self.tail,
+            "wc": self.wc,
+        }
+    
+    def run(self, stages: list[list[str]]) -> Iterator[str]:
+        """
+        串联各个命令
+        
+        参数错误、文件不存在等在建立管道时就会抛出 PipelineError，此时还没有读取任何数据
+        """
+        stream: Iterator[str] | None = None
+        for name, *args in stages:
+            command = self.commands.get(name.lower())
+            if command is None:
+                raise PipelineError(f"不能在管道中使用: {name}")
+            stream = command(args, stream)
+        return stream
+    
+    def _open(self, args: list[str], stdin: Iterator[str] | None, usage: str) -> Iterator[str]:
+        """输入来源: 指定了文件时读取文件，否则使用上一个命令的输出"""
+        if args:
+            result = self.vfs.iter_lines(args[0])
+            if not result.success:
+                raise PipelineError(result.message)
+            return result.data
+        if stdin is None:
+            raise PipelineError(usage)
+        return stdin
+    
+    # ==================== 命令 ====================
+    
+    def cat(self, args: list[str], stdin: Iterator[str] | None) -> Iterator[str]:
+        return self._open(args, stdin, "用法: cat <文件名>")
+    
+    def echo(self, args: list[str], stdin: Iterator[str] | None) -> Iterator[str]:
+        return iter([" ".join(args)])
+    
+    def ls(self, args: list[str], stdin: Iterator[str] | None) -> Iterator[str]:
+        result = self.vfs.iter_dir(args[0] if args else "")
+        if not result.success:
+            raise PipelineError(result.message)
+        return (
+            f"{item['name']}/" if item['is_directory'] else item['name']
+            for item in result.data
+        )
+    
+    def pwd(self, args: list[str], stdin: Iterator[str] | None) -> Iterator[str]:
+        return iter([self.vfs.pwd()])
+    
+    def head(self, args: list[str], stdin: Iterator[str] | None) -> Iterator[str]:
+        count, args = _split_count(args, "head")
+        # 取够行数后不再从上游读取
+        return islice(self._open(args, stdin, "用法: head [-n 行数] <文件名>"), count)
+    
+    def tail(self, args: list[str], stdin: Iterator[str] | None) -> Iterator[str]:
+        count, args = _split_count(args, "tail")
+        if args:
+            # 文件从末尾向前读，不必读取整个文件
+            result = self.vfs.tail(args[0], count)
+            if not result.success:
+                raise PipelineError(result.message)
+            return iter(result.data)
+        if stdin is None:
+            raise PipelineError("用法: tail [-n 行数] <文件名>")
+        
+        def last_lines() -> Iterator[str]:
+            # 只保留最后 count 行
+            yield from deque(stdin, maxlen=count)
+        return last_lines()
+    
+    def grep(self, args: list[str], stdin: Iterator[str] | None) -> Iterator[str]:
+        usage = "用法: grep [-i] [-v] [-c] <模式> [文件名]"
+        flags = set()
+        while args and args[0] in ("-i", "-v", "-c"):
+            flags.add(args.pop(0))
+        if not args:
+            raise PipelineError(usage)
+        try:
+            pattern = re.compile(args[0], re.IGNORECASE if "-i" in flags else 0)
+        except re.error as e:
+            raise PipelineError(f"无效的模式: {args[0]} ({e})")
+        source = self._open(args[1:], stdin, usage)
+        
+        search, invert = pattern.search, "-v" in flags
+        matches = (line for line in source if (search(line) is None) == invert)
+        if "-c" not in flags:
+            return matches
+        
+        def count() -> Iterator[str]:
+            yield str(sum(1 for _ in matches))
+        return count()
+    
+    def wc(self, args: list[str], stdin: Iterator[str] | None) -> Iterator[str]:
+        usage = "用法: wc [-l | -w | -c] [文件名]"
+        mode = None
+        if args and args[0] in ("-l", "-w", "-c"):
+            mode, args = args[0], args[1:]
+        source = self._open(args, stdin, usage)
+        
+        def count() -> Iterator[str]:
+            lines = words = chars = 0
+            line = None
+            for line in source:
+                lines += 1
+                words += len(line.split())
+                chars += len(line) + 1
+            # 最后一行没有换行符
+            chars = max(0, chars - 1)
+            # 以换行结尾的内容最后会多出一个空行，它不算一行
+            if line == "":
+                lines -= 1
+            match mode:
+                case "-l":
+                    yield str(lines)
+                case "-w":
+                    yield str(words)
+                case "-c":
+                    yield str(chars)
+                case _:
+                    yield f"{lines} {words} {chars}"
+        return count()
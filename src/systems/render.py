@@ -0,0 +1,167 @@
+"""
+渲染系统 (ECS)
+每帧合成视口内的地形与实体，与上一帧比较 (地形逐行、实体逐格)，
+只把变化的矩形交给 GameGrid 重绘
+"""
+import esper
+
+from src.components.base import Glyph, Position
+from src.data.maps import CHUNK, GameMap
+from src.widgets.game_grid import GameGrid, Palette
+
+
+def _diff_span(old: bytes, new: bytes) -> tuple[int, int]:
+    """两行 (等长) 第一个与最后一个不同位置，返回 [start, end)"""
+    # 二分查找公共前缀 / 后缀，比较都在 C 层完成
+    low, high = 0, len(new)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old[:mid] == new[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    start = low
+    low, high = 0, len(new) - start
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            low = mid
+        else:
+            high = mid - 1
+    return start, len(new) - low
+
+
+class RenderSystem(esper.Processor):
+    """
+    视口渲染
+    
+    用法:
+        render = RenderSystem(game_map, 80, 24, grid)
+        esper.add_processor(render)
+        render.center_on(player.x, player.y)
+        esper.process()
+    """
+    
+    def __init__(
+        self,
+        game_map: GameMap,
+        width: int,
+        height: int,
+        grid: GameGrid | None = None,
+        preload: int = 1
+    ):
+        """
+        Args:
+            game_map: 地图
+            width / height: 视口大小
+            grid: 输出目标，None 时只计算脏矩形 (无界面运行 / 测试)
+            preload: 视口四周额外保留的区块圈数
+        """
+        self.map = game_map
+        self.width = width
+        self.height = height
+        self.grid = grid
+        self.palette = grid.palette if grid is not None else Palette()
+        self.preload = preload
+        self.camera_x = 0
+        self.camera_y = 0
+        self.frame: list[bytes] = []  # 上一帧的单元格编码
+        self._overlay: dict[tuple[int, int], int] = {}
+        self._terrain_key: tuple | None = None  # (相机位置, 地图版本)
+        self._terrain: list[bytes] = []
+        self._frame_camera: tuple[int, int] | None = None
+        self.dirty: list[tuple[int, int, int, int]] | None = None  # 上一帧的脏矩形，None 表示整屏
+    
+    def center_on(self, x: int, y: int) -> None:
+        """移动相机使 (x, y) 位于视口中央"""
+        self.camera_x = x - self.width // 2
+        self.camera_y = y - self.height // 2
+    
+    def _compose_terrain(self) -> list[bytes]:
+        """读取视口内的地形 (相机或地形不变时复用)"""
+        key = (self.camera_x, self.camera_y, self.map.version)
+        if key != self._terrain_key:
+            x0, y0 = self.camera_x, self.camera_y
+            margin = self.preload * CHUNK
+            self.map.retain(x0 - margin, y0 - margin, x0 + self.width + margin, y0 + self.height + margin)
+            self._terrain = [self.map.row(y0 + y, x0, x0 + self.width) for y in range(self.height)]
+            self._terrain_key = key
+        return self._terrain
+    
+    def _compose_overlay(self) -> dict[tuple[int, int], int]:
+        """视口内的实体字形: (x, y) -> 编码"""
+        x0, y0 = self.camera_x, self.camera_y
+        width, height = self.width, self.height
+        code = self.palette.code
+        overlay = {}
+        for _, (pos, glyph) in esper.get_components(Position, Glyph):
+            x, y = pos.x - x0, pos.y - y0
+            if 0 <= x < width and 0 <= y < height:
+                overlay[x, y] = code(glyph.char, glyph.color)
+        return overlay
+    
+    def process(self, *args, **kwargs) -> None:
+        previous_terrain = self._terrain
+        terrain = self._compose_terrain()
+        previous_overlay = self._overlay
+        overlay = self._overlay = self._compose_overlay()
+        camera = (self.camera_x, self.camera_y)
+        moved, self._frame_camera = camera != self._frame_camera, camera
+        
+        frame = list(terrain)
+        rows: dict[int, bytearray] = {}
+        for (x, y), code in overlay.items():
+            row = rows.get(y)
+            if row is None:
+                row = rows[y] = bytearray(terrain[y])
+            row[x] = code
+        for y, row in rows.items():
+            frame[y] = bytes(row)
+        self.frame = frame
+        
+        if moved or len(previous_terrain) != len(terrain):
+            # 相机移动后整个视口都变了
+            self.dirty = None
+        else:
+            spans: dict[int, list[tuple[int, int]]] = {}
+            # 地形变化 (开关门等): 逐行比较
+            if terrain is not previous_terrain:
+                for y, (old, new) in enumerate(zip(previous_terrain, terrain)):
+                    if old != new:
+                        spans.setdefault(y, []).append(_diff_span(old, new))
+            # 实体变化: 新旧字形不同的格子
+            for cell in previous_overlay.keys() | overlay.keys():
+                if previous_overlay.get(cell) != overlay.get(cell):
+                    x, y = cell
+                    spans.setdefault(y, []).append((x, x + 1))
+            self.dirty = _merge_spans(spans)
+        
+        if self.grid is not None:
+            self.grid.update_grid(frame, self.dirty)
+
+
+def _merge_spans(spans: dict[int, list[tuple[int, int]]]) -> list[tuple[int, int, int, int]]:
+    """把每行的变化区间合并为矩形 (x, y, 宽, 高)"""
+    rects = []
+    open_rects: dict[tuple[int, int], int] = {}  # (x, 宽) -> rects 中的下标 (上一行的矩形)
+    for y in sorted(spans):
+        merged: list[list[int]] = []
+        for start, end in sorted(spans[y]):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        next_open = {}
+        for start, end in merged:
+            key = (start, end - start)
+            index = open_rects.get(key)
+            # 与上一行列范围相同的矩形向下延伸
+            if index is not None and rects[index][1] + rects[index][3] == y:
+                x, top, w, h = rects[index]
+                rects[index] = (x, top, w, h + 1)
+            else:
+                index = len(rects)
+                rects.append((start, y, end - start, 1))
+            next_open[key] = index
+        open_rects = next_open
+    return rects
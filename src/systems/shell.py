@@ -0,0 +1,721 @@
+"""
+命令解释器
+与界面无关的命令路由，终端 Widget 和网络会话共用同一套命令实现
+"""
+import itertools
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Protocol
+
+from rich.markup import escape
+
+from src.data.database import Database, get_database
+from src.systems.auth import AuthSystem
+from src.systems.filesystem import VirtualFileSystem, prefix_range
+from src.systems.pipeline import PipelineError, StreamCommands, is_pipeline, parse_pipeline
+
+
+# 可补全的命令名 (与 execute() 中的路由一致)，按名称排序
+COMMANDS = sorted([
+    "help", "clear", "cls", "exit", "quit", "echo",
+    "register", "login", "logout", "whoami",
+    "pwd", "cd", "ls", "mkdir", "touch", "cat", "head", "tail",
+    "rm", "mv", "write", "tree", "grep", "wc",
+    "snapshot", "snapshots", "restore", "export", "import",
+])
+
+
+class Console(Protocol):
+    """命令输出目标 (Terminal Widget 或网络会话)"""
+    
+    def write_line(self, text: str) -> None: ...
+    
+    def write_error(self, text: str) -> None: ...
+    
+    def write_success(self, text: str) -> None: ...
+    
+    def write_info(self, text: str) -> None: ...
+    
+    def clear(self) -> None: ...
+    
+    def page(self, lines: Iterable[str]) -> None: ...
+    
+    def login(self, username: str, hostname: str = "算界") -> None: ...
+    
+    def logout(self) -> None: ...
+    
+    def set_cwd(self, path: str) -> None: ...
+
+
+class Shell:
+    """
+    命令解释器
+    
+    每个会话持有一个 Shell，拥有独立的 AuthSystem / VirtualFileSystem，
+    多个 Shell 可以共享同一个 Database
+    """
+    
+    def __init__(
+        self,
+        db: Database | None = None,
+        on_exit: Callable[[], None] | None = None,
+        exports_dir: Path | None = None,
+        client: str = "local"
+    ):
+        """
+        Args:
+            exports_dir: export / import 使用的主机目录，默认为存档旁的 exports/
+            client: 客户端地址 (登录限流按地址区分)
+        """
+        self.db = db or get_database()
+        self.auth = AuthSystem(self.db, client=client)
+        self.vfs: VirtualFileSystem | None = None
+        self._on_exit = on_exit
+        self.exports_dir = exports_dir or Path(self.db.db_path).parent / "exports"
+    
+    def show_welcome(self, console: Console) -> None:
+        """显示欢迎信息"""
+        console.write_info("═══════════════════════════════════════")
+        console.write_info("       欢迎来到 [bold]算界[/bold] - 计算之域")
+        console.write_info("═══════════════════════════════════════")
+        console.write_line("")
+        console.write_line("在这里，一切皆可计算...")
+        console.write_line("")
+        console.write_line("请输入 [cyan]register <用户名> <密码>[/cyan] 注册新账户")
+        console.write_line("或输入 [cyan]login <用户名> <密码>[/cyan] 登录已有账户")
+        console.write_line("输入 [cyan]help[/cyan] 查看所有可用命令")
+        console.write_line("")
+    
+    def prerender(self, console: Console) -> None:
+        """写出不随会话状态变化的输出 (帮助信息)，供界面启动后预先解析"""
+        self._show_help(console)
+    
+    def execute(self, console: Console, command: str) -> None:
+        """解析并执行一条命令"""
+        # 未登录时没有文件系统，管道命令按普通命令处理 (echo a>b 原样输出)
+        if self.auth.is_logged_in and is_pipeline(command):
+            self._execute_pipeline(console, command)
+            return
+        
+        parts = command.strip().split()
+        
+        if not parts:
+            return
+        
+        cmd = parts[0].lower()
+        args = parts[1:]
+        
+        # 命令路由
+        match cmd:
+            # === 基础命令 ===
+            case "help":
+                self._show_help(console)
+            case "clear" | "cls":
+                console.clear()
+            case "exit" | "quit":
+                self.close()
+                if self._on_exit:
+                    self._on_exit()
+            case "echo":
+                console.write_line(" ".join(args))
+            
+            # === 用户命令 ===
+            case "register":
+                self._handle_register(console, args)
+            case "login":
+                self._handle_login(console, args)
+            case "logout":
+                self._handle_logout(console)
+            case "whoami":
+                self._handle_whoami(console)
+            
+            # === 文件系统命令 (需要登录) ===
+            case "pwd":
+                self._handle_pwd(console)
+            case "cd":
+                self._handle_cd(console, args)
+            case "ls":
+                self._handle_ls(console, args)
+            case "mkdir":
+                self._handle_mkdir(console, args)
+            case "touch":
+                self._handle_touch(console, args)
+            case "cat":
+                self._handle_cat(console, args)
+            case "head":
+                self._handle_head_tail(console, args, tail=False)
+            case "tail":
+                self._handle_head_tail(console, args, tail=True)
+            case "rm":
+                self._handle_rm(console, args)
+            case "mv":
+                self._handle_mv(console, args)
+            case "write":
+                self._handle_write(console, args)
+            case "tree":
+                self._handle_tree(console)
+            case "grep" | "wc":
+                # 过滤命令没有管道输入时只能读文件，与管道共用实现
+                self._execute_pipeline(console, command)
+            case "snapshot":
+                self._handle_snapshot(console, args)
+            case "snapshots":
+                self._handle_snapshots(console, args)
+            case "restore":
+                self._handle_restore(console, args)
+            case "export":
+                self._handle_export(console, args)
+            case "import":
+                self._handle_import(console, args)
+            
+            case _:
+                console.write_error(f"未知命令: {cmd}")
+                console.write_line("输入 [cyan]help[/cyan] 查看可用命令")
+    
+    def complete(self, line: str) -> tuple[str, list[str]]:
+        """
+        Tab 补全: 第一个词补全命令名，之后的词补全 VFS 路径 (需登录)
+        
+        Returns:
+            (补全后的输入, 候选列表)；唯一匹配时补全整个词，
+            多个匹配时补全到公共前缀并返回候选 (目录带 / 后缀)
+        """
+        head, sep, word = line.rpartition(" ")
+        if not head.strip():
+            start, end = prefix_range(COMMANDS, word)
+            matches = [(name, False) for name in COMMANDS[start:end]]
+        elif self.vfs is not None:
+            matches = self.vfs.complete(word)
+        else:
+            matches = []
+        
+        if not matches:
+            return line, []
+        if len(matches) == 1:
+            text, is_dir = matches[0]
+            return head + sep + text + ("/" if is_dir else " "), []
+        
+        common = os.path.commonprefix([text for text, _ in matches])
+        candidates = [
+            text.rpartition("/")[2] + ("/" if is_dir else "") for text, is_dir in matches
+        ]
+        return head + sep + common, candidates
+    
+    def _execute_pipeline(self, console: Console, command: str) -> None:
+        """执行管道 / 重定向: cat a | grep x | head -n 5 > b"""
+        if not self._require_login(console):
+            return
+        
+        try:
+            pipeline = parse_pipeline(command)
+            # 先建立整条管道再打开重定向目标，参数有误时不会清空目标文件
+            stream = StreamCommands(self.vfs).run(pipeline.stages)
+        except PipelineError as e:
+            console.write_error(str(e))
+            return
+        
+        if pipeline.target is not None:
+            result = self.vfs.write_lines(pipeline.target, stream, pipeline.append)
+            if result.success:
+                console.write_success(result.message)
+            else:
+                console.write_error(result.message)
+            return
+        
+        # 输出到终端: 分页显示，翻页时才继续从管道中取行
+        lines = _peek(stream)
+        if lines is not None:
+            console.page(escape(line) for line in lines)
+    
+    def close(self) -> None:
+        """会话结束时保存当前路径"""
+        if self.auth.is_logged_in:
+            if self.vfs:
+                self.auth.update_current_path(self.vfs.cwd, self.vfs.current_node_id)
+            self.auth.logout()
+            self.vfs = None
+    
+    def _require_login(self, console: Console) -> bool:
+        """检查是否已登录"""
+        if not self.auth.is_logged_in:
+            console.write_error("请先登录")
+            console.write_line("使用 [cyan]login <用户名> <密码>[/cyan] 登录")
+            return False
+        return True
+    
+    # ==================== 帮助命令 ====================
+    
+    def _show_help(self, console: Console) -> None:
+        """显示帮助信息"""
+        console.write_line("")
+        console.write_info("═══ 用户命令 ═══")
+        console.write_line("  [cyan]register <用户名> <密码>[/cyan]  - 注册新账户")
+        console.write_line("  [cyan]login <用户名> <密码>[/cyan]     - 登录")
+        console.write_line("  [cyan]logout[/cyan]                    - 登出")
+        console.write_line("  [cyan]whoami[/cyan]                    - 显示当前用户")
+        console.write_line("")
+        console.write_info("═══ 文件命令 (需登录) ═══")
+        console.write_line("  [cyan]pwd[/cyan]                       - 显示当前路径")
+        console.write_line("  [cyan]cd <路径>[/cyan]                 - 切换目录")
+        console.write_line("  [cyan]ls [路径][/cyan]                 - 列出目录内容")
+        console.write_line("  [cyan]mkdir <名称>[/cyan]              - 创建目录")
+        console.write_line("  [cyan]touch <文件名>[/cyan]            - 创建空文件")
+        console.write_line("  [cyan]cat [-c 起:止] <文件名>[/cyan]    - 查看文件内容 (可指定字符范围)")
+        console.write_line("  [cyan]head [-n 行数] <文件名>[/cyan]   - 查看文件开头")
+        console.write_line("  [cyan]tail [-n 行数] <文件名>[/cyan]   - 查看文件末尾")
+        console.write_line("  [cyan]write [-a] <文件名> <内容>[/cyan] - 写入文件 (-a 追加)")
+        console.write_line("  [cyan]rm [-r] <名称>[/cyan]            - 删除文件/目录")
+        console.write_line("  [cyan]mv <源> <目标>[/cyan]            - 重命名")
+        console.write_line("  [cyan]tree[/cyan]                      - 显示目录树")
+        console.write_line("  [cyan]grep [-i] [-v] [-c] <模式> [文件名][/cyan] - 按正则表达式过滤行")
+        console.write_line("  [cyan]wc [-l | -w | -c] [文件名][/cyan] - 统计行数 / 词数 / 字符数")
+        console.write_line("")
+        console.write_info("═══ 管道与重定向 (需登录) ═══")
+        console.write_line("  [cyan]命令 | 命令[/cyan]               - 把前一个命令的输出交给后一个命令")
+        console.write_line("  [cyan]命令 > 文件[/cyan]               - 输出写入文件 (覆盖)")
+        console.write_line("  [cyan]命令 >> 文件[/cyan]              - 输出追加到文件")
+        console.write_line("  可用于管道: cat, echo, grep, head, ls, pwd, tail, wc")
+        console.write_line("")
+        console.write_info("═══ 快照 (需登录) ═══")
+        console.write_line("  [cyan]snapshot [名称][/cyan]           - 为整个文件树拍快照")
+        console.write_line("  [cyan]snapshots [prune <保留数>][/cyan] - 列出快照 / 只保留最近几个")
+        console.write_line("  [cyan]restore <名称或编号>[/cyan]      - 恢复到快照时的状态")
+        console.write_line("")
+        console.write_info("═══ 归档 (需登录) ═══")
+        console.write_line("  [cyan]export <路径> <归档名>[/cyan]     - 导出为 tar 包 (.tar.gz 压缩)")
+        console.write_line("  [cyan]import <归档名> [目录][/cyan]     - 从 tar 包导入")
+        console.write_line(f"  归档保存在 [dim]{escape(str(self.exports_dir))}[/dim]")
+        console.write_line("")
+        console.write_info("═══ 系统命令 ═══")
+        console.write_line("  [cyan]clear[/cyan]                     - 清空终端")
+        console.write_line("  [cyan]echo <文本>[/cyan]               - 输出文本")
+        console.write_line("  [cyan]exit[/cyan]                      - 退出程序")
+        console.write_line("")
+    
+    # ==================== 用户命令处理 ====================
+    
+    def _handle_register(self, console: Console, args: list[str]) -> None:
+        """处理注册命令"""
+        if len(args) < 2:
+            console.write_error("用法: register <用户名> <密码>")
+            return
+        
+        username, password = args[0], args[1]
+        success, message = self.auth.register(username, password)
+        
+        if success:
+            console.write_success(message)
+            console.write_line("现在可以使用 [cyan]login[/cyan] 命令登录")
+        else:
+            console.write_error(message)
+    
+    def _handle_login(self, console: Console, args: list[str]) -> None:
+        """处理登录命令"""
+        if len(args) < 2:
+            console.write_error("用法: login <用户名> <密码>")
+            return
+        
+        username, password = args[0], args[1]
+        success, message = self.auth.login(username, password)
+        
+        if success:
+            console.write_success(message)
+            console.write_line("")
+            
+            # 初始化虚拟文件系统
+            user = self.auth.current_user
+            self.vfs = VirtualFileSystem(user.user_id, self.db)
+            
+            # 检查是否是新用户（没有任何文件）
+            root_nodes = self.db.get_user_root_nodes(user.user_id)
+            if not root_nodes:
+                self.vfs.init_default_structure()
+                console.write_info("已为你创建默认目录结构")
+            
+            # 恢复上次的路径
+            if user.current_path != "/":
+                result = self.vfs.cd(user.current_path)
+                if not result.success:
+                    self.vfs.cd("/")
+            
+            # 更新终端提示符
+            console.login(username, "算界")
+            console.set_cwd(self.vfs.cwd)
+            
+            console.write_line("")
+            console.write_info("你已进入 [bold]算界[/bold]")
+            console.write_line("输入 [cyan]ls[/cyan] 查看你的文件")
+        else:
+            console.write_error(message)
+    
+    def _handle_logout(self, console: Console) -> None:
+        """处理登出命令"""
+        if not self.auth.is_logged_in:
+            console.write_error("当前未登录")
+            return
+        
+        # 保存当前路径
+        if self.vfs:
+            self.auth.update_current_path(self.vfs.cwd)
+        
+        success, message = self.auth.logout()
+        
+        if success:
+            console.write_info(message)
+            console.logout()
+            self.vfs = None
+        else:
+            console.write_error(message)
+    
+    def _handle_whoami(self, console: Console) -> None:
+        """显示当前用户"""
+        if self.auth.is_logged_in:
+            console.write_line(self.auth.current_user.username)
+        else:
+            console.write_error("未登录")
+    
+    # ==================== 文件系统命令处理 ====================
+    
+    def _handle_pwd(self, console: Console) -> None:
+        """显示当前路径"""
+        if not self._require_login(console):
+            return
+        console.write_line(self.vfs.pwd())
+    
+    def _handle_cd(self, console: Console, args: list[str]) -> None:
+        """切换目录"""
+        if not self._require_login(console):
+            return
+        
+        path = args[0] if args else ""
+        result = self.vfs.cd(path)
+        
+        if result.success:
+            console.set_cwd(self.vfs.cwd)
+            # 更新会话路径
+            self.auth.update_current_path(self.vfs.cwd, self.vfs.current_node_id)
+        else:
+            console.write_error(result.message)
+    
+    def _handle_ls(self, console: Console, args: list[str]) -> None:
+        """列出目录内容 (分页显示，按需读取)"""
+        if not self._require_login(console):
+            return
+        
+        path = args[0] if args else ""
+        result = self.vfs.iter_dir(path)
+        
+        if not result.success:
+            console.write_error(result.message)
+            return
+        
+        items = _peek(result.data)
+        if items is None:
+            console.write_line("[dim](空目录)[/dim]")
+            return
+        
+        console.page(
+            f"[blue]{item['name']}/[/blue]" if item['is_directory'] else item['name']
+            for item in items
+        )
+    
+    def _handle_mkdir(self, console: Console, args: list[str]) -> None:
+        """创建目录"""
+        if not self._require_login(console):
+            return
+        
+        if not args:
+            console.write_error("用法: mkdir <目录名>")
+            return
+        
+        result = self.vfs.mkdir(args[0])
+        if result.success:
+            console.write_success(result.message)
+        else:
+            console.write_error(result.message)
+    
+    def _handle_touch(self, console: Console, args: list[str]) -> None:
+        """创建文件"""
+        if not self._require_login(console):
+            return
+        
+        if not args:
+            console.write_error("用法: touch <文件名>")
+            return
+        
+        result = self.vfs.touch(args[0])
+        if result.success:
+            console.write_success(result.message)
+        else:
+            console.write_error(result.message)
+    
+    def _handle_cat(self, console: Console, args: list[str]) -> None:
+        """查看文件内容"""
+        if not self._require_login(console):
+            return
+        
+        usage = "用法: cat [-c 起始:结束] <文件名>"
+        if not args:
+            console.write_error(usage)
+            return
+        
+        if args[0] == "-c":
+            if len(args) < 3:
+                console.write_error(usage)
+                return
+            start, sep, end = args[1].partition(":")
+            try:
+                result = self.vfs.read(
+                    args[2],
+                    int(start) if start else 0,
+                    int(end) if sep and end else None
+                )
+            except ValueError:
+                console.write_error(f"无效的范围: {args[1]}")
+                return
+        else:
+            result = self.vfs.iter_lines(args[0])
+            if result.success:
+                # 分页显示，翻页时才继续读取后面的块
+                lines = _peek(result.data)
+                if lines is None:
+                    console.write_line("(空文件)")
+                else:
+                    # 文件内容按原文显示，不解析为 Rich 标记 (与管道输出一致)
+                    console.page(escape(line) for line in lines)
+            else:
+                console.write_error(result.message)
+            return
+        
+        if result.success:
+            if not result.data:
+                console.write_line("(空文件)")
+                return
+            for line in result.data.split("\n"):
+                console.write_line(escape(line))
+        else:
+            console.write_error(result.message)
+    
+    def _handle_head_tail(
+        self,
+        console: Console,
+        args: list[str],
+        tail: bool
+    ) -> None:
+        """查看文件开头 / 末尾若干行"""
+        if not self._require_login(console):
+            return
+        
+        usage = f"用法: {'tail' if tail else 'head'} [-n 行数] <文件名>"
+        lines = 10
+        if args and args[0] == "-n":
+            if len(args) < 3 or not args[1].isdigit():
+                console.write_error(usage)
+                return
+            lines = int(args[1])
+            args = args[2:]
+        
+        if not args:
+            console.write_error(usage)
+            return
+        
+        if tail:
+            result = self.vfs.tail(args[0], lines)
+        else:
+            result = self.vfs.head(args[0], lines)
+        
+        if result.success:
+            for line in result.data:
+                console.write_line(escape(line))
+        else:
+            console.write_error(result.message)
+    
+    def _handle_write(self, console: Console, args: list[str]) -> None:
+        """写入 / 追加文件内容"""
+        if not self._require_login(console):
+            return
+        
+        append = bool(args) and args[0] == "-a"
+        if append:
+            args = args[1:]
+        
+        if len(args) < 2:
+            console.write_error("用法: write [-a] <文件名> <内容>")
+            return
+        
+        filename = args[0]
+        content = " ".join(args[1:])
+        
+        if append:
+            result = self.vfs.append(filename, content, as_line=True)
+        else:
+            result = self.vfs.write(filename, content)
+        if result.success:
+            console.write_success(result.message)
+        else:
+            console.write_error(result.message)
+    
+    def _handle_rm(self, console: Console, args: list[str]) -> None:
+        """删除文件或目录"""
+        if not self._require_login(console):
+            return
+        
+        if not args:
+            console.write_error("用法: rm [-r] <名称>")
+            return
+        
+        recursive = False
+        target = args[0]
+        
+        if args[0] == "-r":
+            recursive = True
+            if len(args) < 2:
+                console.write_error("用法: rm -r <目录名>")
+                return
+            target = args[1]
+        
+        if recursive:
+            result = self.vfs.rm_recursive(target)
+        else:
+            result = self.vfs.rm(target)
+        
+        if result.success:
+            console.write_success(result.message)
+        else:
+            console.write_error(result.message)
+    
+    def _handle_mv(self, console: Console, args: list[str]) -> None:
+        """移动/重命名"""
+        if not self._require_login(console):
+            return
+        
+        if len(args) < 2:
+            console.write_error("用法: mv <源> <目标>")
+            return
+        
+        result = self.vfs.mv(args[0], args[1])
+        if result.success:
+            console.write_success(result.message)
+        else:
+            console.write_error(result.message)
+    
+    def _handle_snapshot(self, console: Console, args: list[str]) -> None:
+        """拍快照"""
+        if not self._require_login(console):
+            return
+        
+        result = self.vfs.snapshot(args[0] if args else None)
+        if result.success:
+            console.write_success(result.message)
+        else:
+            console.write_error(result.message)
+    
+    def _handle_snapshots(self, console: Console, args: list[str]) -> None:
+        """列出或清理快照"""
+        if not self._require_login(console):
+            return
+        
+        if args:
+            if args[0] != "prune" or len(args) != 2 or not args[1].isdigit():
+                console.write_error("用法: snapshots [prune <保留数>]")
+                return
+            console.write_success(self.vfs.prune_snapshots(int(args[1])).message)
+            return
+        
+        snapshots = self.vfs.snapshots().data
+        if not snapshots:
+            console.write_line("[dim](没有快照)[/dim]")
+            return
+        for index, snapshot in enumerate(snapshots, 1):
+            created = str(snapshot['created_at'])[:19]
+            console.write_line(
+                f"  {index:>3}  [cyan]{escape(snapshot['name'])}[/cyan]  "
+                f"[dim]{created}  之后修改 {snapshot['changes']} 项[/dim]"
+            )
+    
+    def _handle_restore(self, console: Console, args: list[str]) -> None:
+        """恢复快照"""
+        if not self._require_login(console):
+            return
+        
+        if len(args) != 1:
+            console.write_error("用法: restore <名称或编号>")
+            return
+        
+        result = self.vfs.restore(args[0])
+        if result.success:
+            console.set_cwd(self.vfs.cwd)
+            self.auth.update_current_path(self.vfs.cwd, self.vfs.current_node_id)
+            console.write_success(result.message)
+        else:
+            console.write_error(result.message)
+    
+    def _archive_path(self, console: Console, name: str) -> Path | None:
+        """归档名 -> 主机路径 (只能位于归档目录内)"""
+        from src.systems.archive import resolve_host_path
+        
+        path = resolve_host_path(self.exports_dir, name)
+        if path is None:
+            console.write_error(f"无效的归档名: {name}")
+        return path
+    
+    def _handle_export(self, console: Console, args: list[str]) -> None:
+        """导出为归档"""
+        if not self._require_login(console):
+            return
+        
+        if len(args) != 2:
+            console.write_error("用法: export <路径> <归档名>")
+            return
+        host_file = self._archive_path(console, args[1])
+        if host_file is None:
+            return
+        
+        result = self.vfs.export_archive(args[0], host_file)
+        if result.success:
+            console.write_success(escape(result.message))
+        else:
+            console.write_error(escape(result.message))
+    
+    def _handle_import(self, console: Console, args: list[str]) -> None:
+        """从归档导入"""
+        if not self._require_login(console):
+            return
+        
+        if len(args) not in (1, 2):
+            console.write_error("用法: import <归档名> [目录]")
+            return
+        host_file = self._archive_path(console, args[0])
+        if host_file is None:
+            return
+        
+        result = self.vfs.import_archive(host_file, args[1] if len(args) > 1 else "")
+        if result.success:
+            console.write_success(escape(result.message))
+        else:
+            console.write_error(escape(result.message))
+    
+    def _handle_tree(self, console: Console) -> None:
+        """显示目录树"""
+        if not self._require_login(console):
+            return
+        
+        console.write_line(f"[bold]{self.vfs.cwd}[/bold]")
+        result = self.vfs.tree()
+        if result.success and result.data:
+            for line in result.data:
+                console.write_line(line)
+        elif not result.data:
+            console.write_line("[dim](空目录)[/dim]")
+
+
+def _peek(items: Iterator) -> Iterator | None:
+    """
+    检查迭代器是否为空
+    
+    Returns:
+        为空时返回 None，否则返回包含全部元素的新迭代器
+    """
+    for first in items:
+        return itertools.chain((first,), items)
+    return None
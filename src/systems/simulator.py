@@ -0,0 +1,302 @@
+"""
+无界面战斗模拟器
+用于数值平衡: 批量模拟玩家与敌人的战斗，统计胜率与击杀回合数 (TTK)
+
+- 模型在主进程中编译为纯元组，只把元组发送到工作进程
+- 战斗按固定大小分块，每块使用由 (种子, 敌人, 块号) 导出的独立随机数，
+  结果与工作进程数量无关，可完全复现
+
+用法:
+    python -m src.systems.simulator --enemy abacus_soldier --fights 100000 --workers 4 --seed 1
+"""
+import argparse
+import json
+import random
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from src.data.index import GameIndex, get_game_index
+from src.data.models import EnemyModel, SkillModel, Stats
+
+
+# 每个任务模拟的战斗数
+CHUNK_SIZE = 2000
+# 超过该回合数判为平局
+MAX_ROUNDS = 200
+# 暴击倍率与暴击率上限 (暴击率 = FCS%)
+CRIT_MULTIPLIER = 1.5
+MAX_CRIT_RATE = 0.5
+
+
+# 技能: (名称, hp 消耗, ep 消耗, 冷却, 倍率, 段数, 是否治疗)
+Skill = tuple[str, int, int, int, float, int, bool]
+# 战斗单位: (hp, ep, atk, def, spd, 暴击率, 技能 (按倍率 * 段数从高到低), 是否主动型)
+Fighter = tuple[int, int, int, int, int, float, tuple[Skill, ...], bool]
+
+
+def compile_skill(skill: SkillModel) -> Skill:
+    effect = skill.effect
+    return (
+        skill.id,
+        skill.cost.hp,
+        skill.cost.ep,
+        skill.cooldown,
+        effect.power,
+        effect.hit_count,
+        "heal" in effect.type,
+    )
+
+
+def compile_fighter(stats: Stats, skills: list[SkillModel], aggressive: bool = True) -> Fighter:
+    compiled = sorted(
+        (compile_skill(skill) for skill in skills if skill.type == "active"),
+        key=lambda s: s[4] * s[5],
+        reverse=True
+    )
+    return (
+        stats.hp,
+        stats.ep,
+        stats.atk,
+        stats.def_,
+        stats.spd,
+        min(stats.fcs / 100, MAX_CRIT_RATE),
+        tuple(compiled),
+        aggressive,
+    )
+
+
+def compile_enemy(index: GameIndex, enemy: EnemyModel) -> Fighter:
+    return compile_fighter(
+        enemy.stats,
+        index.skills_of(index.enemy(enemy.id)),
+        aggressive=enemy.ai_behavior == "aggressive"
+    )
+
+
+# ==================== 单场战斗 ====================
+
+def _choose(fighter: Fighter, hp: int, ep: int, cooldowns: list[int], rng: random.Random) -> int:
+    """
+    选择技能，返回技能下标，-1 表示普通攻击
+    
+    主动型总是使用可用的最强技能；被动型只有一半概率使用技能
+    """
+    if not fighter[7] and rng.random() < 0.5:
+        return -1
+    for i, skill in enumerate(fighter[6]):
+        if cooldowns[i] == 0 and ep >= skill[2] and hp > skill[1]:
+            # 生命值满时不使用治疗技能
+            if skill[6] and hp >= fighter[0]:
+                continue
+            return i
+    return -1
+
+
+def simulate_fight(player: Fighter, enemy: Fighter, rng: random.Random) -> tuple[int, int]:
+    """
+    模拟一场战斗
+    
+    每回合双方按 SPD 从高到低各行动一次 (相同时玩家先手)；
+    每段伤害 = max(1, ATK * 倍率 - DEF)，按暴击率乘以暴击倍率
+    
+    Returns:
+        (结果, 回合数)，结果 1 = 玩家胜，-1 = 玩家败，0 = 平局
+    """
+    fighters = (player, enemy)
+    hp = [player[0], enemy[0]]
+    ep = [player[1], enemy[1]]
+    cooldowns = ([0] * len(player[6]), [0] * len(enemy[6]))
+    order = (0, 1) if player[4] >= enemy[4] else (1, 0)
+    random_ = rng.random
+    
+    for round_ in range(1, MAX_ROUNDS + 1):
+        for actor in order:
+            me, target = fighters[actor], fighters[1 - actor]
+            cd = cooldowns[actor]
+            for i, left in enumerate(cd):
+                if left:
+                    cd[i] = left - 1
+            
+            choice = _choose(me, hp[actor], ep[actor], cd, rng)
+            if choice < 0:
+                power, hits, heal = 1.0, 1, False
+            else:
+                _, hp_cost, ep_cost, cooldown, power, hits, heal = me[6][choice]
+                hp[actor] -= hp_cost
+                ep[actor] -= ep_cost
+                cd[choice] = cooldown
+            
+            if heal:
+                hp[actor] = min(me[0], hp[actor] + int(me[2] * power) * hits)
+                continue
+            
+            base = me[2] * power - target[3]
+            for _ in range(hits):
+                damage = base if base > 1 else 1
+                if random_() < me[5]:
+                    damage *= CRIT_MULTIPLIER
+                hp[1 - actor] -= int(damage)
+            if hp[1 - actor] <= 0:
+                return (1 if actor == 0 else -1), round_
+    return 0, MAX_ROUNDS
+
+
+# ==================== 批量模拟 ====================
+
+@dataclass
+class BatchResult:
+    """一批战斗的统计"""
+    fights: int = 0
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    ttk: Counter | None = None  # 玩家获胜时的回合数分布
+    
+    def merge(self, other: "BatchResult") -> None:
+        self.fights += other.fights
+        self.wins += other.wins
+        self.losses += other.losses
+        self.draws += other.draws
+        if self.ttk is None:
+            self.ttk = Counter()
+        self.ttk.update(other.ttk or {})
+    
+    def summary(self) -> dict:
+        """汇总为可 JSON 序列化的字典"""
+        ttk = self.ttk or Counter()
+        summary = {
+            "fights": self.fights,
+            "win_rate": round(self.wins / self.fights, 4) if self.fights else 0.0,
+            "loss_rate": round(self.losses / self.fights, 4) if self.fights else 0.0,
+            "draw_rate": round(self.draws / self.fights, 4) if self.fights else 0.0,
+            "ttk_mean": None,
+            "ttk_p50": None,
+            "ttk_p90": None,
+        }
+        if self.wins:
+            summary["ttk_mean"] = round(sum(r * n for r, n in ttk.items()) / self.wins, 2)
+            summary["ttk_p50"] = _percentile(ttk, self.wins, 0.5)
+            summary["ttk_p90"] = _percentile(ttk, self.wins, 0.9)
+        return summary
+
+
+def _percentile(histogram: Counter, total: int, q: float) -> int:
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= q * total:
+            return value
+    return max(histogram)
+
+
+def run_chunk(player: Fighter, enemy: Fighter, seed: str, fights: int) -> BatchResult:
+    """在工作进程中模拟一块战斗"""
+    rng = random.Random(seed)
+    result = BatchResult(fights=fights, ttk=Counter())
+    for _ in range(fights):
+        outcome, rounds = simulate_fight(player, enemy, rng)
+        if outcome > 0:
+            result.wins += 1
+            result.ttk[rounds] += 1
+        elif outcome < 0:
+            result.losses += 1
+        else:
+            result.draws += 1
+    return result
+
+
+def simulate(
+    player: Fighter,
+    enemies: dict[str, Fighter],
+    fights: int,
+    seed: int = 0,
+    workers: int | None = None
+) -> dict[str, dict]:
+    """
+    对每个敌人模拟 fights 场战斗
+    
+    Args:
+        player: 编译后的玩家
+        enemies: 敌人 id -> 编译后的敌人
+        fights: 每个敌人的战斗场数
+        seed: 随机种子
+        workers: 工作进程数，1 表示在当前进程中运行
+    
+    Returns:
+        敌人 id -> 统计结果
+    """
+    tasks = []
+    for enemy_id, enemy in enemies.items():
+        for chunk, start in enumerate(range(0, fights, CHUNK_SIZE)):
+            count = min(CHUNK_SIZE, fights - start)
+            tasks.append((enemy_id, (player, enemy, f"{seed}:{enemy_id}:{chunk}", count)))
+    
+    results = {enemy_id: BatchResult(ttk=Counter()) for enemy_id in enemies}
+    if workers == 1:
+        for enemy_id, args in tasks:
+            results[enemy_id].merge(run_chunk(*args))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [(enemy_id, pool.submit(run_chunk, *args)) for enemy_id, args in tasks]
+            for enemy_id, future in futures:
+                results[enemy_id].merge(future.result())
+    return {enemy_id: result.summary() for enemy_id, result in results.items()}
+
+
+# ==================== 命令行 ====================
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="战斗平衡模拟")
+    parser.add_argument("--enemy", action="append", help="敌人 id (可重复)，默认全部敌人")
+    parser.add_argument(
+        "--player",
+        default='{"hp": 100, "ep": 50, "atk": 12, "def": 5, "spd": 10, "fcs": 5}',
+        help="玩家属性 (JSON)"
+    )
+    parser.add_argument("--skill", action="append", default=[], help="玩家技能 id (可重复)")
+    parser.add_argument("--fights", type=int, default=10000, help="每个敌人的战斗场数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认 CPU 数")
+    parser.add_argument("--out", help="结果输出文件，默认输出到标准输出")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    index = get_game_index()
+    
+    try:
+        stats = Stats.model_validate_json(args.player)
+        skills = [index.skills[index.skill(skill_id)] for skill_id in args.skill]
+        enemy_ids = args.enemy or [enemy.id for enemy in index.enemies]
+        enemies = {
+            enemy_id: compile_enemy(index, index.enemies[index.enemy(enemy_id)])
+            for enemy_id in enemy_ids
+        }
+    except KeyError as e:
+        print(f"未知的 id: {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"玩家属性格式错误: {e}", file=sys.stderr)
+        return 1
+    
+    report = {
+        "seed": args.seed,
+        "fights_per_enemy": args.fights,
+        "player": stats.model_dump(by_alias=True),
+        "player_skills": args.skill,
+        "enemies": simulate(compile_fighter(stats, skills), enemies, args.fights, args.seed, args.workers),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+空间索引
+均匀网格空间哈希: 按 CELL x CELL 分桶记录实体位置，
+支持 O(1) 占用检查、半径查询与基于地图字节的视线判定
+"""
+from typing import Iterator
+
+import esper
+
+from src.components.base import Position
+from src.data.maps import BLOCKS_SIGHT, GameMap
+
+
+# 分桶边长 (格)，与常见的查询半径同一数量级
+CELL = 16
+
+
+class SpatialIndex:
+    """
+    实体空间索引
+    
+    实体移动时调用 move()，或者每帧由 SpatialProcessor 统一同步
+    """
+    
+    def __init__(self, cell: int = CELL):
+        self.cell = cell
+        self._buckets: dict[tuple[int, int], set[int]] = {}
+        self._tiles: dict[tuple[int, int], set[int]] = {}
+        self._positions: dict[int, tuple[int, int]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._positions)
+    
+    def __contains__(self, entity: int) -> bool:
+        return entity in self._positions
+    
+    def position(self, entity: int) -> tuple[int, int] | None:
+        return self._positions.get(entity)
+    
+    def entities(self) -> set[int]:
+        """全部已登记的实体"""
+        return set(self._positions)
+    
+    # ==================== 维护 ====================
+    
+    def insert(self, entity: int, x: int, y: int) -> None:
+        """登记实体 (已存在时等同于 move)"""
+        if entity in self._positions:
+            self.move(entity, x, y)
+            return
+        self._positions[entity] = (x, y)
+        self._tiles.setdefault((x, y), set()).add(entity)
+        self._buckets.setdefault((x // self.cell, y // self.cell), set()).add(entity)
+    
+    def move(self, entity: int, x: int, y: int) -> None:
+        """更新实体位置"""
+        old = self._positions.get(entity)
+        if old is None:
+            self.insert(entity, x, y)
+            return
+        if old == (x, y):
+            return
+        self._positions[entity] = (x, y)
+        self._discard(self._tiles, old, entity)
+        self._tiles.setdefault((x, y), set()).add(entity)
+        
+        cell = self.cell
+        old_bucket, new_bucket = (old[0] // cell, old[1] // cell), (x // cell, y // cell)
+        if old_bucket != new_bucket:
+            self._discard(self._buckets, old_bucket, entity)
+            self._buckets.setdefault(new_bucket, set()).add(entity)
+    
+    def remove(self, entity: int) -> None:
+        """移除实体"""
+        pos = self._positions.pop(entity, None)
+        if pos is None:
+            return
+        self._discard(self._tiles, pos, entity)
+        self._discard(self._buckets, (pos[0] // self.cell, pos[1] // self.cell), entity)
+    
+    @staticmethod
+    def _discard(table: dict[tuple[int, int], set[int]], key: tuple[int, int], entity: int) -> None:
+        members = table.get(key)
+        if members is not None:
+            members.discard(entity)
+            if not members:
+                del table[key]
+    
+    # ==================== 查询 ====================
+    
+    def occupied(self, x: int, y: int) -> bool:
+        """该格是否有实体"""
+        return (x, y) in self._tiles
+    
+    def at(self, x: int, y: int) -> set[int]:
+        """该格上的实体"""
+        return self._tiles.get((x, y), set())
+    
+    def _candidates(self, x: int, y: int, radius: int) -> Iterator[int]:
+        cell = self.cell
+        buckets = self._buckets
+        for bx in range((x - radius) // cell, (x + radius) // cell + 1):
+            for by in range((y - radius) // cell, (y + radius) // cell + 1):
+                members = buckets.get((bx, by))
+                if members:
+                    yield from members
+    
+    def query_radius(self, x: int, y: int, radius: int) -> list[int]:
+        """与 (x, y) 欧氏距离不超过 radius 的实体"""
+        positions = self._positions
+        limit = radius * radius
+        result = []
+        for entity in self._candidates(x, y, radius):
+            ex, ey = positions[entity]
+            if (ex - x) ** 2 + (ey - y) ** 2 <= limit:
+                result.append(entity)
+        return result
+    
+    def nearest(
+        self,
+        x: int,
+        y: int,
+        radius: int,
+        exclude: int | None = None
+    ) -> int | None:
+        """半径内最近的实体，没有时返回 None"""
+        positions = self._positions
+        best, best_dist = None, radius * radius + 1
+        for entity in self._candidates(x, y, radius):
+            if entity == exclude:
+                continue
+            ex, ey = positions[entity]
+            dist = (ex - x) ** 2 + (ey - y) ** 2
+            if dist < best_dist:
+                best, best_dist = entity, dist
+        return best
+
+
+# ==================== 视线 ====================
+
+def ray(x0: int, y0: int, x1: int, y1: int) -> Iterator[tuple[int, int]]:
+    """从 (x0, y0) 到 (x1, y1) 经过的格子 (Bresenham，不含起点)"""
+    dx, dy = abs(x1 - x0), -abs(y1 - y0)
+    sx, sy = (1 if x0 < x1 else -1), (1 if y0 < y1 else -1)
+    err = dx + dy
+    x, y = x0, y0
+    while (x, y) != (x1, y1):
+        e2 = 2 * err
+        if e2 >= dy:
+            err += dy
+            x += sx
+        if e2 <= dx:
+            err += dx
+            y += sy
+        yield x, y
+
+
+def line_of_sight(game_map: GameMap, x0: int, y0: int, x1: int, y1: int) -> bool:
+    """两点之间是否没有遮挡视线的地形 (终点本身可以是墙)"""
+    tile = game_map.tile
+    for x, y in ray(x0, y0, x1, y1):
+        if (x, y) == (x1, y1):
+            return True
+        if BLOCKS_SIGHT[tile(x, y)]:
+            return False
+    return True
+
+
+class SpatialProcessor(esper.Processor):
+    """每帧把 Position 组件的变化同步到空间索引"""
+    
+    def __init__(self, index: SpatialIndex):
+        self.index = index
+    
+    def process(self, *args, **kwargs) -> None:
+        index = self.index
+        seen = set()
+        for entity, pos in esper.get_component(Position):
+            seen.add(entity)
+            index.move(entity, pos.x, pos.y)
+        # 被删除或失去 Position 的实体
+        for entity in index.entities() - seen:
+            index.remove(entity)
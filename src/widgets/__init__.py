@@ -1,6 +1,7 @@
 """
 自定义 Textual Widgets
 """
-from src.widgets.terminal import Terminal, TerminalPrompt, TerminalLine
+from src.widgets.terminal import Terminal, TerminalPrompt, TerminalLine, PromptInput
+from src.widgets.game_grid import GameGrid, Palette
 
-__all__ = ["Terminal", "TerminalPrompt", "TerminalLine"]
+__all__ = ["Terminal", "TerminalPrompt", "TerminalLine", "PromptInput", "GameGrid", "Palette"]
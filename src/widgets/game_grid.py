@@ -0,0 +1,121 @@
+"""
+地图网格组件
+按行缓存渲染结果，每帧只重绘 RenderSystem 报告的脏矩形
+"""
+from itertools import groupby
+
+from rich.segment import Segment
+from rich.style import Style
+from textual.geometry import Region
+from textual.strip import Strip
+from textual.widget import Widget
+
+
+# 地形颜色
+TERRAIN_COLORS = {
+    "#": "#565f89",
+    ".": "#3b4261",
+    "+": "#e0af68",
+    "'": "#e0af68",
+    "~": "#7dcfff",
+}
+DEFAULT_COLOR = "#c0caf5"
+
+
+class Palette:
+    """
+    单元格编码表
+    
+    网格中每格是一个字节: 0-127 为地形字符本身，128-255 为登记的实体字形
+    """
+    
+    def __init__(self):
+        self.chars = [chr(code) for code in range(128)]
+        self.styles = [
+            Style.parse(TERRAIN_COLORS.get(chr(code), DEFAULT_COLOR)) for code in range(128)
+        ]
+        self._glyphs: dict[tuple[str, str], int] = {}
+    
+    def code(self, char: str, color: str) -> int:
+        """获取实体字形的编码 (首次使用时登记)"""
+        key = (char, color)
+        code = self._glyphs.get(key)
+        if code is None:
+            code = len(self.chars)
+            if code > 255:
+                raise ValueError("实体字形过多 (最多 128 种)")
+            self._glyphs[key] = code
+            self.chars.append(char)
+            self.styles.append(Style.parse(color))
+        return code
+
+
+class GameGrid(Widget):
+    """地图网格"""
+    
+    DEFAULT_CSS = """
+    GameGrid {
+        width: 100%;
+        height: 100%;
+        background: #1a1b26;
+    }
+    """
+    
+    def __init__(
+        self,
+        palette: Palette | None = None,
+        name: str | None = None,
+        id: str | None = None,
+        classes: str | None = None,
+    ) -> None:
+        super().__init__(name=name, id=id, classes=classes)
+        self.palette = palette or Palette()
+        self._rows: list[bytes] = []
+        self._strips: list[Strip | None] = []
+        self.cells_sent = 0  # 累计重绘的单元格数
+    
+    def update_grid(
+        self,
+        rows: list[bytes],
+        dirty: list[tuple[int, int, int, int]] | None = None
+    ) -> None:
+        """
+        更新网格内容
+        
+        Args:
+            rows: 每行的单元格编码
+            dirty: 变化的矩形 (x, y, 宽, 高)；None 表示整个网格都需要重绘
+        """
+        if dirty is None or len(rows) != len(self._rows):
+            self._rows = list(rows)
+            self._strips = [None] * len(rows)
+            self.cells_sent += sum(len(row) for row in rows)
+            self.refresh()
+            return
+        
+        regions = []
+        for x, y, width, height in dirty:
+            for row in range(y, y + height):
+                self._rows[row] = rows[row]
+                self._strips[row] = None
+            self.cells_sent += width * height
+            regions.append(Region(x, y, width, height))
+        if regions:
+            self.refresh(*regions)
+    
+    def _build_strip(self, row: bytes) -> Strip:
+        """把一行编码转换为 Strip (相同编码的连续单元格合并为一段)"""
+        chars, styles = self.palette.chars, self.palette.styles
+        segments = [
+            Segment(chars[code] * len(list(run)), styles[code])
+            for code, run in groupby(row)
+        ]
+        return Strip(segments, len(row))
+    
+    def render_line(self, y: int) -> Strip:
+        if y >= len(self._rows):
+            return Strip.blank(self.size.width)
+        strip = self._strips[y]
+        if strip is None:
+            strip = self._strips[y] = self._build_strip(self._rows[y])
+        return strip.crop_extend(0, self.size.width, None)
@@ -1,15 +1,50 @@
 """
 终端模拟器组件 - 类似 Linux 终端的交互界面
 """
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+from urllib.parse import quote
+
 from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.content import Content
+from textual.markup import MarkupError
 from textual.widget import Widget
 from textual.widgets import Static, Input
 from textual.containers import ScrollableContainer, Vertical
 from textual.message import Message
 from textual import on
 from textual.reactive import reactive
+from rich.markup import escape
 from rich.text import Text
 
+from src.systems.history import CommandHistory
+
+
+# ==================== 渲染缓存 ====================
+
+@lru_cache(maxsize=1024)
+def _parse_markup(text: str) -> Content:
+    try:
+        return Content.from_markup(text)
+    except MarkupError:
+        # 不合法的 markup 按纯文本显示
+        return Content(text)
+
+
+def render_line(text: str, markup: bool = True) -> Content:
+    """
+    把一行输出转换为 Content (界面最终显示的对象)
+    
+    不含 markup 的文本直接构造，跳过解析；含 markup 的文本按原文缓存解析结果 (LRU)，
+    帮助、欢迎信息、提示符等重复出现的行只解析一次。Content 不可变，可以被多行共用
+    """
+    if not markup or "[" not in text:
+        return Content(text)
+    return _parse_markup(text)
+
 
 class TerminalLine(Static):
     """终端中的单行输出"""
@@ -24,8 +59,37 @@ class TerminalLine(Static):
     """
 
 
+class PromptInput(Input):
+    """命令输入框: Tab 请求补全而不是切换焦点"""
+    
+    BINDINGS = [
+        Binding("tab", "complete", "补全", show=False),
+    ]
+    
+    class CompletionRequested(Message):
+        """补全请求消息"""
+        def __init__(self, value: str) -> None:
+            self.value = value
+            super().__init__()
+    
+    def action_complete(self) -> None:
+        self.post_message(self.CompletionRequested(self.value))
+
+
 class TerminalPrompt(Widget):
-    """终端提示符和输入区域"""
+    """
+    终端提示符和输入区域
+    
+    上 / 下键浏览历史命令，Ctrl+R 反向搜索 (再按一次查找更早的匹配，
+    回车采用匹配结果，Esc 取消)
+    """
+    
+    BINDINGS = [
+        Binding("up", "history_previous", "上一条命令", show=False),
+        Binding("down", "history_next", "下一条命令", show=False),
+        Binding("ctrl+r", "history_search", "搜索历史", show=False),
+        Binding("escape", "cancel_search", "取消搜索", show=False),
+    ]
     
     DEFAULT_CSS = """
     TerminalPrompt {
@@ -71,19 +135,25 @@ class TerminalPrompt(Widget):
         name: str | None = None,
         id: str | None = None,
         classes: str | None = None,
+        history: CommandHistory | None = None,
     ) -> None:
         super().__init__(name=name, id=id, classes=classes)
         self.prompt = prompt
+        self.history = history if history is not None else CommandHistory()
+        self._browse: int | None = None  # 正在浏览的历史下标
+        self._draft = ""  # 开始浏览 / 搜索前输入框中的内容
+        self._search: str | None = None  # 反向搜索的关键字，None 表示不在搜索
+        self._match: int | None = None
     
     def compose(self) -> ComposeResult:
-        yield Static(self.prompt, classes="prompt-text")
-        yield Input(placeholder="", classes="prompt-input")
+        yield Static(render_line(self.prompt), classes="prompt-text")
+        yield PromptInput(placeholder="", classes="prompt-input")
     
     def watch_prompt(self, new_prompt: str) -> None:
         """当提示符改变时更新显示"""
         try:
             prompt_widget = self.query_one(".prompt-text", Static)
-            prompt_widget.update(new_prompt)
+            prompt_widget.update(render_line(new_prompt))
         except Exception:
             pass
     
@@ -91,10 +161,101 @@ class TerminalPrompt(Widget):
     def on_input_submitted(self, event: Input.Submitted) -> None:
         """处理输入提交"""
         event.stop()
+        if self._search is not None:
+            # 搜索中回车只采用匹配结果，不执行
+            self._end_search(accept=True)
+            return
         command = event.value.strip()
         event.input.value = ""
+        self._browse = None
+        self._draft = ""
         self.post_message(self.CommandSubmitted(command))
     
+    # ==================== 历史命令 ====================
+    
+    def _set_input(self, value: str) -> None:
+        input_widget = self.query_one(".prompt-input", Input)
+        input_widget.value = value
+        input_widget.cursor_position = len(value)
+    
+    def action_history_previous(self) -> None:
+        """上一条历史命令"""
+        if self._search is not None:
+            self._end_search(accept=True)
+        if not len(self.history):
+            return
+        if self._browse is None:
+            self._draft = self.query_one(".prompt-input", Input).value
+            self._browse = len(self.history)
+        if self._browse > 0:
+            self._browse -= 1
+            self._set_input(self.history[self._browse])
+    
+    def action_history_next(self) -> None:
+        """下一条历史命令，越过最新一条时恢复原来的输入"""
+        if self._search is not None:
+            self._end_search(accept=True)
+        if self._browse is None:
+            return
+        self._browse += 1
+        if self._browse >= len(self.history):
+            self._browse = None
+            self._set_input(self._draft)
+        else:
+            self._set_input(self.history[self._browse])
+    
+    def action_history_search(self) -> None:
+        """开始反向搜索，搜索中再按一次查找更早的匹配"""
+        if self._search is None:
+            self._draft = self.query_one(".prompt-input", Input).value
+            self._search = ""
+            self._match = None
+            self._set_input("")
+        elif self._match is not None:
+            older = self.history.search(self._search, before=self._match)
+            if older is not None:
+                self._match = older
+        self._show_search()
+    
+    def action_cancel_search(self) -> None:
+        if self._search is not None:
+            self._end_search(accept=False)
+    
+    @on(Input.Changed)
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """搜索中输入框的内容即关键字，每次修改从最新一条重新查找"""
+        if self._search is None:
+            return
+        event.stop()
+        self._search = event.value
+        self._match = self.history.search(event.value) if event.value else None
+        self._show_search()
+    
+    def _show_search(self) -> None:
+        match = self.history[self._match] if self._match is not None else ""
+        label = f"[dim](反向搜索)[/dim]`{escape(self._search)}': {escape(match)}  "
+        self.query_one(".prompt-text", Static).update(label)
+    
+    def _end_search(self, accept: bool) -> None:
+        value = self._draft
+        if accept and self._match is not None:
+            value = self.history[self._match]
+        self._search = None
+        self._match = None
+        self._browse = None
+        self.query_one(".prompt-text", Static).update(render_line(self.prompt))
+        self._set_input(value)
+    
+    def replace_input(self, expected: str, value: str) -> None:
+        """输入框内容仍为 expected 时替换为 value，光标移到末尾"""
+        try:
+            input_widget = self.query_one(".prompt-input", Input)
+        except Exception:
+            return
+        if input_widget.value == expected:
+            input_widget.value = value
+            input_widget.cursor_position = len(value)
+    
     def focus_input(self) -> None:
         """聚焦到输入框"""
         try:
@@ -113,8 +274,17 @@ class Terminal(Widget):
     - 自定义提示符 (如 $ 或 user@host:path$ )
     - 命令输入和处理
     - 滚动历史记录
+    - 分页显示长输出 (类似 less)
+    - 命令历史: 上 / 下键浏览，Ctrl+R 搜索，登录后按用户保存到文件
     """
     
+    # 历史区最多保留的行数，超出后移除最早的行
+    MAX_HISTORY_LINES = 2000
+    # 补全候选最多显示的数量
+    MAX_COMPLETIONS = 200
+    # 分页提示
+    PAGER_HINT = "[reverse] -- 更多 -- [/reverse] [dim]回车: 下一页  q: 退出[/dim]"
+    
     DEFAULT_CSS = """
     Terminal {
         width: 100%;
@@ -172,15 +342,31 @@ class Terminal(Widget):
         name: str | None = None,
         id: str | None = None,
         classes: str | None = None,
+        completer: Callable[[str], tuple[str, list[str]]] | None = None,
+        history_dir: str | Path | None = None,
     ) -> None:
+        """
+        Args:
+            completer: Tab 补全函数，输入当前内容，返回 (补全后的内容, 候选列表)
+            history_dir: 命令历史目录，登录后历史保存在 <目录>/<用户名>.log；
+                None 表示历史只保存在内存中
+        """
         super().__init__(name=name, id=id, classes=classes)
-        self._command_history: list[str] = []
-        self._history_index: int = 0
+        self.completer = completer
+        self.history_dir = Path(history_dir) if history_dir is not None else None
+        # 未登录时的历史只保存在内存中
+        self.history = CommandHistory()
+        self._line_count: int = 0
+        # 分页器: 剩余待显示的行
+        self._pager: Iterator[str] | None = None
+        self._pager_lookahead: list[str] = []
+        # 预先解析静态输出时只解析不显示
+        self._preloading = False
     
     def compose(self) -> ComposeResult:
         with Vertical():
             yield ScrollableContainer(id="terminal-history")
-            yield TerminalPrompt(prompt=self._get_prompt(), id="terminal-prompt")
+            yield TerminalPrompt(prompt=self._get_prompt(), id="terminal-prompt", history=self.history)
     
     def _get_prompt(self) -> str:
         """生成提示符字符串"""
@@ -235,20 +421,43 @@ class Terminal(Widget):
         event.stop()
         command = event.command
         
+        if self._pager is not None:
+            # 分页模式: 空行翻页，其他输入结束分页 (非 q 时照常执行)
+            if not command:
+                self._show_next_page()
+                return
+            self._close_pager()
+            if command.lower() == "q":
+                return
+        
         if command:
             # 添加到历史记录
-            self._command_history.append(command)
-            self._history_index = len(self._command_history)
+            self.history.append(command)
             
-            # 显示输入的命令
-            self.write_line(f"{self._get_prompt()}{command}", classes="command-echo")
+            # 显示输入的命令 (提示符的解析结果有缓存；命令本身是纯文本，不解析 markup)
+            self.write_line(render_line(self._get_prompt()) + Content(command), classes="command-echo")
             
             # 发送命令执行消息
             self.post_message(self.CommandExecuted(command, self))
     
+    @on(PromptInput.CompletionRequested)
+    def on_completion_requested(self, event: PromptInput.CompletionRequested) -> None:
+        """Tab 补全"""
+        event.stop()
+        if self.completer is None or self._pager is not None:
+            return
+        value, candidates = self.completer(event.value)
+        prompt = self.query_one("#terminal-prompt", TerminalPrompt)
+        prompt.replace_input(event.value, value)
+        if candidates:
+            shown = "  ".join(candidates[:self.MAX_COMPLETIONS])
+            if len(candidates) > self.MAX_COMPLETIONS:
+                shown += f"  ... (共 {len(candidates)} 项)"
+            self.write_line(shown, markup=False)
+    
     def write_line(
         self,
-        text: str,
+        text: str | Content,
         classes: str = "output-line",
         markup: bool = True
     ) -> None:
@@ -256,16 +465,90 @@ class Terminal(Widget):
         向终端写入一行文本
         
         Args:
-            text: 要显示的文本
+            text: 要显示的文本，或已解析好的 Content
             classes: CSS 类名 (output-line, error, success, info)
             markup: 是否解析 Rich markup
         """
+        content = text if isinstance(text, Content) else render_line(text, markup)
+        if self._preloading:
+            return
         history = self.query_one("#terminal-history", ScrollableContainer)
-        line = TerminalLine(text, classes=classes, markup=markup)
+        line = TerminalLine(content, classes=classes)
         history.mount(line)
+        self._line_count += 1
+        self._trim_history(history)
         # 滚动到底部
         history.scroll_end(animate=False)
     
+    def preload(self, writer: Callable[["Terminal"], None]) -> None:
+        """
+        预先解析 writer 写出的静态输出 (如帮助信息)，不显示
+        
+        之后真正输出这些行时直接使用缓存的解析结果
+        """
+        self._preloading = True
+        try:
+            writer(self)
+        finally:
+            self._preloading = False
+    
+    def _trim_history(self, history: ScrollableContainer) -> None:
+        """超出行数上限时批量移除最早的行，保持内存占用稳定"""
+        # 超出 10% 再批量移除，避免每行都触发一次移除
+        if self._line_count <= self.MAX_HISTORY_LINES * 1.1:
+            return
+        excess = self._line_count - self.MAX_HISTORY_LINES
+        history.remove_children(list(islice(history.children, excess)))
+        self._line_count -= excess
+    
+    def page(self, lines: Iterable[str]) -> None:
+        """
+        分页显示多行文本
+        
+        只取出一屏的行挂载到界面，其余的行在翻页时才从迭代器中读取
+        """
+        self._close_pager()
+        self._pager = iter(lines)
+        self._pager_lookahead = []
+        self._show_next_page()
+    
+    def _page_size(self) -> int:
+        """一页显示的行数 (历史区高度减去提示行)"""
+        history = self.query_one("#terminal-history", ScrollableContainer)
+        height = history.size.height
+        return max(5, height - 1) if height else 20
+    
+    def _show_next_page(self) -> None:
+        """显示下一页"""
+        if self._pager is None:
+            return
+        self._remove_pager_hint()
+        
+        size = self._page_size()
+        # 上一页多取的一行 (用于判断是否还有下一页) 放在本页开头
+        page = self._pager_lookahead
+        page += islice(self._pager, size + 1 - len(page))
+        for text in page[:size]:
+            self.write_line(text)
+        
+        self._pager_lookahead = page[size:]
+        if self._pager_lookahead:
+            self.write_line(self.PAGER_HINT, classes="output-line pager-hint")
+        else:
+            self._pager = None
+    
+    def _remove_pager_hint(self) -> None:
+        """移除分页提示行"""
+        for hint in self.query(".pager-hint"):
+            hint.remove()
+            self._line_count -= 1
+    
+    def _close_pager(self) -> None:
+        """结束分页"""
+        if self._pager is not None:
+            self._pager = None
+            self._remove_pager_hint()
+    
     def write_error(self, text: str) -> None:
         """写入错误信息"""
         self.write_line(f"[red]{text}[/red]", classes="output-line error")
@@ -282,6 +565,8 @@ class Terminal(Widget):
         """清空终端历史"""
         history = self.query_one("#terminal-history", ScrollableContainer)
         history.remove_children()
+        self._line_count = 0
+        self._pager = None
     
     def login(self, username: str, hostname: str = "算界") -> None:
         """
@@ -294,13 +579,30 @@ class Terminal(Widget):
         self.username = username
         self.hostname = hostname
         self.logged_in = True
+        if self.history_dir is not None:
+            self._use_history(CommandHistory(self.history_dir / f"{quote(username, safe='')}.log"))
     
     def logout(self) -> None:
         """登出，切换回简单提示符"""
         self.username = ""
         self.hostname = ""
         self.logged_in = False
+        self._use_history(CommandHistory())
+    
+    def _use_history(self, history: CommandHistory) -> None:
+        """切换命令历史 (保存当前用户尚未写入的历史)"""
+        self.history.close()
+        self.history = history
+        try:
+            self.query_one("#terminal-prompt", TerminalPrompt).history = history
+        except Exception:
+            pass
+    
+    def on_unmount(self) -> None:
+        """退出前写入尚未保存的历史"""
+        self.history.close()
     
     def set_cwd(self, path: str) -> None:
         """设置当前工作目录"""
         self.cwd = path
+
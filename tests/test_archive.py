@@ -0,0 +1,65 @@
+"""tar 归档导出 / 导入"""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.data.database import CHUNK_SIZE, Database
+from src.systems import archive
+from src.systems.archive import read_archive, write_archive
+
+
+def tree(db: Database, user_id: int, root_id: int | None) -> dict[str, str | None]:
+    """路径 -> 文件内容 (目录为 None)"""
+    return {
+        node['path']: None if node['is_directory'] else db.read_vfs_content(node['id'])
+        for node in db.iter_vfs_subtree(user_id, root_id)
+    }
+
+
+class ArchiveRoundTripTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.db = Database(self.dir / "game.db", pool_size=1)
+        self.alice = self.db.create_user("alice", "x")
+        self.bob = self.db.create_user("bob", "x")
+        docs = self.db.create_vfs_node(self.alice, None, "docs", is_directory=True)
+        deep = self.db.create_vfs_node(self.alice, docs, "深层", is_directory=True)
+        self.db.create_vfs_node(self.alice, docs, "notes.txt", content="第一行\n第二行\n")
+        self.db.create_vfs_node(self.alice, deep, "big.txt", content="x" * (CHUNK_SIZE * 3 + 7))
+        self.db.create_vfs_node(self.alice, deep, "empty.txt", content="")
+        self.db.create_vfs_node(self.alice, docs, "空目录", is_directory=True)
+        self.docs = docs
+    
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+    
+    def round_trip(self, name: str) -> None:
+        host_file = self.dir / name
+        stats = write_archive(self.db, self.alice, self.docs, host_file)
+        self.assertEqual((stats.files, stats.directories), (3, 3))
+        read_archive(self.db, self.bob, None, host_file)
+        self.assertEqual(tree(self.db, self.bob, None), tree(self.db, self.alice, self.docs))
+    
+    def test_tar(self):
+        self.round_trip("docs.tar")
+    
+    def test_gzip(self):
+        self.round_trip("docs.tar.gz")
+    
+    def test_failed_export_releases_connection(self):
+        """导出中途失败: 不留下归档，连接可以继续使用"""
+        host_file = self.dir / "docs.tar"
+        with mock.patch.object(archive, "_spool", side_effect=OSError("No space left on device")):
+            with self.assertRaises(OSError):
+                write_archive(self.db, self.alice, self.docs, host_file)
+        self.assertFalse(host_file.exists())
+        self.assertFalse(host_file.with_name("docs.tar.part").exists())
+        self.assertIsNotNone(self.db.create_vfs_node(self.alice, None, "after.txt", content="ok"))
+
+
+if __name__ == "__main__":
+    unittest.main()
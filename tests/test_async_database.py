@@ -0,0 +1,71 @@
+"""AsyncDatabase 写批次失败时的处理"""
+import sqlite3
+import tempfile
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.data.async_database import AsyncDatabase
+from src.data.database import Database
+
+
+class CommitBatchFailureTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.tmp.name) / "game.db")
+        self.adb = AsyncDatabase(self.db)
+    
+    def tearDown(self):
+        self.adb.close()
+        self.db.close()
+        self.tmp.cleanup()
+    
+    def test_connection_failure_fails_every_future(self):
+        """connection() 开启事务失败时，批次中的每个调用都收到异常而不是一直等待"""
+        @contextmanager
+        def broken():
+            raise sqlite3.OperationalError("database is locked")
+            yield
+        
+        self.db.connection = broken
+        # 写线程取批次之前先排好队，保证多个操作在同一批次中
+        futures = [self.adb.submit("create_user", f"user{i}", "x") for i in range(5)]
+        for future in futures:
+            with self.assertRaises(sqlite3.OperationalError):
+                future.result(timeout=3)
+            self.assertTrue(future.done())
+    
+    def test_commit_failure_fails_executed_futures(self):
+        """操作已执行但提交失败时同样通知调用方"""
+        connection = self.db.connection
+        
+        @contextmanager
+        def failing_commit():
+            with connection() as conn:
+                yield conn
+            raise sqlite3.OperationalError("disk I/O error")
+        
+        self.db.connection = failing_commit
+        future = self.adb.submit("create_user", "alice", "x")
+        with self.assertRaises(sqlite3.OperationalError):
+            future.result(timeout=3)
+    
+    def test_writer_recovers_after_failure(self):
+        """失败的批次之后写线程继续工作"""
+        connection = self.db.connection
+        
+        @contextmanager
+        def broken():
+            raise sqlite3.OperationalError("database is locked")
+            yield
+        
+        self.db.connection = broken
+        with self.assertRaises(sqlite3.OperationalError):
+            self.adb.submit("create_user", "bob", "x").result(timeout=3)
+        self.db.connection = connection
+        self.assertIsNotNone(self.adb.submit("create_user", "bob", "x").result(timeout=3))
+
+
+if __name__ == "__main__":
+    unittest.main()
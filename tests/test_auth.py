@@ -0,0 +1,61 @@
+"""登录与登录失败限流"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.data.database import Database
+from src.systems.auth import AuthSystem, LoginThrottle
+
+
+class LoginThrottleTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.tmp.name) / "game.db")
+        self.now = 0.0
+        self.throttle = LoginThrottle(limit=3, base=10.0, max_delay=40.0, clock=lambda: self.now)
+        AuthSystem(self.db, self.throttle).register("alice", "secret")
+    
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+    
+    def auth(self, client: str) -> AuthSystem:
+        return AuthSystem(self.db, self.throttle, client=client)
+    
+    def fail(self, client: str, times: int) -> None:
+        for _ in range(times):
+            self.assertFalse(self.auth(client).login("alice", "wrong")[0])
+    
+    def test_lockout_after_limit(self):
+        self.fail("10.0.0.1", 3)
+        ok, message = self.auth("10.0.0.1").login("alice", "secret")
+        self.assertFalse(ok)
+        self.assertIn("10 秒", message)
+        self.assertEqual(self.throttle.rejected, 1)
+        
+        self.now += 10
+        self.assertTrue(self.auth("10.0.0.1").login("alice", "secret")[0])
+    
+    def test_lockout_doubles_up_to_max(self):
+        self.fail("10.0.0.1", 3)
+        for expected in (20, 40, 40):
+            self.now += 100
+            self.fail("10.0.0.1", 1)
+            self.assertIn(f"{expected} 秒", self.auth("10.0.0.1").login("alice", "secret")[1])
+    
+    def test_other_client_is_not_locked_out(self):
+        """别的客户端故意输错密码不会锁住用户自己的登录"""
+        self.fail("10.0.0.66", 10)
+        self.assertTrue(self.auth("10.0.0.1").login("alice", "secret")[0])
+        self.assertFalse(self.auth("10.0.0.66").login("alice", "secret")[0])
+    
+    def test_success_resets_count(self):
+        self.fail("10.0.0.1", 2)
+        self.assertTrue(self.auth("10.0.0.1").login("alice", "secret")[0])
+        self.fail("10.0.0.1", 2)
+        self.assertTrue(self.auth("10.0.0.1").login("alice", "secret")[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""StatStore.apply_damage 的参数检查"""
+import unittest
+
+from src.components.combat import StatStore
+from src.data.models import Stats
+
+
+def make_store(count: int) -> StatStore:
+    store = StatStore()
+    for _ in range(count):
+        store.add(Stats(hp=100, ep=10, atk=10, def_=5, spd=5, fcs=5))
+    return store
+
+
+class ApplyDamageLengthTest(unittest.TestCase):
+    
+    def test_all_rows_length_mismatch(self):
+        store = make_store(3)
+        with self.assertRaises(ValueError):
+            store.apply_damage([20, 20])
+        # 列没有被截断
+        self.assertEqual(list(store.hp), [100, 100, 100])
+        self.assertEqual(len(store.hp), len(store.def_))
+    
+    def test_rows_length_mismatch(self):
+        store = make_store(3)
+        with self.assertRaises(ValueError):
+            store.apply_damage([20], rows=[0, 2])
+        self.assertEqual(list(store.hp), [100, 100, 100])
+    
+    def test_matching_lengths(self):
+        store = make_store(3)
+        self.assertEqual(list(store.apply_damage([20, 30, 2])), [15, 25, 1])
+        self.assertEqual(list(store.apply_damage([10, 10], rows=[0, 2])), [5, 5])
+        self.assertEqual(list(store.hp), [80, 75, 94])
+        self.assertEqual(list(store.apply_damage(10)), [5, 5, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Database 连接池与事务"""
+import gc
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.data.database import Database
+
+
+class AbandonedTransactionTest(unittest.TestCase):
+    """使用连接的生成器被中途丢弃时，连接回到连接池前必须结束事务"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        # 只有一个连接: 事务没有结束的话之后的调用都会失败
+        self.db = Database(Path(self.tmp.name) / "game.db", pool_size=1)
+        self.user_id = self.db.create_user("alice", "x")
+    
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+    
+    def rows(self):
+        with self.db.connection() as conn:
+            yield from conn.execute("SELECT id FROM users UNION ALL SELECT 0")
+    
+    def test_closed_generator(self):
+        rows = self.rows()
+        next(rows)
+        rows.close()
+        self.db.user_cache.clear()
+        self.assertEqual(self.db.get_user_by_id(self.user_id)["username"], "alice")
+        self.assertIsNotNone(self.db.create_user("bob", "x"))
+    
+    def test_collected_generator(self):
+        rows = self.rows()
+        next(rows)
+        del rows
+        gc.collect()
+        self.db.user_cache.clear()
+        self.assertEqual(self.db.get_user_by_id(self.user_id)["username"], "alice")
+        self.assertIsNotNone(self.db.create_user("bob", "x"))
+    
+    def test_abandoned_write_is_rolled_back(self):
+        def writes():
+            with self.db.connection():
+                self.db.create_user("carol", "x")
+                yield
+        
+        gen = writes()
+        next(gen)
+        gen.close()
+        self.assertIsNone(self.db.get_user_by_username("carol"))
+    
+    def test_abandoned_savepoint(self):
+        """嵌套事务中的生成器被丢弃时只回滚自身的修改"""
+        def nested():
+            with self.db.connection():
+                self.db.create_user("dave", "x")
+                yield
+        
+        with self.db.connection():
+            self.db.create_user("erin", "x")
+            gen = nested()
+            next(gen)
+            gen.close()
+        self.assertIsNone(self.db.get_user_by_username("dave"))
+        self.assertIsNotNone(self.db.get_user_by_username("erin"))
+    
+    def test_subtree_iterator_abandoned(self):
+        root = self.db.create_vfs_node(self.user_id, None, "docs", is_directory=True)
+        for i in range(50):
+            self.db.create_vfs_node(self.user_id, root, f"f{i}.txt", content="x")
+        subtree = self.db.iter_vfs_subtree(self.user_id, root)
+        next(subtree)
+        del subtree
+        gc.collect()
+        self.db.user_cache.clear()
+        self.assertIsNotNone(self.db.get_user_by_id(self.user_id))
+        with self.db.connection() as conn:
+            self.assertIsInstance(conn, sqlite3.Connection)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""掉落数量区间"""
+import unittest
+
+from src.data.index import build_index
+from src.data.loader import GameData, Registry
+from src.data.models import DropInfo, EnemyModel, ItemModel, Stats
+from src.systems.loot import MAX_COUNT_SPAN, LootEngine
+
+
+def make_index(count_min: int, count_max: int):
+    item = ItemModel(id="gold", name="金币", type="material")
+    enemy = EnemyModel(
+        id="slime",
+        name="史莱姆",
+        stats=Stats(hp=10),
+        drops=[DropInfo(item_id="gold", count_min=count_min, count_max=count_max)],
+    )
+    return build_index(GameData(Registry([item]), Registry([enemy]), Registry([])))
+
+
+class CountRangeTest(unittest.TestCase):
+    
+    def roll(self, count_min: int, count_max: int, kills: int) -> list[int]:
+        """每次击杀单独结算的数量 (同时覆盖逐个比较和批量两条路径)"""
+        engine = LootEngine(make_index(count_min, count_max), seed=1)
+        single = [engine.roll_enemy(0)[0] for _ in range(kills)]
+        total = engine.roll_enemy(0, kills)[0]
+        self.assertGreaterEqual(total, count_min * kills)
+        self.assertLessEqual(total, count_max * kills)
+        return single
+    
+    def test_narrow_range(self):
+        counts = self.roll(2, 5, 400)
+        self.assertEqual(set(counts), {2, 3, 4, 5})
+    
+    def test_wide_range_is_not_clamped(self):
+        counts = self.roll(1, 10 * MAX_COUNT_SPAN, 400)
+        self.assertTrue(all(1 <= c <= 10 * MAX_COUNT_SPAN for c in counts))
+        self.assertGreater(max(counts), MAX_COUNT_SPAN)
+        total = LootEngine(make_index(1, 10 * MAX_COUNT_SPAN), seed=1).roll_enemy(0, 400)[0]
+        self.assertGreater(total, 400 * MAX_COUNT_SPAN)
+    
+    def test_fixed_count(self):
+        self.assertEqual(set(self.roll(3, 3, 50)), {3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""从旧版本存档迁移"""
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.data.database import CHUNK_SIZE, Database
+from src.data.migrations import LATEST_VERSION, MIGRATIONS, Migrator, migrate_in_background
+
+
+CONTENT = "旧存档" * CHUNK_SIZE
+
+
+def make_v1(path: Path) -> None:
+    """只有 v1 表结构、内容保存在 vfs_nodes.content 中的存档"""
+    conn = sqlite3.connect(path)
+    with conn:
+        for statement in MIGRATIONS[0].statements:
+            conn.execute(statement)
+        conn.execute("INSERT INTO users (id, username, password_hash) VALUES (1, 'alice', 'x')")
+        conn.execute(
+            "INSERT INTO vfs_nodes (id, user_id, parent_id, name, is_directory) VALUES (1, 1, NULL, 'home', 1)"
+        )
+        conn.executemany(
+            "INSERT INTO vfs_nodes (id, user_id, parent_id, name, content) VALUES (?, 1, 1, ?, ?)",
+            [(2 + i, f"f{i}.txt", f"{i}:{CONTENT}") for i in range(5)]
+        )
+        conn.execute("PRAGMA user_version = 1")
+    conn.close()
+
+
+class MigrationTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "game.db"
+        make_v1(self.path)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def contents(self, db: Database) -> list[str]:
+        return [db.read_vfs_content(2 + i) for i in range(5)]
+    
+    def test_open_defers_data_migration(self):
+        db = Database(self.path)
+        # 表结构已就绪，内容转换留给后台，版本号停在数据迁移之前
+        self.assertLess(db.schema_version(), LATEST_VERSION)
+        self.assertEqual(db.get_vfs_snapshots(1), [])
+        self.assertEqual(self.contents(db), [f"{i}:{CONTENT}" for i in range(5)])
+        db.close()
+    
+    def test_migrator_converts_content(self):
+        db = Database(self.path)
+        progress = []
+        version = Migrator(db, batch_size=2, on_progress=progress.append).run()
+        self.assertEqual(version, LATEST_VERSION)
+        self.assertTrue(progress[-1].finished)
+        with db.connection() as conn:
+            legacy = conn.execute("SELECT COUNT(*) FROM vfs_nodes WHERE content IS NOT NULL").fetchone()[0]
+            chunks = conn.execute("SELECT COUNT(*) FROM vfs_chunks").fetchone()[0]
+        self.assertEqual(legacy, 0)
+        self.assertGreater(chunks, 5)
+        self.assertEqual(self.contents(db), [f"{i}:{CONTENT}" for i in range(5)])
+        db.close()
+    
+    def test_background_migration(self):
+        db = Database(self.path)
+        migrator = migrate_in_background(db, batch_size=1)
+        self.assertIsNotNone(migrator)
+        self.assertTrue(migrator.wait(10))
+        self.assertIsNone(migrator.error)
+        self.assertEqual(db.schema_version(), LATEST_VERSION)
+        self.assertIsNone(migrate_in_background(db))
+        db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
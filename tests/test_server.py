@@ -0,0 +1,70 @@
+"""TCP 服务器的并发会话"""
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.data.database import Database
+from src.server.tcp import GameServer
+
+
+PROMPT_SUFFIX = b"$ "
+
+
+async def read_until_prompt(reader: asyncio.StreamReader) -> str:
+    data = b""
+    while not data.endswith(PROMPT_SUFFIX):
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        data += chunk
+    return data.decode("utf-8")
+
+
+class ServerSessionTest(unittest.IsolatedAsyncioTestCase):
+    
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.tmp.name) / "game.db", pool_size=4)
+        self.server = GameServer(self.db, port=0, workers=8)
+        await self.server.start()
+    
+    async def asyncTearDown(self):
+        await self.server.stop()
+        self.db.close()
+        self.tmp.cleanup()
+    
+    async def session(self, index: int) -> list[str]:
+        reader, writer = await asyncio.open_connection(self.server.host, self.server.port)
+        await read_until_prompt(reader)
+        outputs = []
+        for command in (
+            f"register user{index} secret",
+            f"login user{index} secret",
+            f"write note.txt hello {index}",
+            "cat note.txt",
+        ):
+            writer.write(command.encode("utf-8") + b"\n")
+            await writer.drain()
+            outputs.append(await read_until_prompt(reader))
+        writer.write(b"exit\n")
+        await writer.drain()
+        await reader.read()
+        writer.close()
+        await writer.wait_closed()
+        return outputs
+    
+    async def test_concurrent_sessions_are_isolated(self):
+        results = await asyncio.wait_for(
+            asyncio.gather(*(self.session(i) for i in range(20))), 30
+        )
+        for index, outputs in enumerate(results):
+            self.assertIn(f"user{index}@", outputs[1])
+            self.assertIn(f"hello {index}\n", outputs[3])
+        self.assertEqual(self.server.session_count, 20)
+        self.assertEqual(self.server.active_sessions, 0)
+        self.assertIsNotNone(self.db.get_user_by_username("user19"))
+
+
+if __name__ == "__main__":
+    unittest.main()
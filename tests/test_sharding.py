@@ -0,0 +1,93 @@
+"""分片存储的旧存档迁移"""
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.data.database import CHUNK_SIZE, Database
+from src.data.migrations import LATEST_VERSION
+from src.data.sharding import ShardedDatabase
+
+
+BIG = "旧" * (CHUNK_SIZE * 2 + 5)
+
+
+def make_legacy(path: Path) -> None:
+    """改回 v2 存档: 文件内容放在 vfs_nodes.content 中"""
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            """UPDATE vfs_nodes SET content = (
+                   SELECT group_concat(data, '') FROM (
+                       SELECT data FROM vfs_chunks WHERE node_id = vfs_nodes.id ORDER BY seq
+                   )
+               ) WHERE NOT is_directory"""
+        )
+        conn.execute("DELETE FROM vfs_chunks")
+        conn.execute("PRAGMA user_version = 2")
+    conn.close()
+
+
+def create_files(db: Database | ShardedDatabase, user_id: int) -> None:
+    home = db.create_vfs_node(user_id, None, "home", is_directory=True)
+    db.create_vfs_node(user_id, home, "big.txt", content=BIG)
+
+
+def legacy_rows(path: Path) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM vfs_nodes WHERE content IS NOT NULL").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class LegacyContentTest(unittest.TestCase):
+    """旧存档内容的分块转换不能因为分片而被跳过"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def read(self, db: ShardedDatabase, user_id: int) -> str:
+        home = db.get_vfs_node_by_path(user_id, None, "home")
+        node = db.get_vfs_node_by_path(user_id, home['id'], "big.txt")
+        return db.read_vfs_content(node['id'])
+    
+    def test_migrate_legacy_converts_content(self):
+        path = self.dir / "game.db"
+        db = Database(path)
+        user_id = db.create_user("alice", "x")
+        create_files(db, user_id)
+        db.close()
+        make_legacy(path)
+        
+        db = ShardedDatabase(path, 2, check_legacy=False)
+        self.assertEqual(db.migrate_legacy(), (1, []))
+        shard_path = db.shard_path(db.shard_of(user_id))
+        self.assertEqual(legacy_rows(shard_path), 0)
+        self.assertEqual(self.read(db, user_id), BIG)
+        db.close()
+    
+    def test_old_shard_is_migrated_on_open(self):
+        path = self.dir / "game.db"
+        db = ShardedDatabase(path, 0)
+        user_id = db.create_user("alice", "x")
+        create_files(db, user_id)
+        shard_path = db.shard_path(db.shard_of(user_id))
+        db.close()
+        # 旧版本留下的分片
+        make_legacy(shard_path)
+        self.assertEqual(legacy_rows(shard_path), 1)
+        
+        db = ShardedDatabase(path, 0)
+        self.assertEqual(self.read(db, user_id), BIG)
+        self.assertEqual(legacy_rows(shard_path), 0)
+        self.assertEqual(db.for_user(user_id).schema_version(), LATEST_VERSION)
+        db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Shell 的文件输出与管道"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.data.database import Database
+from src.server.console import StreamConsole
+from src.systems.shell import Shell
+
+
+class ShellOutputTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.tmp.name) / "game.db")
+        self.shell = Shell(self.db)
+        self.console = StreamConsole()
+        self.console.PAGE_SIZE = 1000
+        self.execute("register alice pass1234")
+        self.execute("login alice pass1234")
+    
+    def tearDown(self):
+        self.shell.close()
+        self.db.close()
+        self.tmp.cleanup()
+    
+    def execute(self, command: str) -> list[str]:
+        """执行命令，返回输出的各行 (去掉提示符)"""
+        self.shell.execute(self.console, command)
+        output = self.console.drain()
+        while self.console.paging:
+            self.console.next_page()
+            output += self.console.drain()
+        return output.splitlines()
+    
+    def write(self, name: str, content: str) -> None:
+        self.assertTrue(self.shell.vfs.write(name, content).success)
+    
+    def test_wc_trailing_newline(self):
+        self.write("a.txt", "one\ntwo\n")
+        self.write("b.txt", "one\ntwo")
+        self.write("c.txt", "")
+        self.assertEqual(self.execute("wc -l a.txt"), ["2"])
+        self.assertEqual(self.execute("wc a.txt"), ["2 2 8"])
+        self.assertEqual(self.execute("cat a.txt | wc -l"), ["2"])
+        self.assertEqual(self.execute("wc -l b.txt"), ["2"])
+        self.assertEqual(self.execute("wc c.txt"), ["0 0 0"])
+    
+    def test_cat_shows_markup_literally(self):
+        content = "[bold]粗体[/bold] [red]x"
+        self.write("m.txt", content)
+        self.assertIn(content, self.execute("cat m.txt"))
+        self.assertIn(content, self.execute("cat m.txt | head -n 1"))
+        self.assertIn(content, self.execute("head -n 1 m.txt"))
+        self.assertIn(content, self.execute("tail -n 1 m.txt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
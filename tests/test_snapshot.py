@@ -0,0 +1,75 @@
+"""文件系统快照与恢复"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.data.database import CHUNK_SIZE, Database
+from src.systems.filesystem import VirtualFileSystem
+
+
+def tree(db: Database, user_id: int) -> dict[str, str | None]:
+    """路径 -> 文件内容 (目录为 None)"""
+    return {
+        node['path']: None if node['is_directory'] else db.read_vfs_content(node['id'])
+        for node in db.iter_vfs_subtree(user_id, None)
+    }
+
+
+class SnapshotRoundTripTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(Path(self.tmp.name) / "game.db")
+        self.user_id = self.db.create_user("alice", "x")
+        self.vfs = VirtualFileSystem(self.user_id, self.db)
+        self.vfs.init_default_structure()
+        self.vfs.cd("documents")
+        self.vfs.write("notes.txt", "第一行\n第二行\n")
+        self.vfs.write("big.txt", "x" * (CHUNK_SIZE * 2 + 3))
+        self.vfs.mkdir("old")
+        self.vfs.cd("old")
+        self.vfs.write("keep.txt", "keep")
+        self.vfs.cd("/documents")
+    
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+    
+    def test_restore_undoes_changes(self):
+        before = tree(self.db, self.user_id)
+        self.assertEqual(before["documents/old/keep.txt"], "keep")
+        self.assertTrue(self.vfs.snapshot("s1").success)
+        
+        self.vfs.write("notes.txt", "改过了")
+        self.vfs.append("big.txt", "tail")
+        self.vfs.rm_recursive("old")
+        self.vfs.mv("notes.txt", "renamed.txt")
+        self.vfs.mkdir("new")
+        self.vfs.cd("new")
+        self.vfs.write("created.txt", "new")
+        changed = tree(self.db, self.user_id)
+        self.assertEqual(changed["documents/new/created.txt"], "new")
+        self.assertNotIn("documents/old", changed)
+        
+        result = self.vfs.restore("s1")
+        self.assertTrue(result.success, result.message)
+        self.assertEqual(tree(self.db, self.user_id), before)
+        # 当前目录在快照之后才创建，回到根目录
+        self.assertEqual(self.vfs.cwd, "/")
+    
+    def test_restore_drops_later_snapshots(self):
+        self.vfs.snapshot("s1")
+        self.vfs.write("notes.txt", "v2")
+        self.vfs.snapshot("s2")
+        self.vfs.write("notes.txt", "v3")
+        
+        self.assertTrue(self.vfs.restore("s2").success)
+        self.assertEqual(self.vfs.cat("notes.txt").data, "v2")
+        self.assertTrue(self.vfs.restore("1").success)
+        self.assertEqual(self.vfs.cat("notes.txt").data, "第一行\n第二行\n")
+        self.assertEqual([s['name'] for s in self.vfs.snapshots().data], ["s1"])
+        self.assertFalse(self.vfs.restore("s2").success)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""BufferedDatabase 定时提交失败时的处理、读连接中的写操作"""
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from src.data.write_buffer import BufferedDatabase
+
+
+class FailingCommit:
+    """代理连接: fail 为 True 时 commit 抛出异常"""
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self.fail = False
+    
+    def commit(self) -> None:
+        if self.fail:
+            raise sqlite3.OperationalError("disk I/O error")
+        self._conn.commit()
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class FailingBufferedDatabase(BufferedDatabase):
+    
+    def __init__(self, *args, **kwargs):
+        self.proxies: list[FailingCommit] = []
+        super().__init__(*args, **kwargs)
+    
+    def _acquire(self):
+        conn = super()._acquire()
+        if not isinstance(conn, FailingCommit):
+            conn = FailingCommit(conn)
+            self.proxies.append(conn)
+        return conn
+    
+    def fail_commits(self, fail: bool) -> None:
+        for proxy in self.proxies:
+            proxy.fail = fail
+
+
+class TimerFlushFailureTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = FailingBufferedDatabase(Path(self.tmp.name) / "game.db", max_delay_ms=20)
+        self.user_id = self.db.create_user("alice", "x")
+        self.db.flush()
+    
+    def tearDown(self):
+        self.db.fail_commits(False)
+        self.db.close()
+        self.tmp.cleanup()
+    
+    def wait_for_timer(self) -> None:
+        deadline = time.monotonic() + 3
+        while self.db._in_txn and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(self.db._in_txn)
+    
+    def test_error_raised_on_next_write(self):
+        self.db.fail_commits(True)
+        self.db.create_vfs_node(self.user_id, None, "lost.txt")
+        self.wait_for_timer()
+        self.assertIsInstance(self.db.error, sqlite3.OperationalError)
+        
+        self.db.fail_commits(False)
+        with self.assertRaises(sqlite3.OperationalError):
+            self.db.create_vfs_node(self.user_id, None, "next.txt")
+        # 只报告一次，之后的写入正常进行
+        self.assertIsNone(self.db.error)
+        self.assertIsNotNone(self.db.create_vfs_node(self.user_id, None, "next.txt"))
+        self.db.flush()
+        names = [row["name"] for row in self.db.get_vfs_children(self.user_id, None)]
+        self.assertEqual(names, ["next.txt"])
+    
+    def test_error_raised_on_flush_and_close(self):
+        self.db.fail_commits(True)
+        self.db.create_vfs_node(self.user_id, None, "lost.txt")
+        self.wait_for_timer()
+        self.db.fail_commits(False)
+        with self.assertRaises(sqlite3.OperationalError):
+            self.db.flush()
+        
+        self.db.fail_commits(True)
+        self.db.create_vfs_node(self.user_id, None, "lost2.txt")
+        self.wait_for_timer()
+        self.db.fail_commits(False)
+        with self.assertRaises(sqlite3.OperationalError):
+            self.db.close()
+
+
+class WriteInsideConnectionTest(unittest.TestCase):
+    """本线程持有 connection() 时的写操作不能等待第二个连接"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = BufferedDatabase(Path(self.tmp.name) / "game.db")
+    
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+    
+    def run_with_timeout(self, func) -> None:
+        thread = threading.Thread(target=func, daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive(), "写操作在等待连接")
+    
+    def test_write_joins_open_connection(self):
+        def work():
+            with self.db.connection() as conn:
+                conn.execute("SELECT COUNT(*) FROM users").fetchone()
+                self.db.create_user("alice", "x")
+        self.run_with_timeout(work)
+        self.assertFalse(self.db._in_txn)
+        self.assertIsNotNone(self.db.get_user_by_username("alice"))
+    
+    def test_write_rolled_back_with_connection(self):
+        def work():
+            try:
+                with self.db.connection():
+                    self.db.create_user("bob", "x")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.run_with_timeout(work)
+        self.assertIsNone(self.db.get_user_by_username("bob"))
+
+
+if __name__ == "__main__":
+    unittest.main()